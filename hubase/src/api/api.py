@@ -1,34 +1,71 @@
 import asyncio
-import json
+import csv
+import dataclasses
+import io
+import itertools
 import logging
+import threading
 import typing as t
 from pathlib import Path
-
-from asyncer import asyncify
-from fastapi import Body, FastAPI, HTTPException, WebSocket
-from mistralai.exceptions import MistralAPIException
-from pydantic import BaseModel
+from urllib.parse import urlparse
+
+import orjson
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    WebSocket,
+)
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, SecretStr
 from starlette.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 from starlette.websockets import WebSocketDisconnect
 
+from api.download import (
+    RangeNotSatisfiable,
+    etag_of,
+    follow_file,
+    gzipped,
+    parse_range,
+    read_range,
+)
 from api.model import (
     CsvDownloadLink,
     CsvOptions,
-    CsvResponse,
-    CsvRow,
+    JobCreated,
     Prompt,
     UpdatePrompt,
 )
-from exceptions import HuggingFaceException
-from main import (
-    get_names_and_positions_csv,
-    get_names_and_positions_csv_with_progress,
+from api.producer import Producer
+from api.ws_logging_handler import WebSocketLoggingHandler
+from cache.llm import ResponseCacheStats, default_response_cache
+from cache.sqlite_store import CacheStats
+from http_client import default_http_client
+from hubase_md import default_page_cache
+from jobs import (
+    Job,
+    JobLimitExceeded,
+    JobNotFound,
+    JobStatus,
+    RowsSkipped,
+    default_job_manager,
 )
-from model import CSVRow
+from metrics import default_metrics
 from prompt.fs_prompt import FileSystemPrompt
+from results_store import (
+    LeadsPage,
+    LeadsQuery,
+    ResultsStore,
+    default_results_store,
+)
 from search_queries import SearchQueries
 from settings import settings
+from word_classifications.ner.local import default_local_ner_backend
+from writer.formats import is_compressed, media_type_of
 
 app = FastAPI()
 
@@ -45,19 +82,14 @@ app.add_middleware(
 )
 
 
-class WebSocketLoggingHandler(logging.Handler):
-    def __init__(self, websocket: WebSocket):
-        super().__init__()
-        self.websocket = websocket
-
-    def emit(self, record: logging.LogRecord):
-        log_entry = self.format(record)
-        asyncio.run(self.__send_log(log_entry))
-
-    async def __send_log(self, log_entry: str):
-        await self.websocket.send_json(
-            CsvResponse(type="log", data=log_entry).model_dump()
-        )
+@app.on_event("shutdown")
+async def close_http_client() -> None:
+    default_job_manager().shutdown()
+    # Пул NER создаём только по требованию, поэтому и закрываем, только
+    # если он был создан.
+    if default_local_ner_backend.cache_info().currsize > 0:
+        default_local_ner_backend().close()
+    default_http_client().close()
 
 
 class SearchQueryResponse(BaseModel):
@@ -65,92 +97,328 @@ class SearchQueryResponse(BaseModel):
     data: str | list[str]
 
 
+def _is_authorized(access_token: SecretStr | None) -> bool:
+    if access_token != settings.access_token:
+        logging.info("Доступ запрещён.")
+        return False
+
+    logging.info("Доступ разрешён.")
+    return True
+
+
+def _authorize(
+    access_token: t.Annotated[SecretStr | None, Query()] = None,
+) -> None:
+    # Не выдаём, существует ли ресурс, пока токен неверный.
+    if not _is_authorized(access_token):
+        raise HTTPException(status_code=404)
+
+
 @app.websocket("/api/v1/csv/progress")
 async def get_csv_with_progress(ws: WebSocket) -> None:
     await ws.accept()
 
     csv_options = CsvOptions.parse_obj(await ws.receive_json())
 
-    if csv_options.access_token != settings.access_token:
-        logging.info("Доступ запрещён.")
+    if not _is_authorized(csv_options.access_token):
         await ws.close()
         return
 
-    logging.info("Доступ разрешён.")
+    try:
+        job = default_job_manager().submit(csv_options)
+    except JobLimitExceeded as err:
+        await ws.send_text(_message("log", str(err)))
+        await ws.close()
+        return
+
+    await ws.send_text(_message("job", job.id))
+    await _stream_job(ws, job, offset=0)
 
-    logging_handler = WebSocketLoggingHandler(ws)
-    formatter = logging.Formatter("%(asctime)s | %(message)s", "%H:%M:%S")
-    logging_handler.setFormatter(formatter)
 
-    logger = logging.getLogger(f"ws_{hex(id(ws))}")
-    logger.setLevel(logging.INFO)
-    logger.addHandler(logging_handler)
+@app.websocket("/api/v1/jobs/{job_id}/stream")
+async def stream_job(
+    ws: WebSocket,
+    job_id: str,
+    offset: int = 0,
+    access_token: SecretStr | None = None,
+) -> None:
+    await ws.accept()
+
+    if not _is_authorized(access_token):
+        await ws.close()
+        return
 
     try:
-        rows = await asyncify(get_names_and_positions_csv_with_progress)(
-            csv_options=csv_options,
-            logger=logger,
-        )
+        job = default_job_manager().get(job_id)
+    except JobNotFound as err:
+        await ws.send_text(_message("log", str(err)))
+        await ws.close()
+        return
 
-        def next_(gen: t.Iterator[any]) -> any:
-            try:
-                return next(gen)
-            except StopIteration:
-                return None
-
-        download_link = await asyncify(next_)(rows)
-        while True:
-            row: t.Optional[CSVRow] = await asyncify(next_)(rows)
-
-            if row is None:
-                break
-
-            row_dto = CsvRow(
-                name=row.name,
-                position=row.position,
-                searched_company=row.searched_company,
-                inferenced_company=row.inferenced_company,
-                original_url=row.original_url,
-                source=row.source,
-                download_link=download_link,
-            )
+    await _stream_job(ws, job, offset)
 
-            csv_response = CsvResponse(type="csv_row", data=row_dto)
-            await ws.send_json(csv_response.model_dump())
 
+async def _stream_job(ws: WebSocket, job: Job, offset: int) -> None:
+    logging_handler = WebSocketLoggingHandler(
+        ws,
+        max_records=settings.ws_log_max_records,
+        flush_interval=settings.ws_log_flush_interval,
+    ).start()
+    formatter = logging.Formatter("%(asctime)s | %(message)s", "%H:%M:%S")
+    logging_handler.setFormatter(formatter)
+    job.logger.addHandler(logging_handler)
+
+    # Producer.cancel() не может прервать поток, ждущий новых строк,
+    # поэтому follow сам проверяет stop между ожиданиями.
+    stop = threading.Event()
+    producer = Producer(
+        job.follow(offset, stop=stop),
+        asyncio.get_running_loop(),
+        queue_size=settings.ws_queue_size,
+    ).start()
+    watcher = asyncio.create_task(_cancel_on_disconnect(ws, producer))
+
+    try:
+        async for items in producer.batches(
+            settings.ws_batch_max_rows, settings.ws_batch_max_delay
+        ):
+            download_link = job.status().download_link
+            for skipped, rows in itertools.groupby(
+                items, key=lambda item: isinstance(item, RowsSkipped)
+            ):
+                if skipped:
+                    for gap in rows:
+                        await ws.send_text(
+                            _message("rows_skipped", dataclasses.asdict(gap))
+                        )
+                    continue
+
+                await ws.send_text(
+                    _message(
+                        "csv_rows",
+                        [
+                            row.__dict__ | {"download_link": download_link}
+                            for row in rows
+                        ],
+                    )
+                )
+
+        await logging_handler.aclose()
+        await ws.send_text(
+            _message(
+                "status",
+                dataclasses.asdict(job.status())
+                | {"metrics": default_metrics().summary(job.id)},
+            )
+        )
         await ws.close()
     except WebSocketDisconnect:
         pass
-    except HuggingFaceException as err:
-        raise HTTPException(status_code=403, detail=str(err))
-    except MistralAPIException as err:
-        msg = json.loads("{" + err.message.split("{")[-1])
+    finally:
+        stop.set()
+        producer.cancel()
+        watcher.cancel()
+        job.logger.removeHandler(logging_handler)
+        await logging_handler.aclose()
+
+
+async def _cancel_on_disconnect(ws: WebSocket, producer: Producer) -> None:
+    while True:
+        message = await ws.receive()
+        if message["type"] == "websocket.disconnect":
+            producer.cancel()
+            return
+
+
+def _message(type_: str, data: t.Any) -> str:
+    return orjson.dumps({"type": type_, "data": data}).decode("utf-8")
+
+
+@app.post("/api/v1/jobs")
+def create_job(csv_options: CsvOptions) -> JobCreated:
+    return JobCreated(job_id=_submit(csv_options).id)
+
+
+@app.get("/api/v1/jobs/{job_id}", dependencies=[Depends(_authorize)])
+def get_job_status(job_id: str) -> JobStatus:
+    return _job(job_id).status()
+
+
+@app.delete("/api/v1/jobs/{job_id}", dependencies=[Depends(_authorize)])
+def cancel_job(job_id: str) -> JobStatus:
+    job = _job(job_id)
+    job.cancel()
+    return job.status()
+
+
+@app.get("/api/v1/jobs/{job_id}/download", dependencies=[Depends(_authorize)])
+def download_job_result(
+    job_id: str,
+    range_: t.Annotated[str | None, Header(alias="Range")] = None,
+    if_range: t.Annotated[str | None, Header()] = None,
+    accept_encoding: t.Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    job = _job(job_id)
+    download_link = job.status().download_link
+    if download_link is None:
         raise HTTPException(
-            status_code=403, detail=f"Ошибка MistralAPI: {msg['message']}"
+            status_code=409,
+            detail="Файл ещё не создан, повторите позже.",
+            headers={"Retry-After": "1"},
         )
 
+    path = Path("../results") / Path(urlparse(download_link).path).name
+    finished = job.finished
+    stat = path.stat()
+    etag = etag_of(stat)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename={path.name}",
+        "ETag": etag,
+    }
+
+    # Если файл перезаписан после начала скачивания, старый диапазон
+    # не подходит, и отдаём новую версию целиком.
+    if range_ is not None and if_range in (None, etag):
+        # Докачка: отдаём то, что уже записано на диск. Пока задача идёт,
+        # полный размер неизвестен.
+        size = stat.st_size
+        try:
+            byte_range = parse_range(range_, size)
+        except RangeNotSatisfiable as err:
+            raise HTTPException(
+                status_code=416,
+                detail=str(err),
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        start, end = byte_range
+        headers["Content-Range"] = (
+            f"bytes {start}-{end}/{size if finished else '*'}"
+        )
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            read_range(
+                path,
+                start,
+                end,
+                etag=etag,
+                chunk_size=settings.download_chunk_size,
+            ),
+            status_code=206,
+            media_type=media_type_of(path.name),
+            headers=headers,
+        )
+
+    chunks = follow_file(
+        path,
+        job,
+        etag=etag,
+        chunk_size=settings.download_chunk_size,
+        poll_interval=settings.download_poll_interval,
+    )
+    if "gzip" in (accept_encoding or "") and not is_compressed(path.name):
+        chunks = gzipped(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(
+        chunks, media_type=media_type_of(path.name), headers=headers
+    )
+
 
 @app.post("/api/v1/csv")
 def get_csv(csv_options: CsvOptions) -> CsvDownloadLink:
-    if csv_options.access_token != settings.access_token:
-        logging.info("Доступ запрещён.")
-        raise HTTPException(status_code=404)
+    status = _submit(csv_options).wait()
+    if status.state == "failed":
+        raise HTTPException(status_code=403, detail=status.error)
+    return CsvDownloadLink(download_link=status.download_link or "")
 
-    logging.info("Доступ разрешён.")
+
+def _submit(csv_options: CsvOptions) -> Job:
+    _authorize(csv_options.access_token)
 
     try:
-        download_link = get_names_and_positions_csv(
-            csv_options.companies, csv_options.sites, csv_options.positions
-        )
-    except HuggingFaceException as err:
-        raise HTTPException(status_code=403, detail=str(err))
-    except MistralAPIException as err:
-        msg = json.loads("{" + err.message.split("{")[-1])
+        return default_job_manager().submit(csv_options)
+    except JobLimitExceeded as err:
+        raise HTTPException(status_code=429, detail=str(err))
+
+
+def _job(job_id: str) -> Job:
+    try:
+        return default_job_manager().get(job_id)
+    except JobNotFound as err:
+        raise HTTPException(status_code=404, detail=str(err))
+
+
+@app.get("/api/v1/cache/pages", dependencies=[Depends(_authorize)])
+def get_page_cache_stats() -> CacheStats | None:
+    page_cache = default_page_cache()
+    return page_cache.stats() if page_cache is not None else None
+
+
+@app.get("/api/v1/cache/llm", dependencies=[Depends(_authorize)])
+def get_llm_cache_stats() -> ResponseCacheStats | None:
+    response_cache = default_response_cache()
+    return response_cache.stats() if response_cache is not None else None
+
+
+@app.get("/api/v1/leads", dependencies=[Depends(_authorize)])
+def get_leads(
+    query: t.Annotated[LeadsQuery, Depends()],
+    limit: t.Annotated[int, Query(ge=1, le=1000)] = 50,
+    offset: t.Annotated[int, Query(ge=0)] = 0,
+) -> LeadsPage:
+    return _results_store().query(query, limit, offset)
+
+
+@app.get("/api/v1/leads/export", dependencies=[Depends(_authorize)])
+def export_leads(
+    query: t.Annotated[LeadsQuery, Depends()],
+) -> StreamingResponse:
+    store = _results_store()
+
+    def lines() -> t.Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(_lead_headers)
+        for lead in store.export(query):
+            writer.writerow([getattr(lead, field) for field in _lead_headers])
+            if buffer.tell() > 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(
+        lines(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=leads.csv"},
+    )
+
+
+_lead_headers = [
+    "name",
+    "position",
+    "searched_company",
+    "inferenced_company",
+    "original_url",
+    "source",
+]
+
+
+def _results_store() -> ResultsStore:
+    store = default_results_store()
+    if store is None:
         raise HTTPException(
-            status_code=403, detail=f"Ошибка MistralAPI: {msg['message']}"
+            status_code=404, detail="Хранилище результатов отключено."
         )
-    return CsvDownloadLink(
-        download_link=f"http://{settings.download_host}:{settings.port}/static/results/{download_link}"
+    return store
+
+
+@app.get("/metrics")
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        default_metrics().render(),
+        media_type="text/plain; version=0.0.4",
     )
 
 
@@ -0,0 +1,107 @@
+import os
+import re
+import typing as t
+import zlib
+from pathlib import Path
+
+from jobs import Job
+
+_range_re = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileReplaced(Exception):
+    pass
+
+
+def etag_of(stat: os.stat_result) -> str:
+    # Файл результата только дописывается, пока его не подменят целиком
+    # после слияния дубликатов. Поэтому версию задаёт inode, а не размер:
+    # докачка дописанного файла остаётся корректной.
+    return f'"{stat.st_dev:x}-{stat.st_ino:x}"'
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    # Поддерживаем один диапазон: "bytes=start-end", "bytes=start-"
+    # и "bytes=-suffix". Конец диапазона включительно, как в заголовке.
+    if header is None:
+        return None
+
+    match = _range_re.match(header.strip())
+    if match is None:
+        raise RangeNotSatisfiable(f"Неподдерживаемый диапазон: {header}")
+
+    first, last = match.groups()
+    if not first and not last:
+        raise RangeNotSatisfiable(f"Неподдерживаемый диапазон: {header}")
+
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+
+    if start >= size or start > end:
+        raise RangeNotSatisfiable(f"Диапазон вне файла: {header}")
+    return start, end
+
+
+def read_range(
+    path: Path, start: int, end: int, *, etag: str, chunk_size: int
+) -> t.Iterator[bytes]:
+    with _open(path, etag) as fd:
+        fd.seek(start)
+        left = end - start + 1
+        while left > 0:
+            chunk = fd.read(min(chunk_size, left))
+            if not chunk:
+                return
+            left -= len(chunk)
+            yield chunk
+
+
+def follow_file(
+    path: Path,
+    job: Job,
+    *,
+    etag: str,
+    chunk_size: int,
+    poll_interval: float,
+) -> t.Iterator[bytes]:
+    # Отдаём файл по мере записи, пока задача не завершится. После
+    # завершения дочитываем остаток: CSV закрывается раньше смены статуса.
+    with _open(path, etag) as fd:
+        while True:
+            finished = job.finished
+            chunk = fd.read(chunk_size)
+            if chunk:
+                yield chunk
+            elif not finished:
+                job.wait(poll_interval)
+            elif etag_of(path.stat()) != etag:
+                # В конце задачи файл переписали, и отданное устарело.
+                # Обрываем ответ: клиент докачает с If-Range и получит
+                # новую версию целиком.
+                raise FileReplaced(f"Файл {path.name} перезаписан.")
+            else:
+                return
+
+
+def _open(path: Path, etag: str) -> t.BinaryIO:
+    fd = open(path, mode="rb")
+    if etag_of(os.fstat(fd.fileno())) != etag:
+        fd.close()
+        raise FileReplaced(f"Файл {path.name} перезаписан.")
+    return fd
+
+
+def gzipped(chunks: t.Iterable[bytes]) -> t.Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        # Сбрасываем буфер на каждом куске, чтобы клиент получал строки,
+        # не дожидаясь конца задачи.
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
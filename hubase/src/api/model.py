@@ -1,6 +1,8 @@
 import typing as t
 
-from pydantic import BaseModel, SecretStr
+from pydantic import BaseModel, Field, SecretStr
+
+OutputFormat = t.Literal["csv", "csv.gz", "jsonl", "parquet"]
 
 
 class CsvOptions(BaseModel):
@@ -14,6 +16,13 @@ class CsvOptions(BaseModel):
     max_lead_count: int
     openai_api_key: SecretStr
     openai_api_base: str
+    refresh_search_cache: bool = False
+    use_prefilter: bool = True
+    extraction_mode: t.Literal["online", "batch"] = "online"
+    delta: bool = False
+    delta_recheck_interval: float | None = Field(None, ge=0)
+    output_format: OutputFormat = "csv"
+    job_id: str | None = Field(None, pattern=r"^[0-9A-Za-z_-]{1,64}$")
 
 
 class CsvDownloadLink(BaseModel):
@@ -38,6 +47,12 @@ class UpdatePrompt(BaseModel):
     prompt_text: str
 
 
+class JobCreated(BaseModel):
+    job_id: str
+
+
 class CsvResponse(BaseModel):
-    type: t.Literal["log", "csv_row"]
-    data: CsvRow | str
+    type: t.Literal[
+        "log", "csv_row", "csv_rows", "rows_skipped", "job", "status"
+    ]
+    data: list[CsvRow] | CsvRow | dict | str
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import typing as t
+from dataclasses import dataclass
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class _Failure:
+    error: BaseException
+
+
+class Producer:
+    def __init__(
+        self,
+        items: t.Iterator[t.Any],
+        loop: asyncio.AbstractEventLoop,
+        *,
+        queue_size: int = 256,
+    ) -> None:
+        self.__items = items
+        self.__loop = loop
+        # Место хотя бы под один элемент после отмены, см. cancel().
+        self.__queue: asyncio.Queue = asyncio.Queue(max(queue_size, 2))
+        self.__cancelled = threading.Event()
+        self.__thread = threading.Thread(
+            target=self.__produce, name="ws-producer", daemon=True
+        )
+
+    def start(self) -> "Producer":
+        self.__thread.start()
+        return self
+
+    async def next(self) -> t.Any:
+        item = await self.__queue.get()
+        if item is _DONE:
+            raise StopAsyncIteration
+        if isinstance(item, _Failure):
+            raise item.error
+        return item
+
+    async def batches(
+        self, max_items: int, max_delay: float
+    ) -> t.AsyncIterator[list[t.Any]]:
+        while True:
+            item = await self.__queue.get()
+            if item is _DONE:
+                return
+
+            batch = []
+            deadline = self.__loop.time() + max_delay
+            while True:
+                if isinstance(item, _Failure):
+                    if batch:
+                        yield batch
+                    raise item.error
+
+                batch.append(item)
+                timeout = deadline - self.__loop.time()
+                if len(batch) >= max_items or timeout <= 0:
+                    break
+
+                try:
+                    item = await asyncio.wait_for(self.__queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    yield batch
+                    return
+
+            yield batch
+
+    def cancel(self) -> None:
+        # Вызывается из цикла событий. Освобождаем очередь, чтобы поток
+        # не завис на put, и будим потребителя.
+        if self.__cancelled.is_set():
+            return
+
+        self.__cancelled.set()
+        while not self.__queue.empty():
+            self.__queue.get_nowait()
+        self.__queue.put_nowait(_DONE)
+
+    def __produce(self) -> None:
+        try:
+            for item in self.__items:
+                if self.__cancelled.is_set():
+                    break
+                self.__put(item)
+        except BaseException as err:
+            if not self.__cancelled.is_set():
+                self.__put(_Failure(err))
+        else:
+            if not self.__cancelled.is_set():
+                self.__put(_DONE)
+        finally:
+            close = getattr(self.__items, "close", None)
+            if close is not None:
+                close()
+
+    def __put(self, item: t.Any) -> None:
+        asyncio.run_coroutine_threadsafe(
+            self.__queue.put(item), self.__loop
+        ).result()
@@ -0,0 +1,74 @@
+import asyncio
+import collections
+import logging
+import threading
+
+import orjson
+from fastapi import WebSocket
+
+
+class WebSocketLoggingHandler(logging.Handler):
+    def __init__(
+        self,
+        websocket: WebSocket,
+        *,
+        max_records: int = 1000,
+        flush_interval: float = 0.5,
+    ) -> None:
+        super().__init__()
+        self.websocket = websocket
+        self.__max_records = max_records
+        self.__flush_interval = flush_interval
+        self.__records: collections.deque[str] = collections.deque()
+        self.__dropped = 0
+        self.__lock = threading.Lock()
+        self.__sender: asyncio.Task | None = None
+
+    def start(self) -> "WebSocketLoggingHandler":
+        self.__sender = asyncio.create_task(self.__send_periodically())
+        return self
+
+    async def aclose(self) -> None:
+        if self.__sender is not None:
+            self.__sender.cancel()
+        try:
+            await self.__flush()
+        except Exception:
+            pass
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Вызывается из рабочих потоков конвейера: только кладём запись
+        # в очередь, отправкой занимается задача в цикле событий.
+        try:
+            log_entry = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self.__lock:
+            if len(self.__records) >= self.__max_records:
+                self.__dropped += 1
+            else:
+                self.__records.append(log_entry)
+
+    async def __send_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.__flush_interval)
+            await self.__flush()
+
+    async def __flush(self) -> None:
+        with self.__lock:
+            records = list(self.__records)
+            self.__records.clear()
+            dropped, self.__dropped = self.__dropped, 0
+
+        if dropped > 0:
+            records.append(f"... пропущено сообщений: {dropped}")
+        if not records:
+            return
+
+        await self.websocket.send_text(
+            orjson.dumps({"type": "log", "data": "\n".join(records)}).decode(
+                "utf-8"
+            )
+        )
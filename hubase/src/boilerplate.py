@@ -0,0 +1,153 @@
+import collections
+import functools
+import hashlib
+import json
+import threading
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from cache.sqlite_store import SqliteStore
+from settings import settings
+from urls import canonical_url
+from word_classifications.chunker import approximate_token_count
+
+
+@dataclass(frozen=True)
+class StrippedPage:
+    text: str
+    removed_bytes: int
+    removed_tokens: int
+
+
+@dataclass
+class _DomainIndex:
+    pages: set[str]
+    pages_with_line: collections.Counter[str]
+
+
+class BoilerplateStripper:
+    __max_lines_per_domain = 20000
+    __max_pages_per_domain = 5000
+
+    def __init__(
+        self,
+        *,
+        min_pages: int = 2,
+        min_block_lines: int = 3,
+        store: SqliteStore | None = None,
+        count_tokens: t.Callable[[str], int] = approximate_token_count,
+    ) -> None:
+        self.__min_pages = min_pages
+        self.__min_block_lines = min_block_lines
+        self.__store = store
+        self.__count_tokens = count_tokens
+        self.__domains: dict[str, _DomainIndex] = {}
+        self.__lock = threading.Lock()
+
+    def strip(self, url: str, text: str) -> StrippedPage:
+        lines = text.splitlines(keepends=True)
+        hashes = [self.__hash(line) for line in lines]
+
+        url = canonical_url(url)
+        with self.__lock:
+            index = self.__domain(urlsplit(url).netloc)
+            # Страница учитывается один раз, иначе при повторном запуске
+            # она целиком совпадёт сама с собой.
+            page = self.__hash(url)
+            if page not in index.pages:
+                index.pages.add(page)
+                index.pages_with_line.update(
+                    set(h for h in hashes if h is not None)
+                )
+            repeated = [
+                h is not None and index.pages_with_line[h] >= self.__min_pages
+                for h in hashes
+            ]
+
+        kept = []
+        removed = []
+        for start, end, is_boilerplate in self.__blocks(hashes, repeated):
+            block = "".join(lines[start:end])
+            (removed if is_boilerplate else kept).append(block)
+
+        removed_text = "".join(removed)
+        return StrippedPage(
+            text="".join(kept),
+            removed_bytes=len(removed_text.encode("utf-8")),
+            removed_tokens=self.__count_tokens(removed_text),
+        )
+
+    def save(self) -> None:
+        if self.__store is None:
+            return
+
+        with self.__lock:
+            for domain, index in self.__domains.items():
+                self.__store.put(
+                    domain,
+                    json.dumps(
+                        {
+                            "pages": list(index.pages)[
+                                : self.__max_pages_per_domain
+                            ],
+                            "lines": dict(
+                                index.pages_with_line.most_common(
+                                    self.__max_lines_per_domain
+                                )
+                            ),
+                        }
+                    ).encode("utf-8"),
+                )
+
+    def __blocks(
+        self, hashes: list[str | None], repeated: list[bool]
+    ) -> t.Iterator[tuple[int, int, bool]]:
+        # Вырезаем только длинные повторяющиеся блоки: одиночная строка
+        # вроде "Финансовый директор" вполне может быть полезной.
+        start = 0
+        while start < len(hashes):
+            end = start
+            repeated_lines = 0
+            while end < len(hashes) and (repeated[end] or hashes[end] is None):
+                repeated_lines += repeated[end]
+                end += 1
+
+            if repeated_lines >= self.__min_block_lines:
+                yield start, end, True
+                start = end
+            else:
+                yield start, max(end, start + 1), False
+                start = max(end, start + 1)
+
+    def __domain(self, domain: str) -> _DomainIndex:
+        if domain not in self.__domains:
+            stored = (
+                self.__store.get(domain) if self.__store is not None else None
+            )
+            stored = (
+                json.loads(stored)
+                if stored is not None
+                else {"pages": [], "lines": {}}
+            )
+            self.__domains[domain] = _DomainIndex(
+                pages=set(stored["pages"]),
+                pages_with_line=collections.Counter(stored["lines"]),
+            )
+        return self.__domains[domain]
+
+    @staticmethod
+    def __hash(line: str) -> str | None:
+        line = " ".join(line.split())
+        if line == "":
+            return None
+        return hashlib.blake2b(line.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@functools.cache
+def default_boilerplate_store() -> SqliteStore | None:
+    if not settings.boilerplate_persist:
+        return None
+
+    return SqliteStore(Path(settings.boilerplate_store_path))
@@ -0,0 +1,113 @@
+import collections
+import functools
+import hashlib
+import json
+import threading
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+from cache.sqlite_store import SqliteStore
+from settings import settings
+
+
+@dataclass(frozen=True)
+class ResponseCacheStats:
+    hits: int
+    misses: int
+    entries: int
+    hit_rate: float
+
+
+class ResponseCache:
+    def __init__(
+        self, max_entries: int = 4096, store: SqliteStore | None = None
+    ) -> None:
+        self.__max_entries = max_entries
+        self.__store = store
+        self.__entries: collections.OrderedDict[str, str] = (
+            collections.OrderedDict()
+        )
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    @staticmethod
+    def key(
+        model: str,
+        prompt: str,
+        schema: dict | None = None,
+        temperature: float | None = None,
+    ) -> str:
+        payload = json.dumps(
+            [model, prompt, schema, temperature],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return self.__entries[key]
+
+        stored = self.__store.get(key) if self.__store is not None else None
+
+        with self.__lock:
+            if stored is None:
+                self.__misses += 1
+                return None
+
+            self.__hits += 1
+            value = stored.decode("utf-8")
+            self.__remember(key, value)
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self.__lock:
+            self.__remember(key, value)
+
+        if self.__store is not None:
+            self.__store.put(key, value.encode("utf-8"))
+
+    def cached(self, key: str, compute: t.Callable[[], str]) -> str:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> ResponseCacheStats:
+        with self.__lock:
+            requests = self.__hits + self.__misses
+            return ResponseCacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                entries=len(self.__entries),
+                hit_rate=self.__hits / requests if requests > 0 else 0.0,
+            )
+
+    def __remember(self, key: str, value: str) -> None:
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+
+
+@functools.cache
+def default_response_cache() -> ResponseCache | None:
+    if not settings.llm_cache_enabled:
+        return None
+
+    store = (
+        SqliteStore(
+            Path(settings.llm_cache_path),
+            ttl=settings.llm_cache_ttl,
+            compress=True,
+        )
+        if settings.llm_cache_persist
+        else None
+    )
+    return ResponseCache(settings.llm_cache_max_entries, store)
@@ -0,0 +1,145 @@
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+    size: int
+
+
+class SqliteStore:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        compress: bool = False,
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__ttl = ttl
+        self.__max_bytes = max_bytes
+        self.__compress = compress
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "compressed INTEGER NOT NULL, "
+                "expires_at REAL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed_at "
+                "ON entries (accessed_at)"
+            )
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self.__lock, self.__connection:
+            row = self.__connection.execute(
+                "SELECT value, compressed, expires_at FROM entries "
+                "WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                self.__misses += 1
+                return None
+
+            value, compressed, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self.__connection.execute(
+                    "DELETE FROM entries WHERE key = ?", (key,)
+                )
+                self.__misses += 1
+                return None
+
+            self.__connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self.__hits += 1
+
+        return zlib.decompress(value) if compressed else value
+
+    def put(self, key: str, value: bytes, *, ttl: float | None = None) -> None:
+        now = time.time()
+        ttl = ttl if ttl is not None else self.__ttl
+        stored = zlib.compress(value) if self.__compress else value
+
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, size, compressed, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    stored,
+                    len(stored),
+                    int(self.__compress),
+                    now + ttl if ttl is not None else None,
+                    now,
+                ),
+            )
+            self.__evict(now)
+
+    def delete(self, key: str) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "DELETE FROM entries WHERE key = ?", (key,)
+            )
+
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            entries, size = self.__connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                entries=entries,
+                size=size,
+            )
+
+    def __evict(self, now: float) -> None:
+        self.__connection.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL "
+            "AND expires_at <= ?",
+            (now,),
+        )
+
+        if self.__max_bytes is None:
+            return
+
+        (size,) = self.__connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if size <= self.__max_bytes:
+            return
+
+        # Удаляем самые давно прочитанные записи, пока не влезем в лимит.
+        evicted = 0
+        for key, entry_size in self.__connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            if size - evicted <= self.__max_bytes:
+                break
+            self.__connection.execute(
+                "DELETE FROM entries WHERE key = ?", (key,)
+            )
+            evicted += entry_size
@@ -0,0 +1,128 @@
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from model import CSVRow
+from urls import canonical_url
+
+
+@dataclass(frozen=True)
+class CheckpointStats:
+    queries: int
+    pages: int
+    rows: int
+
+
+class Checkpoint:
+    def __init__(self, path: Path, job_id: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__job_id = job_id
+        self.__lock = threading.Lock()
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS queries ("
+                "job_id TEXT NOT NULL, "
+                "query TEXT NOT NULL, "
+                "urls TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, query))"
+            )
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "job_id TEXT NOT NULL, "
+                "url TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, url))"
+            )
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS rows ("
+                "job_id TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "row TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, key))"
+            )
+
+    def urls_of(self, query: str) -> list[str] | None:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT urls FROM queries WHERE job_id = ? AND query = ?",
+                (self.__job_id, query),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def query_done(self, query: str, urls: list[str]) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO queries (job_id, query, urls) "
+                "VALUES (?, ?, ?)",
+                (self.__job_id, query, json.dumps(urls)),
+            )
+
+    def is_page_done(self, url: str) -> bool:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT 1 FROM pages WHERE job_id = ? AND url = ?",
+                (self.__job_id, canonical_url(url)),
+            ).fetchone()
+        return row is not None
+
+    def page_done(self, url: str) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR IGNORE INTO pages (job_id, url) VALUES (?, ?)",
+                (self.__job_id, canonical_url(url)),
+            )
+
+    def add_row(self, row: CSVRow) -> bool:
+        key = hashlib.sha256(
+            json.dumps(
+                [row.name, row.searched_company, row.original_url],
+                ensure_ascii=False,
+            ).encode("utf-8")
+        ).hexdigest()
+        with self.__lock, self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT OR IGNORE INTO rows (job_id, key, row) "
+                "VALUES (?, ?, ?)",
+                (
+                    self.__job_id,
+                    key,
+                    json.dumps(dataclasses.asdict(row), ensure_ascii=False),
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def rows(self) -> list[CSVRow]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT row FROM rows WHERE job_id = ? ORDER BY rowid",
+                (self.__job_id,),
+            ).fetchall()
+        return [CSVRow(**json.loads(row)) for (row,) in rows]
+
+    def stats(self) -> CheckpointStats:
+        with self.__lock:
+            counts = [
+                self.__connection.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE job_id = ?",
+                    (self.__job_id,),
+                ).fetchone()[0]
+                for table in ("queries", "pages", "rows")
+            ]
+        return CheckpointStats(*counts)
+
+    def delete(self) -> None:
+        with self.__lock, self.__connection:
+            for table in ("queries", "pages", "rows"):
+                self.__connection.execute(
+                    f"DELETE FROM {table} WHERE job_id = ?", (self.__job_id,)
+                )
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
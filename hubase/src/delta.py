@@ -0,0 +1,65 @@
+import functools
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from settings import settings
+from urls import canonical_url
+
+
+@dataclass(frozen=True)
+class SeenPage:
+    content_hash: str
+    checked_at: float
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DeltaStore:
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "scope TEXT NOT NULL, "
+                "url TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, "
+                "checked_at REAL NOT NULL, "
+                "PRIMARY KEY (scope, url))"
+            )
+
+    @staticmethod
+    def scope(company: str, query: str) -> str:
+        return json.dumps([company, query], ensure_ascii=False)
+
+    def get(self, scope: str, url: str) -> SeenPage | None:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT content_hash, checked_at FROM pages "
+                "WHERE scope = ? AND url = ?",
+                (scope, canonical_url(url)),
+            ).fetchone()
+        return SeenPage(*row) if row is not None else None
+
+    def put(self, scope: str, url: str, content_hash: str) -> None:
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(scope, url, content_hash, checked_at) VALUES (?, ?, ?, ?)",
+                (scope, canonical_url(url), content_hash, time.time()),
+            )
+
+
+@functools.cache
+def default_delta_store() -> DeltaStore:
+    return DeltaStore(Path(settings.delta_store_path))
@@ -0,0 +1,62 @@
+import functools
+import importlib.util
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+
+from settings import settings
+
+
+class HttpClient:
+    def __init__(
+        self,
+        *,
+        max_connections: int = 20,
+        max_connections_per_host: int = 8,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 60.0,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.__max_connections_per_host = max_connections_per_host
+        self.__client = httpx.Client(
+            http2=importlib.util.find_spec("h2") is not None
+            and transport is None,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            transport=transport,
+        )
+
+        self.__lock = threading.Lock()
+        self.__host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+    def get_text(self, url: str, headers: dict[str, str]) -> str:
+        with self.__host_semaphore(url):
+            response = self.__client.get(url, headers=headers)
+        response.raise_for_status()
+        return response.text
+
+    def close(self) -> None:
+        self.__client.close()
+
+    def __host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self.__lock:
+            if host not in self.__host_semaphores:
+                self.__host_semaphores[host] = threading.BoundedSemaphore(
+                    self.__max_connections_per_host
+                )
+            return self.__host_semaphores[host]
+
+
+@functools.cache
+def default_http_client() -> HttpClient:
+    return HttpClient(
+        max_connections=settings.http_max_connections,
+        max_connections_per_host=settings.http_max_connections_per_host,
+        connect_timeout=settings.http_connect_timeout,
+        read_timeout=settings.http_read_timeout,
+    )
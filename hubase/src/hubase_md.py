@@ -1,7 +1,16 @@
+import functools
 import json
 import logging
+import typing as t
+from pathlib import Path
 
-import requests
+import httpx
+
+from cache.sqlite_store import SqliteStore
+from http_client import HttpClient, default_http_client
+from metrics import NO_METRICS, JobMetrics
+from settings import settings
+from urls import canonical_url
 
 
 class JinaException(Exception):
@@ -10,25 +19,71 @@ class JinaException(Exception):
 
 class HubaseMd:
     __jina_query = "https://r.jina.ai/{url}"
+    __jina_headers = {"X-Return-Format": "text"}
 
-    def __init__(self, url: str, logger: logging.Logger) -> None:
+    def __init__(
+        self,
+        url: str,
+        logger: logging.Logger,
+        client: HttpClient | None = None,
+        cache: SqliteStore | None = None,
+        metrics: JobMetrics | None = None,
+    ) -> None:
         self.__url = url
         self.__logger = logger
+        self.__client = client if client is not None else default_http_client()
+        self.__cache = cache
+        self.__metrics = metrics if metrics is not None else NO_METRICS
 
     @property
     def md(self) -> str:
-        self.__logger.info(f"Строим Markdown для сайта: {self.__url}")
-        query = self.__jina_query.format(url=self.__url)
-        self.__logger.info(f"Делаем запрос: {query}")
-        response = requests.get(url=query, headers={"X-Return-Format": "text"})
-        response = response.text
-        self.__raise_exception_on_jina_error(response)
+        cached = self.__cached()
+        if cached is not None:
+            return cached
+
+        with self.__metrics.timed("fetch", "jina"):
+            try:
+                response = self.__client.get_text(
+                    self.__query(), headers=self.__jina_headers
+                )
+            except httpx.HTTPError as err:
+                self.__raise_http_error(err)
+            self.__raise_exception_on_jina_error(response)
+        self.__store(response)
         return response
 
     @property
     def url(self) -> str:
         return self.__url
 
+    def __cached(self) -> str | None:
+        if self.__cache is None:
+            return None
+
+        cached = self.__cache.get(canonical_url(self.__url))
+        if cached is None:
+            return None
+
+        self.__logger.info(f"Markdown для сайта взят из кэша: {self.__url}")
+        self.__metrics.cache_hit("fetch")
+        return cached.decode("utf-8")
+
+    def __store(self, md: str) -> None:
+        if self.__cache is not None:
+            self.__cache.put(canonical_url(self.__url), md.encode("utf-8"))
+
+    def __query(self) -> str:
+        self.__logger.info(f"Строим Markdown для сайта: {self.__url}")
+        query = self.__jina_query.format(url=self.__url)
+        self.__logger.info(f"Делаем запрос: {query}")
+        return query
+
+    def __raise_http_error(self, err: httpx.HTTPError) -> t.NoReturn:
+        # Таймауты и ответы 4xx/5xx не должны ронять всю задачу и
+        # попадать в кэш как содержимое страницы.
+        self.__logger.info(f"Ошибка запроса к Jina: {err!r}")
+        raise JinaException(str(err) or repr(err)) from err
+
     def __raise_exception_on_jina_error(self, jina_response: str) -> None:
         try:
             error = json.loads(jina_response)
@@ -38,3 +93,16 @@ class HubaseMd:
         else:
             self.__logger.info("Ошибка Jina.")
             raise JinaException(error)
+
+
+@functools.cache
+def default_page_cache() -> SqliteStore | None:
+    if not settings.page_cache_enabled:
+        return None
+
+    return SqliteStore(
+        Path(settings.page_cache_path),
+        ttl=settings.page_cache_ttl,
+        max_bytes=settings.page_cache_max_bytes,
+        compress=settings.page_cache_compress,
+    )
@@ -0,0 +1,282 @@
+import collections
+import datetime as dt
+import functools
+import itertools
+import logging
+import threading
+import typing as t
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from logging import Logger
+
+from api.model import CsvOptions
+from main import get_names_and_positions_csv_with_progress
+from model import CSVRow
+from settings import settings
+
+JobState = t.Literal["queued", "running", "done", "failed", "cancelled"]
+JobRun = t.Callable[
+    [CsvOptions, Logger, str, threading.Event], t.Iterator[CSVRow | str]
+]
+
+
+class JobNotFound(Exception):
+    pass
+
+
+class JobLimitExceeded(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class RowsSkipped:
+    offset: int
+    count: int
+
+
+@dataclass(frozen=True)
+class JobStatus:
+    id: str
+    state: JobState
+    rows: int
+    logs: int
+    download_link: str | None
+    error: str | None
+    created_at: dt.datetime
+    started_at: dt.datetime | None
+    finished_at: dt.datetime | None
+
+
+class _JobLogHandler(logging.Handler):
+    def __init__(self, job: "Job") -> None:
+        super().__init__()
+        self.__job = job
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.__job.add_log(self.format(record))
+
+
+class Job:
+    __finished_states = {"done", "failed", "cancelled"}
+
+    def __init__(
+        self, options: CsvOptions, *, max_buffered_rows: int = 1000
+    ) -> None:
+        self.id = (
+            options.job_id if options.job_id is not None else uuid.uuid4().hex
+        )
+        self.options = options
+        self.logger = logging.getLogger(f"job_{self.id}")
+        self.logger.setLevel(logging.INFO)
+        self.__log_handler = _JobLogHandler(self)
+        self.__log_handler.setFormatter(
+            logging.Formatter("%(asctime)s | %(message)s", "%H:%M:%S")
+        )
+        self.logger.addHandler(self.__log_handler)
+
+        # Держим в памяти только последние строки: целиком результат
+        # лежит в файле, а строки с исходным текстом бывают большими.
+        self.__rows: collections.deque[CSVRow] = collections.deque(
+            maxlen=max_buffered_rows
+        )
+        self.__row_count = 0
+        self.__logs = 0
+        self.__state: JobState = "queued"
+        self.__download_link: str | None = None
+        self.__error: str | None = None
+        self.__created_at = dt.datetime.now()
+        self.__started_at: dt.datetime | None = None
+        self.__finished_at: dt.datetime | None = None
+        self.__cancelled = threading.Event()
+        self.__condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.__state in self.__finished_states
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__cancelled.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        return self.__cancelled
+
+    def status(self) -> JobStatus:
+        with self.__condition:
+            return JobStatus(
+                id=self.id,
+                state=self.__state,
+                rows=self.__row_count,
+                logs=self.__logs,
+                download_link=self.__download_link,
+                error=self.__error,
+                created_at=self.__created_at,
+                started_at=self.__started_at,
+                finished_at=self.__finished_at,
+            )
+
+    def follow(
+        self,
+        offset: int = 0,
+        *,
+        stop: threading.Event | None = None,
+        poll_interval: float = 0.5,
+    ) -> t.Iterator[CSVRow | RowsSkipped]:
+        # Просыпаемся по таймауту, чтобы отключившийся клиент мог
+        # остановить чтение через stop, не дожидаясь новой строки.
+        while stop is None or not stop.is_set():
+            with self.__condition:
+                self.__condition.wait_for(
+                    lambda: self.__row_count > offset or self.finished,
+                    poll_interval,
+                )
+                first = self.__row_count - len(self.__rows)
+                skipped = max(first - offset, 0)
+                offset += skipped
+                rows = list(
+                    itertools.islice(self.__rows, offset - first, None)
+                )
+                finished = self.finished
+
+            # Строки, вытесненные из буфера, есть только в файле
+            # результата. Сообщаем о разрыве, а не пропускаем молча.
+            if skipped > 0:
+                yield RowsSkipped(offset=offset - skipped, count=skipped)
+            yield from rows
+            offset += len(rows)
+            if finished and not rows:
+                return
+
+    def wait(self, timeout: float | None = None) -> JobStatus:
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.finished, timeout)
+        return self.status()
+
+    def cancel(self) -> None:
+        self.__cancelled.set()
+        with self.__condition:
+            if self.__state == "queued":
+                self.__finish("cancelled")
+
+    def start(self) -> bool:
+        with self.__condition:
+            if self.finished:
+                return False
+            self.__state = "running"
+            self.__started_at = dt.datetime.now()
+            return True
+
+    def add_download_link(self, download_link: str) -> None:
+        with self.__condition:
+            self.__download_link = download_link
+
+    def add_row(self, row: CSVRow) -> None:
+        with self.__condition:
+            self.__rows.append(row)
+            self.__row_count += 1
+            self.__condition.notify_all()
+
+    def add_log(self, log_entry: str) -> None:
+        with self.__condition:
+            self.__logs += 1
+
+    def complete(self) -> None:
+        with self.__condition:
+            self.__finish("cancelled" if self.cancelled else "done")
+
+    def fail(self, error: BaseException) -> None:
+        with self.__condition:
+            self.__error = str(error)
+            self.__finish("failed")
+
+    def __finish(self, state: JobState) -> None:
+        self.logger.removeHandler(self.__log_handler)
+        self.__state = state
+        self.__finished_at = dt.datetime.now()
+        self.__condition.notify_all()
+
+
+class JobManager:
+    def __init__(
+        self,
+        run: JobRun,
+        *,
+        max_workers: int = 4,
+        max_finished_jobs: int = 100,
+        max_buffered_rows: int = 1000,
+    ) -> None:
+        self.__run = run
+        self.__max_buffered_rows = max_buffered_rows
+        self.__executor = ThreadPoolExecutor(
+            max_workers, thread_name_prefix="job"
+        )
+        self.__max_finished_jobs = max_finished_jobs
+        self.__jobs: collections.OrderedDict[str, Job] = (
+            collections.OrderedDict()
+        )
+        self.__lock = threading.Lock()
+
+    def submit(self, options: CsvOptions) -> Job:
+        job = Job(options, max_buffered_rows=self.__max_buffered_rows)
+        with self.__lock:
+            if job.id in self.__jobs and not self.__jobs[job.id].finished:
+                raise JobLimitExceeded(f"Задача {job.id} уже выполняется.")
+
+            self.__jobs.pop(job.id, None)
+            self.__jobs[job.id] = job
+            self.__forget_finished()
+
+        self.__executor.submit(self.__execute, job)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self.__lock:
+            if job_id not in self.__jobs:
+                raise JobNotFound(f"Задача {job_id} не найдена.")
+            return self.__jobs[job_id]
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            jobs = list(self.__jobs.values())
+        for job in jobs:
+            job.cancel()
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __execute(self, job: Job) -> None:
+        if not job.start():
+            return
+
+        rows = self.__run(job.options, job.logger, job.id, job.cancel_event)
+        try:
+            job.add_download_link(next(rows))
+            for row in rows:
+                if job.cancelled:
+                    break
+                job.add_row(row)
+            # Закрываем генератор до смены статуса, чтобы CSV был
+            # дописан к моменту, когда задача станет done.
+            rows.close()
+        except Exception as err:
+            job.logger.exception(f"Задача завершилась с ошибкой: {err}")
+            job.fail(err)
+        else:
+            job.complete()
+        finally:
+            rows.close()
+
+    def __forget_finished(self) -> None:
+        finished = [job.id for job in self.__jobs.values() if job.finished]
+        for job_id in finished[: -self.__max_finished_jobs or None]:
+            del self.__jobs[job_id]
+
+
+@functools.cache
+def default_job_manager() -> JobManager:
+    return JobManager(
+        get_names_and_positions_csv_with_progress,
+        max_workers=settings.jobs_max_workers,
+        max_finished_jobs=settings.jobs_max_finished,
+        max_buffered_rows=settings.jobs_max_buffered_rows,
+    )
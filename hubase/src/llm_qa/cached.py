@@ -0,0 +1,25 @@
+from cache.llm import ResponseCache
+from llm_qa.abc import LLMClientQA
+
+
+class CachedLLMClientQA(LLMClientQA):
+    def __init__(
+        self,
+        inner: LLMClientQA,
+        cache: ResponseCache,
+        *,
+        model: str,
+        temperature: float | None = None,
+    ) -> None:
+        self.__inner = inner
+        self.__cache = cache
+        self.__model = model
+        self.__temperature = temperature
+
+    def ask(self, prompt: str) -> str:
+        return self.__cache.cached(
+            ResponseCache.key(
+                self.__model, prompt, temperature=self.__temperature
+            ),
+            lambda: self.__inner.ask(prompt),
+        )
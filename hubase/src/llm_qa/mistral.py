@@ -6,13 +6,26 @@ from mistralai.models.chat_completion import ChatMessage
 from llm_qa.abc import LLMClientQA
 from settings import settings
 
+# Ответы кэшируются, поэтому они должны быть воспроизводимыми.
+MISTRAL_MODEL = "mistral-large-latest"
+MISTRAL_TEMPERATURE = 0.0
+
 
 class LLMClientQAMistral(LLMClientQA):
     def __init__(self, logger: Logger):
         self.__client = MistralClient(api_key=settings.mistral_api_key)
-        self.__model = "mistral-large-latest"
+        self.__model = MISTRAL_MODEL
+        self.__temperature = MISTRAL_TEMPERATURE
         self.__logger = logger
 
+    @property
+    def model(self) -> str:
+        return self.__model
+
+    @property
+    def temperature(self) -> float:
+        return self.__temperature
+
     def ask(self, prompt: str) -> str:
         short_prompt = prompt[:97].replace("\n", " ") + "..."
         self.__logger.info(f"Итоговый промпт: {short_prompt}")
@@ -21,6 +34,7 @@ class LLMClientQAMistral(LLMClientQA):
         response = self.__client.chat(
             model=self.__model,
             messages=[ChatMessage(role="user", content=prompt)],
+            temperature=self.__temperature,
         )
 
         self.__logger.info(f"Использовано токенов: {response.usage}")
@@ -1,121 +1,701 @@
+import dataclasses
+import functools
+import threading
+import time
 import typing as t
 from logging import Logger
+from pathlib import Path
+
+from openai import OpenAI
 
 from api.model import CsvOptions
-from hubase_csv import HubaseCsv
-from hubase_md import HubaseMd, JinaException
+from boilerplate import BoilerplateStripper, default_boilerplate_store
+from cache.llm import default_response_cache
+from checkpoint import Checkpoint
+from delta import DeltaStore, content_hash, default_delta_store
+from hubase_md import HubaseMd, JinaException, default_page_cache
+from llm_qa.abc import LLMClientQA
+from llm_qa.cached import CachedLLMClientQA
+from llm_qa.mistral import LLMClientQAMistral
+from metrics import NO_METRICS, JobMetrics, default_metrics
 from model import CSVRow
-from search_page import SearchPage
-from search_queries import SearchQueries
+from people_index import PeopleIndex
+from pipeline import InFlightBudget, Pipeline, Stage
+from prompt.abc_ import Prompt
+from prompt.cached import Cached
+from prompt.fs_prompt import FileSystemPrompt
+from prompt.in_memory import InMemoryPrompt
+from results_store import default_results_store
+from search_page import SearchPage, default_search_cache
+from search_queries import SearchQueries, SearchQuery
 from settings import settings
+from urls import canonical_url
+from word_classifications.chunker import TextChunker
+from word_classifications.gpt.batch import GPTBatch
+from word_classifications.gpt.client import (
+    OpenAIClients,
+    default_openai_clients,
+)
 from word_classifications.gpt.csv_rows import GPTCSVRows
 from word_classifications.gpt.people import GPTPeople
+from word_classifications.ner.abc_ import NerBackend
+from word_classifications.ner.client import NerClient, default_ner_session
+from word_classifications.ner.csv_rows import NerCSVRows
+from word_classifications.ner.local import (
+    default_local_ner_backend,
+    model_token_counter,
+)
+from word_classifications.ner.people import NerPeople
+from word_classifications.prefilter import PeoplePrefilter
+from writer.abc_ import ResultWriter
+from writer.formats import output_format_of, result_writer
+
+
+@dataclasses.dataclass(frozen=True)
+class _Page:
+    url: str
+    searching_params: dict[str, str]
+    md: str
+    content_hash: str | None = None
+
 
+@dataclasses.dataclass(frozen=True)
+class _Repeat:
+    url: str
+    company: str
 
-def _main(csv_options: CsvOptions, logger: Logger) -> t.Iterator[CSVRow]:
+
+def _main(
+    csv_options: CsvOptions,
+    logger: Logger,
+    persist: t.Callable[[CSVRow], t.Iterable[CSVRow]] | None = None,
+    checkpoint: Checkpoint | None = None,
+    metrics: JobMetrics | None = None,
+    cancelled: threading.Event | None = None,
+) -> t.Iterator[CSVRow]:
     search_queries = SearchQueries(
         csv_options.search_query_template,
         csv_options.companies,
         csv_options.positions,
         csv_options.sites,
     )
+    search_page = SearchPage(
+        search_queries,
+        logger,
+        url_limit=5,
+        cache=default_search_cache(),
+        refresh_cache=csv_options.refresh_search_cache,
+        checkpoint=checkpoint,
+        metrics=metrics,
+    )
+    budget = InFlightBudget(
+        settings.max_pages_in_flight, settings.max_bytes_in_flight
+    )
+    stripper = (
+        BoilerplateStripper(
+            min_pages=settings.boilerplate_min_pages,
+            min_block_lines=settings.boilerplate_min_block_lines,
+            store=default_boilerplate_store(),
+        )
+        if settings.boilerplate_enabled
+        else None
+    )
+    prefilter = (
+        PeoplePrefilter(csv_options.positions, settings.prefilter_threshold)
+        if csv_options.use_prefilter
+        else None
+    )
+    prompt_template = _people_prompt().get()
+    clients = (
+        default_openai_clients()
+        if settings.openai_clients_shared
+        else OpenAIClients()
+    )
+    client = clients.get(*_openai_credentials(csv_options))
+    gpt_batch = (
+        _gpt_batch(client, prompt_template, logger, prefilter, cancelled)
+        if csv_options.extraction_mode == "batch"
+        else None
+    )
+    ner_backend = (
+        _ner_backend(logger) if settings.people_extractor == "ner" else None
+    )
+    ner_llm_qa = _ner_llm_qa(logger) if ner_backend is not None else None
+    delta = default_delta_store() if csv_options.delta else None
+    recheck_interval = (
+        csv_options.delta_recheck_interval
+        if csv_options.delta_recheck_interval is not None
+        else settings.delta_recheck_interval
+    )
+    batch_hashes: dict[str, str | None] = {}
+    extracted: dict[str, tuple[list[CSVRow], set[str]]] = {}
+    extracted_lock = threading.Lock()
 
-    for url, searching_params in SearchPage(
-        search_queries, logger, url_limit=5
-    ).found():
-        try:
-            md = HubaseMd(url, logger).md
+    def delta_scope(searching_params: dict[str, str]) -> str:
+        return DeltaStore.scope(
+            searching_params["company"],
+            csv_options.search_query_template.format(**searching_params),
+        )
 
-        except JinaException as err:
-            yield {
-                "name": err,
-                "position": None,
-                "searched_company": searching_params["company"],
-                "inferenced_company": None,
-                "original_url": url,
-                "source": None,
-            }
-            continue
+    def search(
+        search_query: SearchQuery,
+    ) -> t.Iterator[tuple[str, dict[str, str]] | _Repeat]:
+        for url, searching_params, is_new in search_page.matches_for(
+            search_query
+        ):
+            yield (
+                (url, searching_params)
+                if is_new
+                else _Repeat(url, searching_params["company"])
+            )
 
-        with open("../prompts/get_people_from_text_short.txt") as fd:
-            prompt_template = fd.read()
+    def fetch(
+        found: tuple[str, dict[str, str]] | _Repeat,
+    ) -> t.Iterator[_Page | _Repeat]:
+        if isinstance(found, _Repeat):
+            yield found
+            return
 
-        if csv_options.openai_api_key.get_secret_value() != "":
-            openai_api_key = csv_options.openai_api_key
-        else:
-            openai_api_key = settings.openai_api_key
+        url, searching_params = found
+        if checkpoint is not None and checkpoint.is_page_done(url):
+            logger.info(f"Страница уже обработана в этой задаче: {url}")
+            return
 
-        openai_api_base = (
-            csv_options.openai_api_base
-            if csv_options.openai_api_base != ""
-            else settings.openai_api_base
+        seen = (
+            delta.get(delta_scope(searching_params), url)
+            if delta is not None
+            else None
         )
+        if (
+            seen is not None
+            and time.time() - seen.checked_at < recheck_interval
+        ):
+            logger.info(f"Страница обработана в прошлый запуск: {url}")
+            return
+
+        budget.acquire()
+        try:
+            # В режиме дельты нужна свежая версия страницы, а не кэш.
+            md = HubaseMd(
+                url,
+                logger,
+                cache=default_page_cache() if delta is None else None,
+                metrics=metrics,
+            ).md
+        except JinaException as err:
+            budget.release()
+            logger.warning(f"Не удалось получить страницу {url}: {err}")
+            return
+        except BaseException:
+            budget.release()
+            raise
+
+        # Хэш считаем до вырезания шаблонного текста: индекс шаблонов
+        # растёт от запуска к запуску и меняет результат.
+        hash_ = content_hash(md) if delta is not None else None
+        if seen is not None and seen.content_hash == hash_:
+            budget.release()
+            delta.put(delta_scope(searching_params), url, hash_)
+            logger.info(f"Страница не изменилась с прошлого запуска: {url}")
+            return
+
+        if stripper is not None:
+            stripped = stripper.strip(url, md)
+            md = stripped.text
+            logger.info(
+                f"Удалено повторяющегося текста: {stripped.removed_bytes} "
+                f"байт, ~{stripped.removed_tokens} токенов"
+            )
+
+        try:
+            budget.add_bytes(len(md))
+        except BaseException:
+            budget.release()
+            raise
 
-        yield from GPTCSVRows(
-            people=GPTPeople(
-                text=md,
-                prompt_template=prompt_template,
-                api_key=openai_api_key.get_secret_value(),
-                logger=logger,
-                openai_api_base=openai_api_base,
-                batch_size=512,
-            ),
+        yield _Page(
             url=url,
             searching_params=searching_params,
-        ).iter()
-
-        # yield from NerCSVRows(
-        #     people=NerPeople(
-        #         md,
-        #         NerClient(settings.hugging_face_ner_api_url, settings.hugging_face_token, logger),
-        #         logger,
-        #         batch_size=512,
-        #     ),
-        #     llm_qa=LLMClientQAMistral(logger),
-        #     company_prompt=InMemoryPrompt(csv_options.company_prompt),
-        #     position_prompt=InMemoryPrompt(csv_options.position_prompt),
-        #     url=url,
-        #     searching_params=searching_params,
-        # ).iter()
-
-
-def get_names_and_positions_csv(
-    csv_options: CsvOptions, logger: Logger
-) -> str:
-    headers = [
-        "name",
-        "position",
-        "searched_company",
-        "inferenced_company",
-        "original_url",
-        "source",
+            md=md,
+            content_hash=hash_,
+        )
+
+    def attributed(url: str, rows: list[CSVRow]) -> list[CSVRow]:
+        # Запросы других компаний могут найти страницу уже после её
+        # обработки, поэтому запоминаем строки и компании страницы.
+        with extracted_lock:
+            companies = {
+                params["company"]
+                for params in search_page.searching_params_of(url)
+            }
+            if rows:
+                extracted[canonical_url(url)] = (rows, companies)
+        return [
+            dataclasses.replace(row, searched_company=company)
+            for row in rows
+            for company in sorted(companies)
+            if company != row.searched_company
+        ]
+
+    def attributed_later(repeat: _Repeat) -> list[CSVRow]:
+        with extracted_lock:
+            rows, companies = extracted.get(
+                canonical_url(repeat.url), ([], set())
+            )
+            if repeat.company in companies:
+                return []
+            companies.add(repeat.company)
+        return [
+            dataclasses.replace(row, searched_company=repeat.company)
+            for row in rows
+        ]
+
+    def extract(page: _Page | _Repeat) -> t.Iterator[CSVRow]:
+        if isinstance(page, _Repeat):
+            # В пакетном режиме компании подставляются после всех поисков.
+            if gpt_batch is None:
+                yield from attributed_later(page)
+            return
+
+        try:
+            if gpt_batch is not None:
+                gpt_batch.add(page.url, page.searching_params, page.md)
+                batch_hashes[page.url] = page.content_hash
+                return
+
+            extracted_rows = (
+                _extract_with_ner(
+                    page, csv_options, ner_backend, ner_llm_qa, logger, metrics
+                )
+                if ner_backend is not None
+                else _extract(
+                    page, prompt_template, client, logger, prefilter, metrics
+                )
+            )
+            rows = []
+            for row in extracted_rows:
+                rows.append(row)
+                yield row
+            yield from attributed(page.url, rows)
+            if checkpoint is not None:
+                checkpoint.page_done(page.url)
+            if delta is not None:
+                delta.put(
+                    delta_scope(page.searching_params),
+                    page.url,
+                    page.content_hash,
+                )
+        finally:
+            budget.release(len(page.md))
+
+    stages = [
+        Stage("search", search, settings.search_workers),
+        Stage("fetch", fetch, settings.fetch_workers),
+        Stage("extract", extract, settings.extract_workers),
+    ]
+    if persist is not None:
+        stages.append(Stage("persist", persist, settings.persist_workers))
+
+    pipeline = Pipeline(
+        stages, logger, queue_size=settings.pipeline_queue_size
+    )
+
+    try:
+        yield from pipeline.run(search_queries.compiled(), cancelled=cancelled)
+
+        if gpt_batch is not None:
+            for batch_page in gpt_batch.run():
+                for row in GPTCSVRows(
+                    people=batch_page,
+                    url=batch_page.url,
+                    searching_params=batch_page.searching_params,
+                ).iter():
+                    for row_ in _attributed(
+                        row, search_page.searching_params_of(batch_page.url)
+                    ):
+                        yield from persist(row_) if persist else [row_]
+                # Страницу без ответа хотя бы на один кусок нельзя считать
+                # обработанной: иначе её пропустят при возобновлении и в
+                # следующих запусках дельты.
+                if not batch_page.answered or (
+                    cancelled is not None and cancelled.is_set()
+                ):
+                    continue
+                if checkpoint is not None:
+                    checkpoint.page_done(batch_page.url)
+                if delta is not None:
+                    delta.put(
+                        delta_scope(batch_page.searching_params),
+                        batch_page.url,
+                        batch_hashes[batch_page.url],
+                    )
+    finally:
+        budget.close()
+        if not settings.openai_clients_shared:
+            clients.close()
+        if stripper is not None:
+            stripper.save()
+        if prefilter is not None:
+            logger.info(
+                f"Предфильтр сэкономил запросов к LLM: {prefilter.skipped}"
+            )
+
+
+def _attributed(
+    row: CSVRow, searching_params: list[dict[str, str]]
+) -> t.Iterator[CSVRow]:
+    # Одна и та же страница могла найтись по запросам нескольких компаний.
+    yield row
+
+    companies = dict.fromkeys(params["company"] for params in searching_params)
+    for company in companies:
+        if company != row.searched_company:
+            yield dataclasses.replace(row, searched_company=company)
+
+
+def _extract(
+    page: _Page,
+    prompt_template: str,
+    client: OpenAI,
+    logger: Logger,
+    prefilter: PeoplePrefilter | None,
+    metrics: JobMetrics | None = None,
+) -> t.Iterator[CSVRow]:
+    yield from GPTCSVRows(
+        people=GPTPeople(
+            text=page.md,
+            prompt_template=prompt_template,
+            api_key=client.api_key,
+            logger=logger,
+            client=client,
+            chunker=_chunker(),
+            max_in_flight=settings.gpt_max_in_flight,
+            ordered=settings.gpt_ordered_results,
+            cache=default_response_cache(),
+            prefilter=prefilter,
+            metrics=metrics,
+        ),
+        url=page.url,
+        searching_params=page.searching_params,
+    ).iter()
+
+
+def _extract_with_ner(
+    page: _Page,
+    csv_options: CsvOptions,
+    ner_backend: NerBackend,
+    llm_qa: LLMClientQA,
+    logger: Logger,
+    metrics: JobMetrics | None = None,
+) -> t.Iterator[CSVRow]:
+    yield from NerCSVRows(
+        people=NerPeople(
+            page.md,
+            ner_backend,
+            logger,
+            chunker=_ner_chunker(),
+            batch_size=settings.ner_batch_size,
+            max_in_flight=settings.ner_max_in_flight,
+            metrics=metrics,
+        ),
+        llm_qa=llm_qa,
+        company_prompt=InMemoryPrompt(csv_options.company_prompt),
+        position_prompt=InMemoryPrompt(csv_options.position_prompt),
+        url=page.url,
+        searching_params=page.searching_params,
+        company_and_position_prompt=_company_and_position_prompt(csv_options),
+        max_in_flight=settings.ner_llm_max_in_flight,
+    ).iter()
+
+
+def _gpt_batch(
+    client: OpenAI,
+    prompt_template: str,
+    logger: Logger,
+    prefilter: PeoplePrefilter | None,
+    cancelled: threading.Event | None = None,
+) -> GPTBatch:
+    return GPTBatch(
+        client,
+        prompt_template,
+        logger,
+        batch_dir=Path(settings.batch_dir),
+        chunker=_chunker(),
+        prefilter=prefilter,
+        cache=default_response_cache(),
+        poll_interval=settings.batch_poll_interval,
+        max_requests=settings.batch_max_requests,
+        cancelled=cancelled,
+    )
+
+
+def _ner_backend(logger: Logger) -> NerBackend:
+    if settings.ner_backend == "local":
+        backend = default_local_ner_backend()
+        if backend.rule_based and settings.ner_local_model:
+            logger.warning(
+                "Пакет transformers не установлен, "
+                "используем NER на правилах."
+            )
+        return backend
+
+    return NerClient(
+        settings.hugging_face_ner_api_url,
+        settings.hugging_face_token,
+        logger,
+        session=default_ner_session(),
+        timeout=(settings.http_connect_timeout, settings.http_read_timeout),
+    )
+
+
+def _ner_llm_qa(logger: Logger) -> LLMClientQA:
+    llm_qa = LLMClientQAMistral(logger)
+    cache = default_response_cache()
+    if cache is None:
+        return llm_qa
+
+    return CachedLLMClientQA(
+        llm_qa, cache, model=llm_qa.model, temperature=llm_qa.temperature
+    )
+
+
+@functools.cache
+def _people_prompt() -> Prompt:
+    return Cached(
+        FileSystemPrompt(Path("../prompts/get_people_from_text_short.txt"))
+    )
+
+
+@functools.cache
+def _company_and_position_template() -> Prompt:
+    return Cached(
+        FileSystemPrompt(Path("../prompts/company_and_position.txt"))
+    )
+
+
+def _company_and_position_prompt(csv_options: CsvOptions) -> Prompt | None:
+    # Общий вопрос собираем из промптов задачи, чтобы правки из интерфейса
+    # по-прежнему работали. Текст страницы подставляем один раз, поэтому
+    # промпт без {context} в конце задаём по отдельности.
+    questions = [
+        prompt.strip()
+        for prompt in (csv_options.company_prompt, csv_options.position_prompt)
     ]
-    with HubaseCsv(headers=headers, settings=settings) as csv_:
-        for person in _main(csv_options, logger):
-            csv_.persist(person)
-    return csv_.download_url
+    if not all(question.endswith("{context}") for question in questions):
+        return None
+
+    company, position = (
+        question.removesuffix("{context}").strip() for question in questions
+    )
+    return InMemoryPrompt(
+        _company_and_position_template()
+        .get()
+        .replace("{company_question}", company)
+        .replace("{position_question}", position)
+    )
+
+
+def _openai_credentials(csv_options: CsvOptions) -> tuple[str, str | None]:
+    if csv_options.openai_api_key.get_secret_value() != "":
+        openai_api_key = csv_options.openai_api_key
+    else:
+        openai_api_key = settings.openai_api_key
+
+    openai_api_base = (
+        csv_options.openai_api_base
+        if csv_options.openai_api_base != ""
+        else settings.openai_api_base
+    )
+
+    return openai_api_key.get_secret_value(), openai_api_base
+
+
+def _chunker() -> TextChunker:
+    return TextChunker(
+        settings.chunk_max_tokens, settings.chunk_overlap_tokens
+    )
+
+
+@functools.cache
+def _ner_chunker() -> TextChunker:
+    # Считаем токены токенизатором локальной модели, если он есть: у
+    # удалённого NER модель неизвестна.
+    count_tokens = (
+        model_token_counter(settings.ner_local_model)
+        if settings.ner_backend == "local" and settings.ner_local_model
+        else None
+    )
+    return TextChunker(
+        settings.ner_chunk_max_tokens,
+        settings.ner_chunk_overlap_tokens,
+        count_tokens,
+    )
+
+
+_headers = [
+    "name",
+    "position",
+    "searched_company",
+    "inferenced_company",
+    "original_url",
+    "source",
+]
 
 
 def get_names_and_positions_csv_with_progress(
-    csv_options: CsvOptions, logger: Logger
+    csv_options: CsvOptions,
+    logger: Logger,
+    job_id: str | None = None,
+    cancelled: threading.Event | None = None,
 ) -> t.Iterator[CSVRow | str]:
-    headers = [
-        "name",
-        "position",
-        "searched_company",
-        "inferenced_company",
-        "original_url",
-        "source",
-    ]
+    checkpoint = _checkpoint(job_id, logger)
+    metrics = _metrics(job_id)
+    # Без прогресса в чекпоинте возобновлять нечего: файл прошлого
+    # запуска с тем же job_id переписываем, а не дописываем.
+    resumed = checkpoint is not None and checkpoint.stats().queries > 0
+    persisted = checkpoint.rows() if checkpoint is not None else []
+    index = PeopleIndex() if settings.people_dedupe_enabled else None
+    already_persisted = (
+        sum(index.add(row) for row in persisted)
+        if index is not None
+        else len(persisted)
+    )
+    completed = False
 
-    with HubaseCsv(headers=headers, settings=settings) as csv_:
-        yield csv_.download_url
+    with result_writer(
+        csv_options.output_format,
+        _headers,
+        settings,
+        logger,
+        job_id=job_id,
+        store=default_results_store(),
+        resume=resumed,
+    ) as writer:
+        yield writer.download_url
 
-        for lead_count, person in enumerate(
-            _main(csv_options, logger), start=1
-        ):
-            csv_.persist(person)
-            yield person
+        try:
+            for lead_count, person in enumerate(
+                _main(
+                    csv_options,
+                    logger,
+                    persist=_persisting(
+                        writer,
+                        csv_options.max_lead_count,
+                        index,
+                        checkpoint,
+                        already_persisted=already_persisted,
+                        is_known=_known_leads(csv_options),
+                        metrics=metrics,
+                    ),
+                    checkpoint=checkpoint,
+                    metrics=metrics,
+                    cancelled=cancelled,
+                ),
+                start=already_persisted + 1,
+            ):
+                yield person
+
+                if lead_count >= csv_options.max_lead_count:
+                    break
+            completed = cancelled is None or not cancelled.is_set()
+        finally:
+            _merge_duplicates(writer, index, logger, resumed=bool(persisted))
+            if checkpoint is not None:
+                # Чекпоинт нужен только для возобновления прерванной задачи.
+                if completed:
+                    checkpoint.delete()
+                checkpoint.close()
+
+
+def _persisting(
+    writer: ResultWriter,
+    max_lead_count: int | None = None,
+    index: PeopleIndex | None = None,
+    checkpoint: Checkpoint | None = None,
+    *,
+    already_persisted: int = 0,
+    is_known: t.Callable[[CSVRow], bool] | None = None,
+    metrics: JobMetrics | None = None,
+) -> t.Callable[[CSVRow], t.Iterator[CSVRow]]:
+    lock = threading.Lock()
+    persisted = already_persisted
+    backend = output_format_of(writer.name)
+    metrics = metrics if metrics is not None else NO_METRICS
+
+    def persist(person: CSVRow) -> t.Iterator[CSVRow]:
+        nonlocal persisted
+        if is_known is not None and is_known(person):
+            return
+
+        with lock:
+            if max_lead_count is not None and persisted >= max_lead_count:
+                return
+            # Сохраняем строку до слияния дубликатов: иначе при
+            # возобновлении потеряются URL объединённых строк.
+            if checkpoint is not None and not checkpoint.add_row(person):
+                return
+            if index is not None and not index.add(person):
+                return
+            persisted += 1
+
+        with metrics.timed("persist", backend):
+            writer.persist(person)
+        yield person
+
+    return persist
+
+
+def _merge_duplicates(
+    writer: ResultWriter,
+    index: PeopleIndex | None,
+    logger: Logger,
+    *,
+    resumed: bool = False,
+) -> None:
+    if index is None:
+        return
+
+    stats = index.stats
+    logger.info(
+        f"Найдено строк: {stats.rows}, уникальных людей: {stats.unique}, "
+        f"объединено дубликатов: {stats.merged}"
+    )
+    # После возобновления в файле могут остаться строки, дописанные
+    # перед сбоем, поэтому переписываем его целиком.
+    if stats.merged > 0 or resumed:
+        writer.rewrite(index.rows())
+
+
+def _known_leads(
+    csv_options: CsvOptions,
+) -> t.Callable[[CSVRow], bool] | None:
+    store = default_results_store()
+    if not csv_options.delta or store is None:
+        return None
+
+    # Сравниваем только с лидами прошлых запусков: строки этого запуска
+    # сохраняются в то же хранилище.
+    started_at = time.time()
+    return lambda row: store.has_lead(row, before=started_at)
+
+
+def _checkpoint(job_id: str | None, logger: Logger) -> Checkpoint | None:
+    if job_id is None or not settings.checkpoint_enabled:
+        return None
+
+    checkpoint = Checkpoint(Path(settings.checkpoint_path), job_id)
+    stats = checkpoint.stats()
+    if stats.queries > 0:
+        logger.info(
+            f"Возобновляем задачу {job_id}: выполнено запросов "
+            f"{stats.queries}, обработано страниц {stats.pages}, "
+            f"сохранено строк {stats.rows}"
+        )
+    return checkpoint
+
+
+def _metrics(job_id: str | None) -> JobMetrics | None:
+    if job_id is None or not settings.metrics_enabled:
+        return None
 
-            if lead_count >= csv_options.max_lead_count:
-                break
+    return default_metrics().job(job_id)
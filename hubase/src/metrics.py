@@ -0,0 +1,219 @@
+import collections
+import contextlib
+import functools
+import math
+import threading
+import time
+import typing as t
+
+from settings import settings
+
+_Labels = tuple[tuple[str, str], ...]
+
+_families = {
+    "hubase_stage_calls_total": (
+        "counter",
+        "Вызовы этапа обработки.",
+    ),
+    "hubase_stage_errors_total": (
+        "counter",
+        "Вызовы этапа, завершившиеся ошибкой.",
+    ),
+    "hubase_stage_duration_seconds": (
+        "histogram",
+        "Длительность вызовов этапа в секундах.",
+    ),
+    "hubase_cache_hits_total": (
+        "counter",
+        "Ответы этапа, взятые из кэша.",
+    ),
+    "hubase_llm_tokens_total": (
+        "counter",
+        "Токены, израсходованные на запросы к LLM.",
+    ),
+}
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    __buckets = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+    def __init__(self, *, max_jobs: int = 100) -> None:
+        self.__max_jobs = max_jobs
+        self.__counters: dict[tuple[str, _Labels], float] = {}
+        self.__histograms: dict[tuple[str, _Labels], _Histogram] = {}
+        self.__jobs: collections.OrderedDict[str, None] = (
+            collections.OrderedDict()
+        )
+        self.__lock = threading.Lock()
+
+    def job(self, job_id: str) -> "JobMetrics":
+        with self.__lock:
+            self.__jobs[job_id] = None
+            self.__jobs.move_to_end(job_id)
+            # Метка job растёт с каждой задачей, старые серии забываем.
+            while len(self.__jobs) > self.__max_jobs:
+                self.__forget(self.__jobs.popitem(last=False)[0])
+        return JobMetrics(self, job_id)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            self.__counters[key] = self.__counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.__lock:
+            histogram = self.__histograms.get(key)
+            if histogram is None:
+                histogram = self.__histograms[key] = _Histogram(self.__buckets)
+            for i, bucket in enumerate(self.__buckets):
+                if value <= bucket:
+                    histogram.counts[i] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def summary(self, job_id: str) -> dict[str, dict[str, float]]:
+        summary: dict[str, dict[str, float]] = {}
+        with self.__lock:
+            for (name, labels), value in self.__counters.items():
+                labels_ = dict(labels)
+                if labels_.get("job") != job_id:
+                    continue
+                if name == "hubase_llm_tokens_total":
+                    section, field = "tokens", labels_["kind"]
+                else:
+                    section = labels_["stage"]
+                    field = {
+                        "hubase_stage_calls_total": "calls",
+                        "hubase_stage_errors_total": "errors",
+                        "hubase_cache_hits_total": "cache_hits",
+                    }[name]
+                stats = summary.setdefault(section, {})
+                stats[field] = stats.get(field, 0) + value
+
+            for (_, labels), histogram in self.__histograms.items():
+                labels_ = dict(labels)
+                if labels_.get("job") != job_id:
+                    continue
+                stats = summary.setdefault(labels_["stage"], {})
+                stats["seconds"] = round(
+                    stats.get("seconds", 0) + histogram.sum, 3
+                )
+        return summary
+
+    def render(self) -> str:
+        lines = []
+        with self.__lock:
+            for name, (type_, help_) in _families.items():
+                lines.append(f"# HELP {name} {help_}")
+                lines.append(f"# TYPE {name} {type_}")
+                if type_ == "counter":
+                    for (name_, labels), value in self.__counters.items():
+                        if name_ == name:
+                            lines.append(
+                                f"{name}{_labels(labels)} {_number(value)}"
+                            )
+                    continue
+
+                for (name_, labels), histogram in self.__histograms.items():
+                    if name_ != name:
+                        continue
+                    for bucket, count in zip(self.__buckets, histogram.counts):
+                        le = (("le", _number(bucket)),)
+                        lines.append(
+                            f"{name}_bucket{_labels(labels + le)} {count}"
+                        )
+                    lines.append(
+                        f"{name}_sum{_labels(labels)} "
+                        f"{_number(histogram.sum)}"
+                    )
+                    lines.append(
+                        f"{name}_count{_labels(labels)} {histogram.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def __forget(self, job_id: str) -> None:
+        for series in (self.__counters, self.__histograms):
+            for key in [key for key in series if ("job", job_id) in key[1]]:
+                del series[key]
+
+
+class JobMetrics:
+    def __init__(self, metrics: Metrics | None, job_id: str) -> None:
+        self.__metrics = metrics
+        self.__job_id = job_id
+
+    @contextlib.contextmanager
+    def timed(self, stage: str, backend: str) -> t.Iterator[None]:
+        if self.__metrics is None:
+            yield
+            return
+
+        labels = {"stage": stage, "job": self.__job_id, "backend": backend}
+        started_at = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.__metrics.inc("hubase_stage_errors_total", **labels)
+            raise
+        finally:
+            self.__metrics.inc("hubase_stage_calls_total", **labels)
+            self.__metrics.observe(
+                "hubase_stage_duration_seconds",
+                time.perf_counter() - started_at,
+                **labels,
+            )
+
+    def cache_hit(self, stage: str) -> None:
+        if self.__metrics is not None:
+            self.__metrics.inc(
+                "hubase_cache_hits_total",
+                stage=stage,
+                job=self.__job_id,
+                backend="cache",
+            )
+
+    def tokens(self, backend: str, prompt: int, completion: int) -> None:
+        if self.__metrics is None:
+            return
+        for kind, value in (("prompt", prompt), ("completion", completion)):
+            self.__metrics.inc(
+                "hubase_llm_tokens_total",
+                value,
+                kind=kind,
+                job=self.__job_id,
+                backend=backend,
+            )
+
+
+NO_METRICS = JobMetrics(None, "")
+
+
+def _labels(labels: _Labels) -> str:
+    def escaped(value: str) -> str:
+        return (
+            value.replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n")
+        )
+
+    pairs = ",".join(f'{name}="{escaped(value)}"' for name, value in labels)
+    return f"{{{pairs}}}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+@functools.cache
+def default_metrics() -> Metrics:
+    return Metrics(max_jobs=settings.metrics_max_jobs)
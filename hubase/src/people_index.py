@@ -0,0 +1,180 @@
+import dataclasses
+import re
+import threading
+import typing as t
+from dataclasses import dataclass
+
+from model import CSVRow
+
+_translit = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "е": "e",
+        "ё": "e",
+        "ж": "zh",
+        "з": "z",
+        "и": "i",
+        "й": "i",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "ts",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ъ": "",
+        "ы": "y",
+        "ь": "",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+    }
+)
+# Разные системы транслитерации пишут одни и те же звуки по-разному:
+# Yuri/Iurii/Юрий, Khabib/Habib, Aleksei/Alexey.
+_spelling_variants = (
+    ("kh", "h"),
+    ("ks", "x"),
+    ("ph", "f"),
+    ("w", "v"),
+    ("j", "i"),
+    ("y", "i"),
+)
+_repeated_letters = re.compile(r"(.)\1+")
+_patronymic = re.compile(r"(?:ovich|evich|ich|ovna|evna|ichna|inichna)$")
+_word = re.compile(r"[^\W\d_]+")
+
+
+def normalized_tokens(name: str) -> list[str]:
+    tokens = []
+    for word in _word.findall(name.lower()):
+        token = word.translate(_translit)
+        for variant, replacement in _spelling_variants:
+            token = token.replace(variant, replacement)
+        token = _repeated_letters.sub(r"\1", token)
+        if len(word) == 1:
+            token = token[:1]
+        if token != "":
+            tokens.append(token)
+
+    # Отчество отбрасываем, если кроме него есть имя и фамилия.
+    if len(tokens) >= 3:
+        tokens = [
+            token
+            for i, token in enumerate(tokens)
+            if i == 0 or not _patronymic.search(token)
+        ]
+    return tokens
+
+
+@dataclass(frozen=True)
+class PeopleIndexStats:
+    rows: int
+    unique: int
+
+    @property
+    def merged(self) -> int:
+        return self.rows - self.unique
+
+
+@dataclass
+class _Person:
+    row: CSVRow
+    urls: dict[str, None]
+    full: bool
+
+
+class PeopleIndex:
+    def __init__(self) -> None:
+        self.__people: list[_Person] = []
+        self.__exact: dict[tuple, _Person] = {}
+        # Ключ "фамилия + инициалы". None — ключ неоднозначен
+        # (Иван Петров и Игорь Петров), по нему не объединяем.
+        self.__by_initials: dict[tuple, _Person | None] = {}
+        self.__rows = 0
+        self.__lock = threading.Lock()
+
+    def add(self, row: CSVRow) -> bool:
+        company = " ".join(normalized_tokens(row.searched_company))
+        tokens = normalized_tokens(row.name)
+        full = all(len(token) > 1 for token in tokens)
+        exact_key = (company, tuple(sorted(tokens)))
+        # Фамилия и инициал следующего за ней по тексту слова: второй
+        # инициал обычно от отчества, а отчество мы отбрасываем.
+        initials_keys = [
+            (company, token, (tokens[:i] + tokens[i + 1 :] + [""])[0][:1])
+            for i, token in enumerate(tokens)
+            if len(token) > 1
+        ]
+
+        with self.__lock:
+            self.__rows += 1
+
+            person = self.__exact.get(exact_key)
+            if person is None:
+                person = self.__match_initials(initials_keys, full)
+            if person is not None:
+                person.urls.setdefault(row.original_url)
+                if full and not person.full:
+                    person.row = dataclasses.replace(row, original_url="")
+                    person.full = True
+                self.__exact.setdefault(exact_key, person)
+                self.__register_initials(initials_keys, person)
+                return False
+
+            person = _Person(
+                row=dataclasses.replace(row, original_url=""),
+                urls={row.original_url: None},
+                full=full,
+            )
+            self.__people.append(person)
+            self.__exact[exact_key] = person
+            self.__register_initials(initials_keys, person)
+            return True
+
+    def rows(self) -> t.Iterator[CSVRow]:
+        with self.__lock:
+            people = list(self.__people)
+
+        for person in people:
+            yield dataclasses.replace(
+                person.row, original_url=" ".join(person.urls)
+            )
+
+    @property
+    def stats(self) -> PeopleIndexStats:
+        with self.__lock:
+            return PeopleIndexStats(
+                rows=self.__rows, unique=len(self.__people)
+            )
+
+    def __match_initials(
+        self, initials_keys: list[tuple], full: bool
+    ) -> _Person | None:
+        for key in initials_keys:
+            person = self.__by_initials.get(key)
+            # Два полных имени с одинаковыми инициалами — разные люди.
+            if person is not None and not (full and person.full):
+                return person
+        return None
+
+    def __register_initials(
+        self, initials_keys: list[tuple], person: _Person
+    ) -> None:
+        for key in initials_keys:
+            known = self.__by_initials.setdefault(key, person)
+            if known is not None and known is not person:
+                self.__by_initials[key] = None
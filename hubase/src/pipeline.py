@@ -0,0 +1,237 @@
+import queue
+import threading
+import typing as t
+from dataclasses import dataclass
+from logging import Logger
+
+_DONE = object()
+
+
+class PipelineClosed(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: t.Callable[[t.Any], t.Iterable[t.Any]]
+    workers: int = 1
+
+
+class InFlightBudget:
+    def __init__(self, max_items: int, max_bytes: int) -> None:
+        self.__max_items = max_items
+        self.__max_bytes = max_bytes
+        self.__items = 0
+        self.__bytes = 0
+        self.__closed = False
+        self.__condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self.__condition:
+            self.__condition.wait_for(
+                lambda: self.__closed or self.__items < self.__max_items
+            )
+            self.__raise_if_closed()
+            self.__items += 1
+
+    def add_bytes(self, size: int) -> None:
+        # Одна большая страница проходит, если в работе больше ничего нет,
+        # иначе конвейер встанет навсегда.
+        with self.__condition:
+            self.__condition.wait_for(
+                lambda: self.__closed
+                or self.__bytes == 0
+                or self.__bytes + size <= self.__max_bytes
+            )
+            self.__raise_if_closed()
+            self.__bytes += size
+
+    def release(self, size: int = 0) -> None:
+        with self.__condition:
+            self.__items -= 1
+            self.__bytes -= size
+            self.__condition.notify_all()
+
+    def close(self) -> None:
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def __raise_if_closed(self) -> None:
+        if self.__closed:
+            raise PipelineClosed()
+
+
+class Pipeline:
+    __poll_interval = 0.1
+
+    def __init__(
+        self, stages: list[Stage], logger: Logger, *, queue_size: int = 16
+    ) -> None:
+        if len(stages) == 0:
+            raise ValueError("В конвейере должен быть хотя бы один этап.")
+
+        self.__stages = stages
+        self.__logger = logger
+        self.__queue_size = queue_size
+
+    def run(
+        self,
+        source: t.Iterable[t.Any],
+        *,
+        cancelled: threading.Event | None = None,
+    ) -> t.Iterator[t.Any]:
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        queues = [
+            queue.Queue(maxsize=self.__queue_size)
+            for _ in range(len(self.__stages) + 1)
+        ]
+
+        threads = [
+            threading.Thread(
+                target=self.__feed,
+                args=(
+                    source,
+                    queues[0],
+                    self.__stages[0].workers,
+                    stop,
+                    errors,
+                ),
+                name="pipeline-source",
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.__stages):
+            next_workers = (
+                self.__stages[i + 1].workers
+                if i + 1 < len(self.__stages)
+                else 1
+            )
+            alive = [stage.workers]
+            lock = threading.Lock()
+            for n in range(stage.workers):
+                threads.append(
+                    threading.Thread(
+                        target=self.__work,
+                        args=(
+                            stage,
+                            queues[i],
+                            queues[i + 1],
+                            next_workers,
+                            alive,
+                            lock,
+                            stop,
+                            errors,
+                        ),
+                        name=f"pipeline-{stage.name}-{n}",
+                        daemon=True,
+                    )
+                )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while cancelled is None or not cancelled.is_set():
+                item = self.__get(queues[-1], stop, cancelled)
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            # Потоки не ждём: этап может висеть на сетевом запросе, а
+            # дальше очереди они ничего не положат.
+            stop.set()
+
+        if len(errors) > 0:
+            raise errors[0]
+
+    def __feed(
+        self,
+        source: t.Iterable[t.Any],
+        out: queue.Queue,
+        next_workers: int,
+        stop: threading.Event,
+        errors: list[BaseException],
+    ) -> None:
+        try:
+            for item in source:
+                if not self.__put(out, item, stop):
+                    return
+        except BaseException as err:
+            self.__fail(err, stop, errors)
+            return
+
+        for _ in range(next_workers):
+            self.__put(out, _DONE, stop)
+
+    def __work(
+        self,
+        stage: Stage,
+        in_: queue.Queue,
+        out: queue.Queue,
+        next_workers: int,
+        alive: list[int],
+        lock: threading.Lock,
+        stop: threading.Event,
+        errors: list[BaseException],
+    ) -> None:
+        while True:
+            item = self.__get(in_, stop)
+            if item is _DONE:
+                break
+
+            try:
+                for result in stage.fn(item):
+                    if not self.__put(out, result, stop):
+                        return
+            except BaseException as err:
+                if not stop.is_set():
+                    self.__logger.warning(
+                        f"Ошибка на этапе {stage.name}: {str(err)}"
+                    )
+                self.__fail(err, stop, errors)
+                return
+
+        with lock:
+            alive[0] -= 1
+            is_last = alive[0] == 0
+
+        if is_last:
+            for _ in range(next_workers):
+                self.__put(out, _DONE, stop)
+
+    def __get(
+        self,
+        in_: queue.Queue,
+        stop: threading.Event,
+        cancelled: threading.Event | None = None,
+    ) -> t.Any:
+        while not stop.is_set() and not (
+            cancelled is not None and cancelled.is_set()
+        ):
+            try:
+                return in_.get(timeout=self.__poll_interval)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def __put(
+        self, out: queue.Queue, item: t.Any, stop: threading.Event
+    ) -> bool:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=self.__poll_interval)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def __fail(
+        err: BaseException, stop: threading.Event, errors: list[BaseException]
+    ) -> None:
+        if not stop.is_set():
+            errors.append(err)
+        stop.set()
@@ -1,4 +1,5 @@
 import abc
+import typing as t
 
 
 class Prompt(abc.ABC):
@@ -17,3 +18,7 @@ class Prompt(abc.ABC):
     @abc.abstractmethod
     def compile(self, prompt: str, **kwargs) -> str:
         raise NotImplementedError()
+
+    @abc.abstractmethod
+    def version(self) -> t.Hashable:
+        raise NotImplementedError()
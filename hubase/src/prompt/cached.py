@@ -7,17 +7,21 @@ from prompt.abc_ import Prompt
 class Cached(Prompt):
     def __init__(self, inner: Prompt) -> None:
         self.__inner = inner
-        self.__prompt_text: t.Optional[str] = None
+        self.__cached: t.Optional[tuple[t.Hashable, str]] = None
 
     def get(self) -> str:
-        if self.__prompt_text is not None:
-            return self.__prompt_text
+        version = self.__inner.version()
+        cached = self.__cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
 
-        return self.__inner.get()
+        prompt_text = self.__inner.get()
+        self.__cached = (version, prompt_text)
+        return prompt_text
 
     def update(self, new_prompt: str) -> str:
         self.__inner.update(new_prompt)
-        self.__prompt_text = new_prompt
+        self.__cached = (self.__inner.version(), new_prompt)
         return new_prompt
 
     def get_and_compile(self, **kwargs) -> str:
@@ -25,3 +29,6 @@ class Cached(Prompt):
 
     def compile(self, prompt: str, **kwargs) -> str:
         return self.__inner.compile(prompt, **kwargs)
+
+    def version(self) -> t.Hashable:
+        return self.__inner.version()
@@ -1,3 +1,4 @@
+import typing as t
 from pathlib import Path
 
 from prompt.abc_ import Prompt
@@ -26,3 +27,7 @@ class FileSystemPrompt(Prompt):
 
     def compile(self, prompt: str, **kwargs) -> str:
         return prompt.format(**kwargs)
+
+    def version(self) -> t.Hashable:
+        stat = self.__filepath.stat()
+        return stat.st_mtime_ns, stat.st_size
@@ -1,15 +1,19 @@
+import typing as t
+
 from prompt.abc_ import Prompt
 
 
 class InMemoryPrompt(Prompt):
     def __init__(self, prompt) -> None:
         self.__prompt = prompt
+        self.__version = 0
 
     def get(self) -> str:
         return self.__prompt
 
     def update(self, new_prompt: str) -> str:
         self.__prompt = new_prompt
+        self.__version += 1
         return new_prompt
 
     def get_and_compile(self, **kwargs) -> str:
@@ -17,3 +21,6 @@ class InMemoryPrompt(Prompt):
 
     def compile(self, prompt: str, **kwargs) -> str:
         return prompt.format(**kwargs)
+
+    def version(self) -> t.Hashable:
+        return self.__version
@@ -0,0 +1,205 @@
+import functools
+import sqlite3
+import threading
+import time
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+from model import CSVRow
+from people_index import normalized_tokens
+from settings import settings
+
+
+@dataclass(frozen=True)
+class LeadsQuery:
+    searched_company: str | None = None
+    inferenced_company: str | None = None
+    name: str | None = None
+    position: str | None = None
+    original_url: str | None = None
+
+
+@dataclass(frozen=True)
+class StoredLead:
+    name: str
+    position: str
+    searched_company: str
+    inferenced_company: str
+    original_url: str
+    source: str
+    result_file: str | None
+    created_at: float
+
+
+@dataclass(frozen=True)
+class LeadsPage:
+    total: int
+    limit: int
+    offset: int
+    leads: list[StoredLead]
+
+
+def _text_key(text: str | None) -> str:
+    return " ".join((text or "").lower().replace("ё", "е").split())
+
+
+def _name_key(name: str) -> str:
+    return " ".join(sorted(normalized_tokens(name)))
+
+
+class ResultsStore:
+    __columns = (
+        "name, position, searched_company, inferenced_company, "
+        "original_url, source, result_file, created_at"
+    )
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__lock = threading.Lock()
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                "id INTEGER PRIMARY KEY, "
+                "name TEXT NOT NULL, "
+                "name_key TEXT NOT NULL, "
+                "position TEXT, "
+                "position_key TEXT NOT NULL, "
+                "searched_company TEXT NOT NULL, "
+                "searched_company_key TEXT NOT NULL, "
+                "inferenced_company TEXT, "
+                "inferenced_company_key TEXT NOT NULL, "
+                "original_url TEXT NOT NULL, "
+                "source TEXT, "
+                "result_file TEXT, "
+                "created_at REAL NOT NULL, "
+                "UNIQUE (name_key, searched_company_key, original_url))"
+            )
+            self.__connection.execute(
+                "CREATE INDEX IF NOT EXISTS leads_name_key_company "
+                "ON leads (name_key, searched_company_key)"
+            )
+            for column in (
+                "searched_company_key",
+                "inferenced_company_key",
+                "original_url",
+            ):
+                self.__connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS leads_{column} "
+                    f"ON leads ({column})"
+                )
+
+    def add(self, row: CSVRow, result_file: str | None = None) -> bool:
+        with self.__lock, self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT OR IGNORE INTO leads (name, name_key, position, "
+                "position_key, searched_company, searched_company_key, "
+                "inferenced_company, inferenced_company_key, original_url, "
+                "source, result_file, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    row.name,
+                    _name_key(row.name),
+                    row.position,
+                    _text_key(row.position),
+                    row.searched_company,
+                    _text_key(row.searched_company),
+                    row.inferenced_company,
+                    _text_key(row.inferenced_company),
+                    row.original_url,
+                    row.source,
+                    result_file,
+                    time.time(),
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def has_lead(self, row: CSVRow, *, before: float | None = None) -> bool:
+        with self.__lock:
+            found = self.__connection.execute(
+                "SELECT 1 FROM leads "
+                "WHERE name_key = ? AND searched_company_key = ? "
+                "AND created_at < ? LIMIT 1",
+                (
+                    _name_key(row.name),
+                    _text_key(row.searched_company),
+                    before if before is not None else float("inf"),
+                ),
+            ).fetchone()
+        return found is not None
+
+    def query(
+        self, query: LeadsQuery, limit: int = 50, offset: int = 0
+    ) -> LeadsPage:
+        where, params = self.__where(query)
+        with self.__lock:
+            total = self.__connection.execute(
+                f"SELECT COUNT(*) FROM leads {where}", params
+            ).fetchone()[0]
+            rows = self.__connection.execute(
+                f"SELECT {self.__columns} FROM leads {where} "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+
+        return LeadsPage(
+            total=total,
+            limit=limit,
+            offset=offset,
+            leads=[StoredLead(*row) for row in rows],
+        )
+
+    def export(
+        self, query: LeadsQuery, batch_size: int = 1000
+    ) -> t.Iterator[StoredLead]:
+        # Постранично по id, чтобы не держать блокировку на всю выгрузку.
+        where, params = self.__where(query)
+        last_id = 0
+        while True:
+            with self.__lock:
+                rows = self.__connection.execute(
+                    f"SELECT id, {self.__columns} FROM leads {where} "
+                    f"{'AND' if where else 'WHERE'} id > ? "
+                    "ORDER BY id LIMIT ?",
+                    (*params, last_id, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+
+            for row in rows:
+                yield StoredLead(*row[1:])
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def __where(query: LeadsQuery) -> tuple[str, tuple]:
+        conditions = []
+        params: list[str] = []
+        if query.searched_company:
+            conditions.append("searched_company_key = ?")
+            params.append(_text_key(query.searched_company))
+        if query.inferenced_company:
+            conditions.append("inferenced_company_key = ?")
+            params.append(_text_key(query.inferenced_company))
+        if query.name:
+            conditions.append("name_key = ?")
+            params.append(_name_key(query.name))
+        if query.original_url:
+            conditions.append("original_url = ?")
+            params.append(query.original_url)
+        if query.position:
+            conditions.append("position_key LIKE ?")
+            params.append(f"%{_text_key(query.position)}%")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, tuple(params)
+
+
+@functools.cache
+def default_results_store() -> ResultsStore | None:
+    if not settings.results_store_enabled:
+        return None
+
+    return ResultsStore(Path(settings.results_store_path))
@@ -1,22 +1,117 @@
+import functools
+import json
+import threading
 import typing as t
 from logging import Logger
+from pathlib import Path
 
 import googlesearch as google
 
-from search_queries import SearchQueries
+from cache.sqlite_store import SqliteStore
+from checkpoint import Checkpoint
+from metrics import NO_METRICS, JobMetrics
+from search_queries import SearchQueries, SearchQuery
+from settings import settings
+from urls import canonical_url
 
 
 class SearchPage:
     def __init__(
-        self, search_queries: SearchQueries, logger: Logger, url_limit: int = 5
+        self,
+        search_queries: SearchQueries,
+        logger: Logger,
+        url_limit: int = 5,
+        *,
+        cache: SqliteStore | None = None,
+        refresh_cache: bool = False,
+        checkpoint: Checkpoint | None = None,
+        metrics: JobMetrics | None = None,
     ) -> None:
         self.__search_queries = search_queries
         self.__url_limit = url_limit
         self.__logger = logger
+        self.__cache = cache
+        self.__refresh_cache = refresh_cache
+        self.__checkpoint = checkpoint
+        self.__metrics = metrics if metrics is not None else NO_METRICS
+        self.__matches: dict[str, list[dict[str, str]]] = {}
+        self.__lock = threading.Lock()
 
     def found(self) -> t.Iterator[tuple[str, dict[str, str]]]:
         for search_query in self.__search_queries.compiled():
-            self.__logger.info(f"Делаем запрос: {search_query.query}")
-            urls = google.search(search_query.query, stop=self.__url_limit)
-            for url in urls:
-                yield url, search_query.search_params
+            yield from self.found_for(search_query)
+
+    def found_for(
+        self, search_query: SearchQuery
+    ) -> t.Iterator[tuple[str, dict[str, str]]]:
+        for url, search_params, is_new in self.matches_for(search_query):
+            if is_new:
+                yield url, search_params
+
+    def matches_for(
+        self, search_query: SearchQuery
+    ) -> t.Iterator[tuple[str, dict[str, str], bool]]:
+        for url in self.__search(search_query.query):
+            is_new = self.__is_new(url, search_query.search_params)
+            yield url, search_query.search_params, is_new
+
+    def searching_params_of(self, url: str) -> list[dict[str, str]]:
+        with self.__lock:
+            return list(self.__matches.get(canonical_url(url), []))
+
+    def __search(self, query: str) -> list[str]:
+        if self.__checkpoint is None:
+            return self.__search_or_cached(query)
+
+        # Ссылки выполненного запроса нужны и при возобновлении задачи:
+        # по ним восстанавливается, какой компании принадлежит страница.
+        urls = self.__checkpoint.urls_of(query)
+        if urls is not None:
+            self.__logger.info(f"Запрос уже выполнен в этой задаче: {query}")
+            return urls
+
+        urls = self.__search_or_cached(query)
+        self.__checkpoint.query_done(query, urls)
+        return urls
+
+    def __search_or_cached(self, query: str) -> list[str]:
+        key = json.dumps([query, self.__url_limit], ensure_ascii=False)
+
+        if self.__cache is not None and not self.__refresh_cache:
+            cached = self.__cache.get(key)
+            if cached is not None:
+                self.__logger.info(
+                    f"Результаты запроса взяты из кэша: {query}"
+                )
+                self.__metrics.cache_hit("search")
+                return json.loads(cached)
+
+        self.__logger.info(f"Делаем запрос: {query}")
+        with self.__metrics.timed("search", "google"):
+            urls = list(google.search(query, stop=self.__url_limit))
+
+        if self.__cache is not None:
+            self.__cache.put(key, json.dumps(urls).encode("utf-8"))
+
+        return urls
+
+    def __is_new(self, url: str, search_params: dict[str, str]) -> bool:
+        key = canonical_url(url)
+        with self.__lock:
+            if key in self.__matches:
+                self.__matches[key].append(search_params)
+                self.__logger.info(f"Ссылка уже найдена ранее: {url}")
+                return False
+
+            self.__matches[key] = [search_params]
+            return True
+
+
+@functools.cache
+def default_search_cache() -> SqliteStore | None:
+    if not settings.search_cache_enabled:
+        return None
+
+    return SqliteStore(
+        Path(settings.search_cache_path), ttl=settings.search_cache_ttl
+    )
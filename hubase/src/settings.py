@@ -1,3 +1,5 @@
+import typing as t
+
 from pydantic import Field, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +18,80 @@ class Settings(BaseSettings):
     access_token: SecretStr
     openai_api_key: SecretStr
     openai_api_base: str | None = None
+    search_workers: int = Field(1)
+    fetch_workers: int = Field(4)
+    extract_workers: int = Field(4)
+    persist_workers: int = Field(1)
+    pipeline_queue_size: int = Field(16)
+    max_pages_in_flight: int = Field(8)
+    max_bytes_in_flight: int = Field(8 * 1024 * 1024)
+    http_max_connections: int = Field(20)
+    http_max_connections_per_host: int = Field(8)
+    http_connect_timeout: float = Field(10.0)
+    http_read_timeout: float = Field(60.0)
+    page_cache_enabled: bool = Field(True)
+    page_cache_path: str = Field("../cache/pages.sqlite3")
+    page_cache_ttl: float = Field(7 * 24 * 60 * 60)
+    page_cache_max_bytes: int = Field(1024 * 1024 * 1024)
+    page_cache_compress: bool = Field(True)
+    search_cache_enabled: bool = Field(True)
+    search_cache_path: str = Field("../cache/search.sqlite3")
+    search_cache_ttl: float = Field(24 * 60 * 60)
+    gpt_max_in_flight: int = Field(4)
+    gpt_ordered_results: bool = Field(True)
+    chunk_max_tokens: int = Field(1500)
+    chunk_overlap_tokens: int = Field(50)
+    llm_cache_enabled: bool = Field(True)
+    llm_cache_max_entries: int = Field(4096)
+    llm_cache_persist: bool = Field(True)
+    llm_cache_path: str = Field("../cache/llm.sqlite3")
+    llm_cache_ttl: float = Field(30 * 24 * 60 * 60)
+    prefilter_threshold: float = Field(1.0)
+    boilerplate_enabled: bool = Field(True)
+    boilerplate_min_pages: int = Field(2)
+    boilerplate_min_block_lines: int = Field(3)
+    boilerplate_persist: bool = Field(False)
+    boilerplate_store_path: str = Field("../cache/boilerplate.sqlite3")
+    batch_dir: str = Field("../cache/batches")
+    batch_poll_interval: float = Field(60.0)
+    batch_max_requests: int = Field(50000)
+    openai_clients_shared: bool = Field(True)
+    ner_batch_size: int = Field(8)
+    ner_max_in_flight: int = Field(2)
+    people_extractor: t.Literal["gpt", "ner"] = Field("gpt")
+    ner_backend: t.Literal["remote", "local"] = Field("remote")
+    ner_local_model: str = Field("")
+    ner_local_workers: int = Field(0)
+    ner_llm_max_in_flight: int = Field(4)
+    # Лимит NER-моделей — обычно 512 токенов их собственного токенизатора.
+    # Если он недоступен, считаем токенами tiktoken, а их на русском
+    # тексте выходит до полутора раз меньше, поэтому размер с запасом.
+    ner_chunk_max_tokens: int = Field(300)
+    ner_chunk_overlap_tokens: int = Field(30)
+    people_dedupe_enabled: bool = Field(True)
+    ws_queue_size: int = Field(256)
+    ws_batch_max_rows: int = Field(50)
+    ws_batch_max_delay: float = Field(0.2)
+    ws_log_max_records: int = Field(1000)
+    ws_log_flush_interval: float = Field(0.5)
+    jobs_max_workers: int = Field(4)
+    jobs_max_finished: int = Field(100)
+    jobs_max_buffered_rows: int = Field(1000)
+    checkpoint_enabled: bool = Field(True)
+    checkpoint_path: str = Field("../cache/checkpoints.sqlite3")
+    results_store_enabled: bool = Field(True)
+    results_store_path: str = Field("../data/leads.sqlite3")
+    delta_store_path: str = Field("../data/delta.sqlite3")
+    # Меньше недели, чтобы еженедельный запуск перепроверял страницы.
+    delta_recheck_interval: float = Field(24 * 60 * 60)
+    csv_buffer_size: int = Field(1024 * 1024)
+    csv_flush_rows: int = Field(100)
+    csv_flush_interval: float = Field(2.0)
+    parquet_row_group_size: int = Field(1000)
+    download_chunk_size: int = Field(64 * 1024)
+    download_poll_interval: float = Field(0.5)
+    metrics_enabled: bool = Field(True)
+    metrics_max_jobs: int = Field(100)
 
 
 settings = Settings()
@@ -0,0 +1,49 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+_default_ports = {"http": 80, "https": 443}
+_tracking_params = {
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "ysclid",
+    "_openstat",
+    "_hsenc",
+    "_hsmi",
+    "mc_cid",
+    "mc_eid",
+    "igshid",
+    "ref",
+    "ref_src",
+    "trk",
+    "trackingid",
+}
+
+
+def canonical_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    if parts.port is not None and parts.port != _default_ports.get(scheme):
+        host = f"{host}:{parts.port}"
+    elif scheme == "http":
+        scheme = "https"
+
+    host = host.removeprefix("www.")
+
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not _is_tracking_param(key)
+        )
+    )
+
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def _is_tracking_param(key: str) -> bool:
+    key = key.lower()
+    return key.startswith("utm_") or key in _tracking_params
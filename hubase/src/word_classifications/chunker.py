@@ -0,0 +1,162 @@
+import re
+import typing as t
+from dataclasses import dataclass
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    # Начало куска, которое повторяет конец предыдущего.
+    overlap: str
+
+
+def approximate_token_count(text: str) -> int:
+    return (len(text) + 2) // 3
+
+
+def token_counter(model: str = "gpt-4o-mini") -> t.Callable[[str], int]:
+    if tiktoken is None:
+        return approximate_token_count
+
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class TextChunker:
+    # От крупных границ к мелким: абзацы, строки, предложения, слова.
+    __boundaries = [
+        re.compile(r"\n[ \t]*\n\s*"),
+        re.compile(r"\n"),
+        re.compile(r"(?<=[.!?…])\s+"),
+        re.compile(r"\s+"),
+    ]
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        overlap_tokens: int = 50,
+        count_tokens: t.Callable[[str], int] | None = None,
+    ) -> None:
+        if overlap_tokens >= max_tokens:
+            raise ValueError(
+                "Перекрытие кусков должно быть меньше их размера."
+            )
+
+        self.__max_tokens = max_tokens
+        self.__overlap_tokens = overlap_tokens
+        self.__count_tokens = (
+            count_tokens if count_tokens is not None else token_counter()
+        )
+
+    def chunks(self, text: str) -> list[Chunk]:
+        if text.strip() == "":
+            return []
+
+        chunks: list[Chunk] = []
+        overlap = ""
+        current: list[str] = []
+        current_tokens = 0
+
+        for piece, piece_tokens in self.__pieces(text, 0):
+            if current_tokens + piece_tokens > self.__max_tokens and current:
+                chunk_text = "".join(current)
+                chunks.append(Chunk(text=chunk_text, overlap=overlap))
+
+                overlap = self.__tail(chunk_text)
+                overlap_tokens = self.__count_tokens(overlap)
+                if overlap_tokens + piece_tokens > self.__max_tokens:
+                    overlap, overlap_tokens = "", 0
+
+                current = [overlap] if overlap else []
+                current_tokens = overlap_tokens
+
+            current.append(piece)
+            current_tokens += piece_tokens
+
+        if current:
+            chunks.append(Chunk(text="".join(current), overlap=overlap))
+
+        return chunks
+
+    def __pieces(self, text: str, level: int) -> t.Iterator[tuple[str, int]]:
+        tokens = self.__count_tokens(text)
+        if tokens <= self.__max_tokens:
+            yield text, tokens
+            return
+
+        if level == len(self.__boundaries):
+            yield from self.__hard_split(text, tokens)
+            return
+
+        for part in self.__split_keeping_separators(
+            text, self.__boundaries[level]
+        ):
+            yield from self.__pieces(part, level + 1)
+
+    def __hard_split(
+        self, text: str, tokens: int
+    ) -> t.Iterator[tuple[str, int]]:
+        size = max(1, len(text) * self.__max_tokens // tokens)
+        for i in range(0, len(text), size):
+            part = text[i : i + size]
+            yield part, self.__count_tokens(part)
+
+    def __tail(self, text: str) -> str:
+        if self.__overlap_tokens <= 0:
+            return ""
+
+        words = re.split(r"(?<=\s)", text)
+        tail = ""
+        for word in reversed(words):
+            candidate = word + tail
+            if self.__count_tokens(candidate) > self.__overlap_tokens:
+                break
+            tail = candidate
+        return tail
+
+    @staticmethod
+    def __split_keeping_separators(
+        text: str, separator: re.Pattern
+    ) -> list[str]:
+        parts = []
+        start = 0
+        for match in separator.finditer(text):
+            if match.end() > start:
+                parts.append(text[start : match.end()])
+                start = match.end()
+        if start < len(text):
+            parts.append(text[start:])
+        return parts
+
+
+class OverlapDeduplicator:
+    def __init__(self, chunks: list[Chunk]) -> None:
+        self.__chunks = chunks
+        self.__seen: set[str] = set()
+
+    def is_duplicate(self, chunk_index: int, name: str) -> bool:
+        key = " ".join(name.casefold().split())
+        if key in self.__seen and self.__in_overlap(chunk_index, key):
+            return True
+
+        self.__seen.add(key)
+        return False
+
+    def __in_overlap(self, chunk_index: int, key: str) -> bool:
+        # Человек мог попасть и в начало этого куска, и в начало следующего.
+        overlaps = [self.__chunks[chunk_index].overlap]
+        if chunk_index + 1 < len(self.__chunks):
+            overlaps.append(self.__chunks[chunk_index + 1].overlap)
+
+        return any(
+            key in " ".join(overlap.casefold().split()) for overlap in overlaps
+        )
@@ -0,0 +1,269 @@
+import datetime as dt
+import json
+import threading
+import typing as t
+from dataclasses import dataclass, field
+from logging import Logger
+from pathlib import Path
+
+from openai import OpenAI
+from pydantic import ValidationError
+
+from cache.llm import ResponseCache
+from word_classifications.abc_ import HubaseIterator
+from word_classifications.chunker import (
+    Chunk,
+    OverlapDeduplicator,
+    TextChunker,
+)
+from word_classifications.gpt.people import (
+    GPT_MODEL,
+    GPT_TEMPERATURE,
+    GPTPerson,
+    GPTResponse,
+    GPTResponseWithSource,
+)
+from word_classifications.prefilter import PeoplePrefilter
+
+
+class GPTBatchException(Exception):
+    pass
+
+
+@dataclass
+class GPTBatchPage(HubaseIterator):
+    url: str
+    searching_params: dict[str, str]
+    chunks: list[Chunk]
+    people: dict[int, list[GPTPerson]] = field(default_factory=dict)
+    # Куски, отправленные в пакет, но оставшиеся без ответа: пакет
+    # отменён, упал или вернул некорректный ответ.
+    unanswered: set[int] = field(default_factory=set)
+
+    @property
+    def answered(self) -> bool:
+        return not self.unanswered
+
+    def iter(self) -> t.Iterator[GPTResponseWithSource]:
+        deduplicator = OverlapDeduplicator(self.chunks)
+        for i in sorted(self.people):
+            for person in self.people[i]:
+                if deduplicator.is_duplicate(i, person.name):
+                    continue
+                yield GPTResponseWithSource(
+                    person=person, source=self.chunks[i].text
+                )
+
+
+class GPTBatch:
+    __finished_statuses = {"completed", "failed", "expired", "cancelled"}
+
+    def __init__(
+        self,
+        client: OpenAI,
+        prompt_template: str,
+        logger: Logger,
+        *,
+        batch_dir: Path,
+        chunker: TextChunker | None = None,
+        prefilter: PeoplePrefilter | None = None,
+        cache: ResponseCache | None = None,
+        poll_interval: float = 60.0,
+        max_requests: int = 50000,
+        cancelled: threading.Event | None = None,
+    ) -> None:
+        if "{input}" not in prompt_template:
+            raise ValueError("Переменная {input} должна быть в промпте.")
+
+        self.__client = client
+        self.__prompt_template = prompt_template
+        self.__logger = logger
+        self.__batch_dir = batch_dir
+        self.__chunker = chunker if chunker is not None else TextChunker()
+        self.__prefilter = prefilter
+        self.__cache = cache
+        self.__poll_interval = poll_interval
+        self.__max_requests = max_requests
+        self.__cancelled = (
+            cancelled if cancelled is not None else threading.Event()
+        )
+        self.__response_format = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": GPTResponse.__name__,
+                "schema": _strict_schema(GPTResponse.model_json_schema()),
+                "strict": True,
+            },
+        }
+
+        self.__pages: list[GPTBatchPage] = []
+        self.__lock = threading.Lock()
+
+    def add(
+        self, url: str, searching_params: dict[str, str], text: str
+    ) -> None:
+        page = GPTBatchPage(
+            url=url,
+            searching_params=searching_params,
+            chunks=self.__chunker.chunks(text),
+        )
+        with self.__lock:
+            self.__pages.append(page)
+
+    def run(self) -> t.Iterator[GPTBatchPage]:
+        requests: dict[str, tuple[GPTBatchPage, int, str]] = {}
+        for page_index, page in enumerate(self.__pages):
+            for chunk_index, chunk in enumerate(page.chunks):
+                if self.__prefilter is not None and not (
+                    self.__prefilter.accepts(chunk.text)
+                ):
+                    continue
+
+                prompt = self.__prompt_template.format(input=chunk.text)
+                cached = self.__cached(prompt)
+                if cached is not None:
+                    page.people[chunk_index] = cached
+                    continue
+
+                custom_id = f"{page_index}-{chunk_index}"
+                requests[custom_id] = (page, chunk_index, prompt)
+                page.unanswered.add(chunk_index)
+
+        self.__logger.info(
+            f"Страниц в пакете: {len(self.__pages)}, "
+            f"запросов к GPT: {len(requests)}"
+        )
+
+        custom_ids = list(requests)
+        for start in range(0, len(custom_ids), self.__max_requests):
+            if self.__cancelled.is_set():
+                break
+            part = custom_ids[start : start + self.__max_requests]
+            for custom_id, people in self.__run_batch(
+                {custom_id: requests[custom_id][2] for custom_id in part}
+            ):
+                page, chunk_index, prompt = requests[custom_id]
+                page.people[chunk_index] = people
+                page.unanswered.discard(chunk_index)
+                if self.__cache is not None:
+                    self.__cache.put(
+                        self.__cache_key(prompt),
+                        GPTResponse(people=people).model_dump_json(),
+                    )
+
+        yield from self.__pages
+
+    def __run_batch(
+        self, prompts: dict[str, str]
+    ) -> t.Iterator[tuple[str, list[GPTPerson]]]:
+        batch_file = self.__write_batch_file(prompts)
+
+        with open(batch_file, "rb") as fd:
+            input_file = self.__client.files.create(file=fd, purpose="batch")
+
+        batch = self.__client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        self.__logger.info(f"Пакет отправлен в OpenAI: {batch.id}")
+
+        while batch.status not in self.__finished_statuses:
+            if self.__cancelled.wait(self.__poll_interval):
+                self.__client.batches.cancel(batch.id)
+                self.__logger.info(f"Пакет {batch.id} отменён.")
+                return
+            batch = self.__client.batches.retrieve(batch.id)
+            self.__logger.info(f"Статус пакета {batch.id}: {batch.status}")
+
+        if batch.status != "completed" or batch.output_file_id is None:
+            raise GPTBatchException(
+                f"Пакет {batch.id} завершился со статусом {batch.status}"
+            )
+
+        if batch.error_file_id is not None:
+            errors = self.__client.files.content(batch.error_file_id).text
+            self.__logger.warning(
+                f"Запросов с ошибкой в пакете: {len(errors.splitlines())}"
+            )
+
+        output = self.__client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if line.strip() == "":
+                continue
+
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                self.__logger.warning(
+                    f"Ошибка в запросе {result['custom_id']}: "
+                    f"{result.get('error') or response.get('body')}"
+                )
+                continue
+
+            content = response["body"]["choices"][0]["message"]["content"]
+            try:
+                people = GPTResponse.model_validate_json(content).people
+            except ValidationError as err:
+                self.__logger.warning(
+                    f"Некорректный ответ в запросе {result['custom_id']}: "
+                    f"{err}"
+                )
+                continue
+            yield result["custom_id"], people
+
+    def __write_batch_file(self, prompts: dict[str, str]) -> Path:
+        self.__batch_dir.mkdir(parents=True, exist_ok=True)
+        batch_file = (
+            self.__batch_dir
+            / f"batch-{dt.datetime.now().strftime('%m%d%Y-%H%M%S%f')}.jsonl"
+        )
+        with open(batch_file, "w") as fd:
+            for custom_id, prompt in prompts.items():
+                request = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": GPT_MODEL,
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": GPT_TEMPERATURE,
+                        "response_format": self.__response_format,
+                    },
+                }
+                fd.write(json.dumps(request, ensure_ascii=False) + "\n")
+        return batch_file
+
+    def __cached(self, prompt: str) -> list[GPTPerson] | None:
+        if self.__cache is None:
+            return None
+
+        cached = self.__cache.get(self.__cache_key(prompt))
+        if cached is None:
+            return None
+        return GPTResponse.model_validate_json(cached).people
+
+    @staticmethod
+    def __cache_key(prompt: str) -> str:
+        return ResponseCache.key(
+            GPT_MODEL,
+            prompt,
+            GPTResponse.model_json_schema(),
+            GPT_TEMPERATURE,
+        )
+
+
+def _strict_schema(schema: dict) -> dict:
+    # Structured Outputs в строгом режиме требуют, чтобы у каждого объекта
+    # все поля были обязательными и лишние поля были запрещены.
+    if schema.get("type") == "object":
+        schema["additionalProperties"] = False
+        schema["required"] = list(schema.get("properties", {}))
+    for value in schema.values():
+        if isinstance(value, dict):
+            _strict_schema(value)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict):
+                    _strict_schema(item)
+    return schema
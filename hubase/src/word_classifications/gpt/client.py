@@ -0,0 +1,31 @@
+import functools
+import threading
+
+from openai import OpenAI
+
+
+class OpenAIClients:
+    def __init__(self) -> None:
+        self.__clients: dict[tuple[str, str | None], OpenAI] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, api_key: str, api_base: str | None = None) -> OpenAI:
+        key = (api_key, api_base)
+        with self.__lock:
+            if key not in self.__clients:
+                client = OpenAI(api_key=api_key)
+                if api_base is not None:
+                    client.base_url = api_base
+                self.__clients[key] = client
+            return self.__clients[key]
+
+    def close(self) -> None:
+        with self.__lock:
+            for client in self.__clients.values():
+                client.close()
+            self.__clients.clear()
+
+
+@functools.cache
+def default_openai_clients() -> OpenAIClients:
+    return OpenAIClients()
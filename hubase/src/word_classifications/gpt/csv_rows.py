@@ -2,12 +2,15 @@ import typing as t
 
 from model import CSVRow
 from word_classifications.abc_ import HubaseIterator
-from word_classifications.gpt.people import GPTPeople
+from word_classifications.gpt.people import GPTResponseWithSource
 
 
 class GPTCSVRows(HubaseIterator):
     def __init__(
-        self, people: GPTPeople, url: str, searching_params: dict[str, str]
+        self,
+        people: HubaseIterator[GPTResponseWithSource],
+        url: str,
+        searching_params: dict[str, str],
     ) -> None:
         self.__people = people
         self.__url = url
@@ -1,11 +1,19 @@
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from logging import Logger
 
 from openai import OpenAI
 from pydantic import BaseModel
 
+from cache.llm import ResponseCache
+from metrics import NO_METRICS, JobMetrics
 from word_classifications.abc_ import HubaseIterator
+from word_classifications.chunker import OverlapDeduplicator, TextChunker
+from word_classifications.prefilter import PeoplePrefilter
+
+GPT_MODEL = "gpt-4o-mini"
+GPT_TEMPERATURE = 0
 
 
 class GPTPerson(BaseModel):
@@ -25,6 +33,9 @@ class GPTResponseWithSource:
 
 
 class GPTPeople(HubaseIterator):
+    __model = GPT_MODEL
+    __temperature = GPT_TEMPERATURE
+
     def __init__(
         self,
         text: str,
@@ -32,8 +43,14 @@ class GPTPeople(HubaseIterator):
         api_key: str,
         logger: Logger,
         *,
-        batch_size: int = 2000,
+        chunker: TextChunker | None = None,
         openai_api_base: str | None = None,
+        client: OpenAI | None = None,
+        max_in_flight: int = 4,
+        ordered: bool = True,
+        cache: ResponseCache | None = None,
+        prefilter: PeoplePrefilter | None = None,
+        metrics: JobMetrics | None = None,
     ) -> None:
         if "{input}" not in prompt_template:
             raise ValueError("Переменная {input} должна быть в промпте.")
@@ -41,40 +58,120 @@ class GPTPeople(HubaseIterator):
         self.__text = text
         self.__prompt_template = prompt_template
         self.__api_key = api_key
-        self.__client = OpenAI(api_key=self.__api_key)
         self.__logger = logger
-        self.__batch_size = batch_size
-
-        if openai_api_base is not None:
-            self.__client.base_url = openai_api_base
+        self.__chunker = chunker if chunker is not None else TextChunker()
+        self.__max_in_flight = max_in_flight
+        self.__ordered = ordered
+        self.__cache = cache
+        self.__prefilter = prefilter
+        self.__metrics = metrics if metrics is not None else NO_METRICS
+
+        if client is not None:
+            self.__client = client
+        else:
+            self.__client = OpenAI(api_key=self.__api_key)
+            if openai_api_base is not None:
+                self.__client.base_url = openai_api_base
 
     def iter(self) -> t.Iterator[GPTResponseWithSource]:
-        for batch in self.__text_batches():
-            for person in self.__safely_call_gpt(
-                self.__prompt_template.format(input=batch)
-            ):
-                yield GPTResponseWithSource(
-                    person=person,
-                    source=batch,
-                )
+        batches = self.__chunker.chunks(self.__text)
+        deduplicator = OverlapDeduplicator(batches)
+        indexes = [
+            i
+            for i, batch in enumerate(batches)
+            if self.__prefilter is None or self.__prefilter.accepts(batch.text)
+        ]
+        if len(indexes) < len(batches):
+            self.__logger.info(
+                f"Пропущено кусков текста без людей: "
+                f"{len(batches) - len(indexes)} из {len(batches)}"
+            )
+        if len(indexes) == 0:
+            return
 
-    def __text_batches(self) -> t.Iterator[str]:
-        for i in range(0, len(self.__text), self.__batch_size):
-            yield self.__text[i : i + self.__batch_size]
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.__max_in_flight, len(indexes)),
+            thread_name_prefix="gpt",
+        )
+        try:
+            futures = {
+                executor.submit(
+                    self.__cached_call_gpt,
+                    self.__prompt_template.format(input=batches[i].text),
+                ): i
+                for i in indexes
+            }
+            done = futures if self.__ordered else as_completed(futures)
+
+            failed: list[Exception] = []
+            for future in done:
+                people = self.__result_or_none(future, failed)
+                if people is None:
+                    continue
+                i = futures[future]
+                for person in people:
+                    if deduplicator.is_duplicate(i, person.name):
+                        continue
+                    yield GPTResponseWithSource(
+                        person=person,
+                        source=batches[i].text,
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if len(failed) == len(indexes):
+            raise failed[-1]
+
+        if len(failed) > 0:
+            self.__logger.warning(
+                f"Не удалось обработать кусков текста: {len(failed)} "
+                f"из {len(indexes)}"
+            )
+
+    @staticmethod
+    def __result_or_none(
+        future: Future, failed: list[Exception]
+    ) -> list[GPTPerson] | None:
+        try:
+            return future.result()
+        except Exception as err:
+            failed.append(err)
+            return None
+
+    def __cached_call_gpt(self, prompt: str) -> list[GPTPerson]:
+        if self.__cache is None:
+            return self.__safely_call_gpt(prompt)
+
+        key = ResponseCache.key(
+            self.__model,
+            prompt,
+            GPTResponse.model_json_schema(),
+            self.__temperature,
+        )
+        cached = self.__cache.get(key)
+        if cached is not None:
+            self.__logger.info("Ответ GPT взят из кэша.")
+            self.__metrics.cache_hit("gpt")
+            return GPTResponse.model_validate_json(cached).people
+
+        people = self.__safely_call_gpt(prompt)
+        self.__cache.put(key, GPTResponse(people=people).model_dump_json())
+        return people
 
     def __safely_call_gpt(self, prompt: str) -> list[GPTPerson]:
         try:
-            response = self.__client.beta.chat.completions.parse(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                temperature=0,
-                response_format=GPTResponse,
-            )
+            with self.__metrics.timed("gpt", self.__model):
+                response = self.__client.beta.chat.completions.parse(
+                    model=self.__model,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt,
+                        }
+                    ],
+                    temperature=self.__temperature,
+                    response_format=GPTResponse,
+                )
 
         except Exception as e:
             self.__logger.warning(f"Ошибка при запросе к GPT: {str(e)}")
@@ -82,6 +179,11 @@ class GPTPeople(HubaseIterator):
 
         else:
             people = response.choices[0].message.parsed.people
+            self.__metrics.tokens(
+                self.__model,
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens,
+            )
             self.__logger.info("Получен ответ от GPT.")
             self.__logger.info(f"Найдено людей: {len(people)}")
             self.__logger.info(
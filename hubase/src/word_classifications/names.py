@@ -0,0 +1,64 @@
+import re
+import typing as t
+
+NAME_PAIR = re.compile(
+    r"\b[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)?\s+[А-ЯЁ][а-яё]+"
+    r"|\b[A-Z][a-z]+(?:-[A-Z][a-z]+)?\s+[A-Z][a-z]+"
+)
+PATRONYMIC = re.compile(r"\b[А-ЯЁ][а-яё]+(?:вич|вна|ична|чна)\b")
+INITIALS = re.compile(
+    r"\b[А-ЯЁA-Z]\.\s?(?:[А-ЯЁA-Z]\.\s?)?[А-ЯЁA-Z][а-яёa-z]+"
+    r"|\b[А-ЯЁA-Z][а-яёa-z]+\s[А-ЯЁA-Z]\.\s?(?:[А-ЯЁA-Z]\.)?"
+)
+
+_FULL_NAME = re.compile(
+    r"\b[А-ЯЁ][а-яё]+(?:-[А-ЯЁ][а-яё]+)?(?:[ \t]+[А-ЯЁ][а-яё]+){1,2}\b"
+)
+# Слова, которые часто пишут с заглавной буквы в начале строки или
+# в должностях, но которые не бывают частью имени.
+_NOT_NAMES = frozenset(
+    (
+        "генеральный",
+        "финансовый",
+        "технический",
+        "коммерческий",
+        "исполнительный",
+        "главный",
+        "директор",
+        "руководитель",
+        "начальник",
+        "председатель",
+        "заместитель",
+        "президент",
+        "основатель",
+        "партнер",
+        "партнёр",
+        "менеджер",
+        "бухгалтер",
+        "компания",
+        "группа",
+        "совет",
+        "директоров",
+        "правление",
+        "отдел",
+        "главная",
+        "контакты",
+        "новости",
+        "россия",
+        "москва",
+    )
+)
+
+
+def find_names(text: str) -> t.Iterator[tuple[int, int]]:
+    taken: list[tuple[int, int]] = []
+    for pattern in (_FULL_NAME, INITIALS):
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            words = match.group().replace(".", " ").lower().split()
+            if any(word in _NOT_NAMES for word in words):
+                continue
+            if any(start < e and s < end for s, e in taken):
+                continue
+            taken.append((start, end))
+            yield start, end
@@ -0,0 +1,24 @@
+import abc
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class NerResponse:
+    entity_group: str
+    score: float
+    word: str
+    start: int
+    end: int
+
+
+class NerBackend(abc.ABC):
+    name = "ner"
+
+    @abc.abstractmethod
+    def safely_call_many(
+        self, texts: list[str], parameters: dict | None = None
+    ) -> list[list[NerResponse]]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
@@ -1,46 +1,91 @@
-from dataclasses import dataclass
+import functools
 from logging import Logger
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from exceptions import HuggingFaceException
+from settings import settings
+from word_classifications.ner.abc_ import NerBackend, NerResponse
 
 
-@dataclass(frozen=True)
-class NerResponse:
-    entity_group: str
-    score: float
-    word: str
-    start: int
-    end: int
+class NerClient(NerBackend):
+    name = "remote"
 
-
-class NerClient:
-    def __init__(self, url: str, api_key: str, logger: Logger) -> None:
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        logger: Logger,
+        *,
+        session: requests.Session | None = None,
+        timeout: tuple[float, float] = (10.0, 60.0),
+    ) -> None:
         self.__url = url
         self.__api_key = api_key
         self.__logger = logger
+        self.__session = session if session is not None else requests.Session()
+        self.__timeout = timeout
 
     def safely_call(self, payload: dict) -> list[NerResponse]:
-        response = requests.post(
+        response = self.__post(payload)
+        return list(map(self.__ner_response, response))
+
+    def safely_call_many(
+        self, texts: list[str], parameters: dict | None = None
+    ) -> list[list[NerResponse]]:
+        response = self.__post(
+            {
+                "inputs": texts,
+                "options": {"wait_for_model": True},
+                "parameters": parameters or {},
+            }
+        )
+
+        # На один текст HuggingFace может вернуть плоский список сущностей.
+        if len(texts) == 1 and (
+            len(response) == 0 or isinstance(response[0], dict)
+        ):
+            response = [response]
+
+        if len(response) != len(texts):
+            raise HuggingFaceException(
+                f"Ожидали ответов: {len(texts)}, получили: {len(response)}"
+            )
+
+        return [list(map(self.__ner_response, items)) for items in response]
+
+    def __post(self, payload: dict) -> list:
+        response = self.__session.post(
             self.__url,
             headers={"Authorization": f"Bearer {self.__api_key}"},
             json=payload,
+            timeout=self.__timeout,
         ).json()
 
         if "error" in response:
             self.__logger.warning(f"HuggingFace error. {response['error']}")
             raise HuggingFaceException(response["error"])
 
-        return list(
-            map(
-                lambda item: NerResponse(
-                    entity_group=item["entity_group"],
-                    score=item["score"],
-                    word=item["word"],
-                    start=item["start"],
-                    end=item["end"],
-                ),
-                response,
-            )
+        return response
+
+    @staticmethod
+    def __ner_response(item: dict) -> NerResponse:
+        return NerResponse(
+            entity_group=item["entity_group"],
+            score=item["score"],
+            word=item["word"],
+            start=item["start"],
+            end=item["end"],
         )
+
+
+@functools.cache
+def default_ner_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=settings.ner_max_in_flight
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -1,13 +1,26 @@
+import itertools
+import re
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from pydantic import BaseModel, ValidationError
 
 from llm_qa.abc import LLMClientQA
 from model import CSVRow
 from prompt.abc_ import Prompt
 from word_classifications.abc_ import HubaseIterator
+from word_classifications.model import Person
 from word_classifications.ner.people import NerPeople
 
 
+class CompanyAndPosition(BaseModel):
+    company: str | None = None
+    position: str | None = None
+
+
 class NerCSVRows(HubaseIterator):
+    __json_object = re.compile(r"\{.*\}", re.DOTALL)
+
     def __init__(
         self,
         people: NerPeople,
@@ -16,31 +29,71 @@ class NerCSVRows(HubaseIterator):
         position_prompt: Prompt,
         url: str,
         searching_params: dict[str, str],
+        *,
+        company_and_position_prompt: Prompt | None = None,
+        max_in_flight: int = 4,
     ) -> None:
         self.__people = people
         self.__llm_qa = llm_qa
         self.__company_prompt = company_prompt
         self.__position_prompt = position_prompt
+        self.__company_and_position_prompt = company_and_position_prompt
         self.__url = url
         self.__searching_params = searching_params
+        self.__max_in_flight = max_in_flight
 
     def iter(self) -> t.Iterator[CSVRow]:
-        for person in self.__people.iter():
-            inferenced_company = self.__llm_qa.ask(
-                self.__company_prompt.get_and_compile(
+        with ThreadPoolExecutor(self.__max_in_flight) as executor:
+            for source, people in itertools.groupby(
+                self.__people.iter(), key=lambda person: person.source
+            ):
+                unique: dict[str, Person] = {}
+                for person in people:
+                    unique.setdefault(
+                        " ".join(person.name.split()).lower(), person
+                    )
+                for person, (company, position) in zip(
+                    unique.values(),
+                    executor.map(self.__infer, unique.values()),
+                ):
+                    yield CSVRow(
+                        name=person.name,
+                        source=source,
+                        position=position,
+                        searched_company=self.__searching_params["company"],
+                        inferenced_company=company,
+                        original_url=self.__url,
+                    )
+
+    def __infer(self, person: Person) -> tuple[str, str]:
+        if self.__company_and_position_prompt is not None:
+            answer = self.__llm_qa.ask(
+                self.__company_and_position_prompt.get_and_compile(
                     person=person.name, context=person.source
                 )
             )
-            inferenced_position = self.__llm_qa.ask(
-                self.__position_prompt.get_and_compile(
-                    person=person.name, context=person.source
-                )
+            parsed = self.__parse(answer)
+            if parsed is not None:
+                return parsed.company or "", parsed.position or ""
+
+        inferenced_company = self.__llm_qa.ask(
+            self.__company_prompt.get_and_compile(
+                person=person.name, context=person.source
             )
-            yield CSVRow(
-                name=person.name,
-                source=person.source,
-                position=inferenced_position,
-                searched_company=self.__searching_params["company"],
-                inferenced_company=inferenced_company,
-                original_url=self.__url,
+        )
+        inferenced_position = self.__llm_qa.ask(
+            self.__position_prompt.get_and_compile(
+                person=person.name, context=person.source
             )
+        )
+        return inferenced_company, inferenced_position
+
+    def __parse(self, answer: str) -> CompanyAndPosition | None:
+        match = self.__json_object.search(answer)
+        if match is None:
+            return None
+
+        try:
+            return CompanyAndPosition.model_validate_json(match.group())
+        except ValidationError:
+            return None
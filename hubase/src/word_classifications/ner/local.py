@@ -0,0 +1,111 @@
+import functools
+import importlib.util
+import multiprocessing
+import os
+import typing as t
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+from settings import settings
+from word_classifications.names import find_names
+from word_classifications.ner.abc_ import NerBackend, NerResponse
+
+# Модель загружается один раз в каждом процессе пула.
+_pipeline: t.Any = None
+
+
+def _load_model(model: str | None) -> None:
+    global _pipeline
+    if model is None or importlib.util.find_spec("transformers") is None:
+        return
+
+    from transformers import pipeline
+
+    _pipeline = pipeline(
+        "token-classification",
+        model=model,
+        aggregation_strategy="simple",
+        device=-1,
+    )
+
+
+def _recognize(text: str) -> list[NerResponse]:
+    if _pipeline is None:
+        return [
+            NerResponse(
+                entity_group="PER",
+                score=0.5,
+                word=text[start:end],
+                start=start,
+                end=end,
+            )
+            for start, end in find_names(text)
+        ]
+
+    return [
+        NerResponse(
+            entity_group=item["entity_group"],
+            score=float(item["score"]),
+            word=item["word"],
+            start=item["start"],
+            end=item["end"],
+        )
+        for item in _pipeline(text)
+    ]
+
+
+def model_token_counter(model: str) -> t.Callable[[str], int] | None:
+    if importlib.util.find_spec("transformers") is None:
+        return None
+
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    return lambda text: len(tokenizer(text)["input_ids"])
+
+
+class LocalNerBackend(NerBackend):
+    name = "local"
+
+    def __init__(
+        self,
+        *,
+        model: str | None = None,
+        workers: int | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        # Бэкенд общий для всех задач, поэтому логгер задачи не храним:
+        # о переходе на правила сообщает тот, кто выбирает бэкенд.
+        if importlib.util.find_spec("transformers") is None:
+            model = None
+
+        self.rule_based = model is None
+        self.__executor = (
+            executor
+            if executor is not None
+            else ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                # Сервер многопоточный: fork может унаследовать чужую
+                # захваченную блокировку, и процесс пула зависнет.
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_load_model,
+                initargs=(model,),
+            )
+        )
+
+    def safely_call_many(
+        self, texts: list[str], parameters: dict | None = None
+    ) -> list[list[NerResponse]]:
+        # Каждый фрагмент — отдельная задача, чтобы большая страница
+        # распределялась по всем ядрам.
+        return list(self.__executor.map(_recognize, texts))
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+
+@functools.cache
+def default_local_ner_backend() -> LocalNerBackend:
+    return LocalNerBackend(
+        model=settings.ner_local_model or None,
+        workers=settings.ner_local_workers or None,
+    )
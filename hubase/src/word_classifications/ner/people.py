@@ -1,44 +1,79 @@
 import typing as t
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 
+from metrics import NO_METRICS, JobMetrics
+from settings import settings
 from word_classifications.abc_ import HubaseIterator
+from word_classifications.chunker import (
+    Chunk,
+    OverlapDeduplicator,
+    TextChunker,
+)
 from word_classifications.model import Person
-from word_classifications.ner.client import NerClient, NerResponse
+from word_classifications.ner.abc_ import NerBackend, NerResponse
 
 
 class NerPeople(HubaseIterator):
     def __init__(
         self,
         text: str,
-        client: NerClient,
+        client: NerBackend,
         logger: Logger,
         *,
-        batch_size: int = 512,
+        chunker: TextChunker | None = None,
+        batch_size: int = 8,
+        max_in_flight: int = 2,
+        metrics: JobMetrics | None = None,
     ) -> None:
         self.__text = text
         self.__client = client
-        self.__batch_size = batch_size
+        self.__chunker = (
+            chunker
+            if chunker is not None
+            else TextChunker(
+                max_tokens=settings.ner_chunk_max_tokens,
+                overlap_tokens=settings.ner_chunk_overlap_tokens,
+            )
+        )
         self.__logger = logger
+        self.__batch_size = batch_size
+        self.__max_in_flight = max_in_flight
+        self.__metrics = metrics if metrics is not None else NO_METRICS
 
     def iter(self) -> t.Iterator[Person]:
-        for batch in self.__text_batches():
-            self.__logger.info("Делаем запрос в NER")
-            raw_word_classification = self.__client.safely_call(
-                payload={
-                    "inputs": batch,
-                    "options": {"wait_for_model": True},
-                    "parameters": {"aggregation_strategy": "simple"},
-                }
-            )
-            for wc in filter(self.__only_people, raw_word_classification):
-                yield Person(
-                    name=wc.word,
-                    source=batch,
-                )
+        chunks = self.__chunker.chunks(self.__text)
+        deduplicator = OverlapDeduplicator(chunks)
+        batches = [
+            chunks[start : start + self.__batch_size]
+            for start in range(0, len(chunks), self.__batch_size)
+        ]
+
+        with ThreadPoolExecutor(self.__max_in_flight) as executor:
+            responses = executor.map(self.__call_ner, batches)
+            i = 0
+            for batch, batch_responses in zip(batches, responses):
+                for chunk, raw_word_classification in zip(
+                    batch, batch_responses
+                ):
+                    for wc in filter(
+                        self.__only_people, raw_word_classification
+                    ):
+                        if deduplicator.is_duplicate(i, wc.word):
+                            continue
+                        yield Person(
+                            name=wc.word,
+                            source=chunk.text,
+                        )
+                    i += 1
 
-    def __text_batches(self) -> list[str]:
-        for i in range(0, len(self.__text), self.__batch_size):
-            yield self.__text[i : i + self.__batch_size]
+    def __call_ner(self, batch: list[Chunk]) -> list[list[NerResponse]]:
+        self.__logger.info(f"Делаем запрос в NER, фрагментов: {len(batch)}")
+        with self.__metrics.timed("ner", self.__client.name):
+            return self.__client.safely_call_many(
+                [chunk.text for chunk in batch],
+                parameters={"aggregation_strategy": "simple"},
+            )
 
     def __only_people(self, ner_response: NerResponse) -> bool:
         return ner_response.entity_group == "PER"
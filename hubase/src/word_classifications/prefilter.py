@@ -0,0 +1,76 @@
+import re
+import threading
+
+from word_classifications.names import INITIALS, NAME_PAIR, PATRONYMIC
+
+
+class PeoplePrefilter:
+    __known_positions = (
+        "директор",
+        "руководител",
+        "начальник",
+        "глава",
+        "председател",
+        "заместител",
+        "президент",
+        "основател",
+        "партнер",
+        "партнёр",
+        "менеджер",
+        "управляющ",
+        "бухгалтер",
+        "ceo",
+        "cfo",
+        "cto",
+        "coo",
+        "founder",
+        "director",
+        "head of",
+        "president",
+        "manager",
+        "partner",
+    )
+
+    def __init__(self, positions: list[str], threshold: float = 1.0) -> None:
+        keywords = dict.fromkeys(
+            [p.strip().strip('"').lower() for p in positions if p.strip()]
+            + list(self.__known_positions)
+        )
+        # Русские ключевые слова — основы, латинские — целые слова,
+        # чтобы "coo" не находилось в "cookies".
+        self.__positions = re.compile(
+            "|".join(
+                rf"\b{re.escape(k)}" + (r"\b" if k.isascii() else "")
+                for k in keywords
+            )
+        )
+        self.__threshold = threshold
+        self.__lock = threading.Lock()
+        self.__passed = 0
+        self.__skipped = 0
+
+    def score(self, text: str) -> float:
+        lowered = text.lower()
+        return (
+            len(NAME_PAIR.findall(text))
+            + 2 * len(PATRONYMIC.findall(text))
+            + 1.5 * len(INITIALS.findall(text))
+            + len(self.__positions.findall(lowered))
+        )
+
+    def accepts(self, text: str) -> bool:
+        accepted = self.score(text) >= self.__threshold
+        with self.__lock:
+            if accepted:
+                self.__passed += 1
+            else:
+                self.__skipped += 1
+        return accepted
+
+    @property
+    def passed(self) -> int:
+        return self.__passed
+
+    @property
+    def skipped(self) -> int:
+        return self.__skipped
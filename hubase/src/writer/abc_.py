@@ -0,0 +1,36 @@
+import abc
+import typing as t
+
+from model import CSVRow
+
+
+class ResultWriter(abc.ABC):
+    @abc.abstractmethod
+    def __enter__(self) -> "ResultWriter":
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def persist(self, person: CSVRow) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def flush(self) -> None:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def rewrite(self, people: t.Iterable[CSVRow]) -> None:
+        raise NotImplementedError()
+
+    @property
+    @abc.abstractmethod
+    def name(self) -> str:
+        raise NotImplementedError()
+
+    @property
+    @abc.abstractmethod
+    def download_url(self) -> str:
+        raise NotImplementedError()
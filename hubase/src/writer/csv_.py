@@ -0,0 +1,47 @@
+import csv
+import gzip
+import typing as t
+from pathlib import Path
+
+from results_store import ResultsStore
+from settings import Settings
+from writer.text import RowWriter, TextWriter
+
+
+class HubaseCsv(TextWriter):
+    def __init__(
+        self,
+        name: str,
+        headers: list[str],
+        settings: Settings,
+        *,
+        store: ResultsStore | None = None,
+        resume: bool = False,
+    ) -> None:
+        super().__init__(name, settings, store=store, resume=resume)
+        self.__headers = headers
+        self.__buffer_size = settings.csv_buffer_size
+
+    def _open(self, path: Path, mode: t.Literal["a", "w"]) -> t.TextIO:
+        return open(
+            path,
+            mode=mode,
+            newline="",
+            encoding="utf-8",
+            buffering=self.__buffer_size,
+        )
+
+    def _row_writer(self, fd: t.TextIO, *, header: bool) -> RowWriter:
+        writer = csv.DictWriter(
+            fd, fieldnames=self.__headers, extrasaction="ignore"
+        )
+        if header:
+            writer.writeheader()
+        return lambda person: writer.writerow(person.__dict__)
+
+
+class HubaseCsvGz(HubaseCsv):
+    def _open(self, path: Path, mode: t.Literal["a", "w"]) -> t.TextIO:
+        # Дозапись в gzip добавляет новый member, такой файл читается
+        # целиком и gzip, и pandas.
+        return gzip.open(path, mode=f"{mode}t", newline="", encoding="utf-8")
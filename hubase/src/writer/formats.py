@@ -0,0 +1,76 @@
+import datetime as dt
+import importlib.util
+import typing as t
+from logging import Logger
+
+from api.model import OutputFormat
+from results_store import ResultsStore
+from settings import Settings
+from writer.abc_ import ResultWriter
+from writer.csv_ import HubaseCsv, HubaseCsvGz
+from writer.jsonl import HubaseJsonLines
+from writer.parquet import HubaseParquet
+
+_writers: dict[str, type] = {
+    "csv": HubaseCsv,
+    "csv.gz": HubaseCsvGz,
+    "jsonl": HubaseJsonLines,
+    "parquet": HubaseParquet,
+}
+
+_media_types = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "jsonl": "application/jsonl",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+_compressed = {"csv.gz", "parquet"}
+
+
+def result_writer(
+    output_format: OutputFormat,
+    headers: list[str],
+    settings: Settings,
+    logger: Logger,
+    *,
+    job_id: str | None = None,
+    store: ResultsStore | None = None,
+    resume: bool = False,
+) -> ResultWriter:
+    if (
+        output_format == "parquet"
+        and importlib.util.find_spec("pyarrow") is None
+    ):
+        logger.warning(
+            "Пакет pyarrow не установлен, сохраняем результат в JSON Lines."
+        )
+        output_format = "jsonl"
+
+    stem = (
+        f"result-{job_id}"
+        if job_id is not None
+        else f"result-{dt.datetime.now().strftime('%m%d%Y-%H%M%S')}"
+    )
+    return _writers[output_format](
+        f"{stem}.{output_format}",
+        headers,
+        settings,
+        store=store,
+        resume=resume,
+    )
+
+
+def output_format_of(name: str) -> OutputFormat:
+    for output_format in sorted(_writers, key=len, reverse=True):
+        if name.endswith(f".{output_format}"):
+            return t.cast(OutputFormat, output_format)
+    return "csv"
+
+
+def media_type_of(name: str) -> str:
+    return _media_types[output_format_of(name)]
+
+
+def is_compressed(name: str) -> bool:
+    return output_format_of(name) in _compressed
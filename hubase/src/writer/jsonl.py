@@ -0,0 +1,38 @@
+import typing as t
+from pathlib import Path
+
+import orjson
+
+from model import CSVRow
+from results_store import ResultsStore
+from settings import Settings
+from writer.text import RowWriter, TextWriter
+
+
+class HubaseJsonLines(TextWriter):
+    def __init__(
+        self,
+        name: str,
+        headers: list[str],
+        settings: Settings,
+        *,
+        store: ResultsStore | None = None,
+        resume: bool = False,
+    ) -> None:
+        super().__init__(name, settings, store=store, resume=resume)
+        self.__headers = headers
+        self.__buffer_size = settings.csv_buffer_size
+
+    def _open(self, path: Path, mode: t.Literal["a", "w"]) -> t.TextIO:
+        return open(
+            path, mode=mode, encoding="utf-8", buffering=self.__buffer_size
+        )
+
+    def _row_writer(self, fd: t.TextIO, *, header: bool) -> RowWriter:
+        def write_row(person: CSVRow) -> None:
+            record = {
+                field: getattr(person, field) for field in self.__headers
+            }
+            fd.write(orjson.dumps(record).decode("utf-8") + "\n")
+
+        return write_row
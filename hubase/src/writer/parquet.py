@@ -0,0 +1,119 @@
+import os
+import threading
+import typing as t
+from pathlib import Path
+
+from model import CSVRow
+from results_store import ResultsStore
+from settings import Settings
+from writer.abc_ import ResultWriter
+
+
+class HubaseParquet(ResultWriter):
+    def __init__(
+        self,
+        name: str,
+        headers: list[str],
+        settings: Settings,
+        *,
+        store: ResultsStore | None = None,
+        resume: bool = False,
+    ) -> None:
+        import pyarrow as pa
+
+        self.__name = name
+        self.__headers = headers
+        self.__settings = settings
+        self.__store = store
+        self.__resume = resume
+        self.__path = Path("../results") / name
+        self.__schema = pa.schema(
+            [(header, pa.string()) for header in headers]
+        )
+        self.__writer = None
+        self.__pending: list[CSVRow] = []
+        self.__lock = threading.Lock()
+
+    def __enter__(self) -> "HubaseParquet":
+        import pyarrow.parquet as pq
+
+        # Parquet нельзя дописать: при возобновлении задачи переносим
+        # уже записанные группы строк в новый файл.
+        previous = (
+            pq.read_table(self.__path, schema=self.__schema)
+            if self.__resume
+            and self.__path.exists()
+            and self.__path.stat().st_size > 0
+            else None
+        )
+        # Пишем в новый файл и подменяем старый, чтобы сменился ETag.
+        tmp_path = self.__path.with_name(f".{self.__name}.tmp")
+        self.__writer = pq.ParquetWriter(tmp_path, self.__schema)
+        os.replace(tmp_path, self.__path)
+        if previous is not None:
+            self.__writer.write_table(previous)
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        with self.__lock:
+            if self.__writer is None:
+                return
+            self.__write_row_group()
+            self.__writer.close()
+
+    def persist(self, person: CSVRow) -> None:
+        with self.__lock:
+            self.__pending.append(person)
+            if len(self.__pending) >= self.__settings.parquet_row_group_size:
+                self.__write_row_group()
+        if self.__store is not None:
+            self.__store.add(person, self.__name)
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__write_row_group()
+
+    def rewrite(self, people: t.Iterable[CSVRow]) -> None:
+        import pyarrow.parquet as pq
+
+        # Parquet нельзя дописать, поэтому rewrite завершает файл:
+        # вызывается в конце задачи, после него строк уже не будет.
+        tmp_path = self.__path.with_name(f".{self.__name}.tmp")
+        with self.__lock:
+            self.__pending = []
+            self.__writer.close()
+            self.__writer = None
+            with pq.ParquetWriter(tmp_path, self.__schema) as writer:
+                batch = []
+                for person in people:
+                    batch.append(person)
+                    if len(batch) >= self.__settings.parquet_row_group_size:
+                        writer.write_table(self.__table(batch))
+                        batch = []
+                if batch:
+                    writer.write_table(self.__table(batch))
+            os.replace(tmp_path, self.__path)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def download_url(self) -> str:
+        return f"http://{self.__settings.download_host}:{self.__settings.port}/static/results/{self.__name}"
+
+    def __write_row_group(self) -> None:
+        if self.__pending:
+            self.__writer.write_table(self.__table(self.__pending))
+            self.__pending = []
+
+    def __table(self, people: list[CSVRow]):
+        import pyarrow as pa
+
+        return pa.Table.from_pylist(
+            [
+                {header: getattr(person, header) for header in self.__headers}
+                for person in people
+            ],
+            schema=self.__schema,
+        )
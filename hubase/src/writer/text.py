@@ -0,0 +1,127 @@
+import abc
+import os
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+from model import CSVRow
+from results_store import ResultsStore
+from settings import Settings
+from writer.abc_ import ResultWriter
+
+RowWriter = t.Callable[[CSVRow], None]
+
+
+class TextWriter(ResultWriter):
+    def __init__(
+        self,
+        name: str,
+        settings: Settings,
+        *,
+        store: ResultsStore | None = None,
+        resume: bool = False,
+    ) -> None:
+        self.__name = name
+        self.__resume = resume
+        self.__settings = settings
+        self.__store = store
+        self.__path = Path("../results") / name
+        self.__fd: t.TextIO | None = None
+        self.__write_row: RowWriter | None = None
+        self.__unflushed_rows = 0
+        self.__flushed_at = time.monotonic()
+        self.__lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__flusher = threading.Thread(
+            target=self.__flush_periodically,
+            name="result-writer-flush",
+            daemon=True,
+        )
+
+    def __enter__(self) -> "TextWriter":
+        if self.__resume:
+            # При возобновлении задачи дописываем в тот же файл без
+            # заголовка.
+            new_file = (
+                not self.__path.exists() or self.__path.stat().st_size == 0
+            )
+            self.__fd = self._open(self.__path, "a")
+        else:
+            # Новый запуск с прежним job_id начинает файл заново. Создаём
+            # его рядом и подменяем, пока старый ещё существует: так у
+            # нового файла будет другой inode, а значит, и другой ETag.
+            new_file = True
+            tmp_path = self.__path.with_name(f".{self.__name}.tmp")
+            self.__fd = self._open(tmp_path, "w")
+            os.replace(tmp_path, self.__path)
+        self.__write_row = self._row_writer(self.__fd, header=new_file)
+        self.__flusher.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb) -> None:
+        self.__closed.set()
+        self.__flusher.join()
+        self.__fd.flush()
+        self.__fd.close()
+
+    def persist(self, person: CSVRow) -> None:
+        with self.__lock:
+            self.__write_row(person)
+            self.__unflushed_rows += 1
+            if (
+                self.__unflushed_rows >= self.__settings.csv_flush_rows
+                or time.monotonic() - self.__flushed_at
+                >= self.__settings.csv_flush_interval
+            ):
+                self.__flush()
+        if self.__store is not None:
+            self.__store.add(person, self.__name)
+
+    def flush(self) -> None:
+        with self.__lock:
+            self.__flush()
+
+    def rewrite(self, people: t.Iterable[CSVRow]) -> None:
+        # Пишем во временный файл и подменяем: тот, кто сейчас скачивает
+        # файл, дочитает старую версию, а не обрезанную.
+        tmp_path = self.__path.with_name(f".{self.__name}.tmp")
+        with self.__lock:
+            with self._open(tmp_path, "w") as fd:
+                write_row = self._row_writer(fd, header=True)
+                for person in people:
+                    write_row(person)
+
+            self.__fd.close()
+            os.replace(tmp_path, self.__path)
+            self.__fd = self._open(self.__path, "a")
+            self.__write_row = self._row_writer(self.__fd, header=False)
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def download_url(self) -> str:
+        return f"http://{self.__settings.download_host}:{self.__settings.port}/static/results/{self.__name}"
+
+    @abc.abstractmethod
+    def _open(self, path: Path, mode: t.Literal["a", "w"]) -> t.TextIO:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _row_writer(self, fd: t.TextIO, *, header: bool) -> RowWriter:
+        raise NotImplementedError()
+
+    def __flush_periodically(self) -> None:
+        # Без этого последняя строка ждёт следующей, даже если она
+        # появится нескоро, и скачивающий её не видит.
+        while not self.__closed.wait(self.__settings.csv_flush_interval):
+            with self.__lock:
+                if self.__unflushed_rows > 0:
+                    self.__flush()
+
+    def __flush(self) -> None:
+        self.__fd.flush()
+        self.__unflushed_rows = 0
+        self.__flushed_at = time.monotonic()
@@ -0,0 +1,21 @@
+from pydantic import SecretStr
+
+from api.model import CsvOptions
+
+
+def csv_options(token: str = "token", **kwargs) -> CsvOptions:
+    return CsvOptions(
+        **{
+            "companies": ["Мосстрой"],
+            "sites": ["rbc.ru"],
+            "positions": ["директор"],
+            "search_query_template": "{company}",
+            "access_token": SecretStr(token),
+            "company_prompt": "",
+            "position_prompt": "",
+            "max_lead_count": 10,
+            "openai_api_key": SecretStr(""),
+            "openai_api_base": "",
+        }
+        | kwargs
+    )
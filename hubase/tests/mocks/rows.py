@@ -0,0 +1,21 @@
+from model import CSVRow
+
+
+def csv_row(
+    name: str,
+    url: str = "https://a.ru",
+    company: str = "Мосстрой",
+    position: str = "Генеральный директор",
+) -> CSVRow:
+    return CSVRow(
+        name=name,
+        source="s",
+        position=position,
+        searched_company=company,
+        inferenced_company=company,
+        original_url=url,
+    )
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
@@ -0,0 +1,55 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from boilerplate import BoilerplateStripper
+from cache.sqlite_store import SqliteStore
+
+menu = "* Главная\n* О нас\n\n* Контакты\n* Вход\n"
+footer = "© 2024 Компания\nВсе права защищены\nПолитика cookies\n"
+
+
+def page(body: str) -> str:
+    return menu + body + footer
+
+
+class TestBoilerplateStripper(unittest.TestCase):
+    def test_first_page_is_kept_as_is(self):
+        stripper = BoilerplateStripper()
+        stripped = stripper.strip("https://a.ru/1", page("Иван Петров\n"))
+        self.assertEqual(page("Иван Петров\n"), stripped.text)
+        self.assertEqual(0, stripped.removed_bytes)
+
+    def test_repeated_blocks_are_removed_on_same_domain(self):
+        stripper = BoilerplateStripper()
+        stripper.strip("https://a.ru/1", page("Иван Петров\n"))
+        stripped = stripper.strip("https://www.a.ru/2", page("Анна Белова\n"))
+
+        self.assertEqual("Анна Белова\n", stripped.text)
+        self.assertEqual(
+            len((menu + footer).encode("utf-8")), stripped.removed_bytes
+        )
+        self.assertGreater(stripped.removed_tokens, 0)
+
+    def test_other_domains_and_short_repeats_are_kept(self):
+        stripper = BoilerplateStripper()
+        stripper.strip("https://a.ru/1", page("Финансовый директор\n"))
+        other = stripper.strip("https://b.ru/1", page("Анна Белова\n"))
+        self.assertEqual(page("Анна Белова\n"), other.text)
+
+        body = "Анна Белова\nФинансовый директор\nО себе\n"
+        stripped = stripper.strip("https://a.ru/2", page(body))
+        self.assertEqual(body, stripped.text)
+
+    def test_index_is_persisted_between_jobs(self):
+        with tempfile.TemporaryDirectory() as dir_:
+            store = SqliteStore(Path(dir_) / "boilerplate.sqlite3")
+            stripper = BoilerplateStripper(store=store)
+            stripper.strip("https://a.ru/1", page("Иван Петров\n"))
+            stripper.save()
+
+            stripper = BoilerplateStripper(store=store)
+            again = stripper.strip("https://a.ru/1", page("Иван Петров\n"))
+            self.assertEqual(page("Иван Петров\n"), again.text)
+            stripped = stripper.strip("https://a.ru/2", page("Анна Белова\n"))
+            self.assertEqual("Анна Белова\n", stripped.text)
@@ -0,0 +1,100 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import googlesearch as google
+from mocks.rows import csv_row
+
+from checkpoint import Checkpoint
+from main import _persisting
+from people_index import PeopleIndex
+from search_page import SearchPage
+from search_queries import SearchQueries
+
+logger = logging.getLogger("test_checkpoint")
+
+
+class _ListWriter:
+    name = "result.csv"
+
+    def __init__(self) -> None:
+        self.rows = []
+
+    def persist(self, row) -> None:
+        self.rows.append(row)
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.__dir.name) / "checkpoints.sqlite3"
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_progress_survives_restart(self):
+        checkpoint = Checkpoint(self.path, "job")
+        checkpoint.query_done("q", ["https://a.ru"])
+        checkpoint.page_done("https://www.a.ru/#top")
+        self.assertTrue(checkpoint.add_row(csv_row("Иван Петров")))
+        checkpoint.close()
+
+        checkpoint = Checkpoint(self.path, "job")
+        self.assertEqual(["https://a.ru"], checkpoint.urls_of("q"))
+        self.assertTrue(checkpoint.is_page_done("https://a.ru/"))
+        self.assertFalse(checkpoint.add_row(csv_row("Иван Петров")))
+        self.assertEqual([csv_row("Иван Петров")], checkpoint.rows())
+        self.assertEqual((1, 1, 1), tuple(vars(checkpoint.stats()).values()))
+
+        other = Checkpoint(self.path, "other-job")
+        self.assertIsNone(other.urls_of("q"))
+        self.assertTrue(other.add_row(csv_row("Иван Петров")))
+
+    def test_delete_forgets_only_own_job(self):
+        checkpoint = Checkpoint(self.path, "job")
+        checkpoint.query_done("q", ["https://a.ru"])
+        checkpoint.page_done("https://a.ru")
+        checkpoint.add_row(csv_row("Иван Петров"))
+        other = Checkpoint(self.path, "other-job")
+        other.add_row(csv_row("Иван Петров"))
+
+        checkpoint.delete()
+        self.assertEqual((0, 0, 0), tuple(vars(checkpoint.stats()).values()))
+        self.assertEqual([csv_row("Иван Петров")], other.rows())
+
+    def test_merged_duplicates_are_checkpointed(self):
+        checkpoint = Checkpoint(self.path, "job")
+        writer = _ListWriter()
+        persist = _persisting(writer, 10, PeopleIndex(), checkpoint)
+        first = csv_row("Иван Петров", url="https://a.ru")
+        duplicate = csv_row("Иван Петров", url="https://b.ru")
+
+        self.assertEqual([first], list(persist(first)))
+        self.assertEqual([], list(persist(duplicate)))
+        self.assertEqual([first], writer.rows)
+        self.assertEqual([first, duplicate], checkpoint.rows())
+
+    @patch.object(google, "search", return_value=["https://a.ru/"])
+    def test_done_queries_are_not_searched_again(self, search):
+        queries = SearchQueries("{company}", ["A"], ["ceo"], [])
+        list(
+            SearchPage(
+                queries, logger, checkpoint=Checkpoint(self.path, "job")
+            ).found()
+        )
+        search_page = SearchPage(
+            queries, logger, checkpoint=Checkpoint(self.path, "job")
+        )
+        found = list(search_page.found())
+
+        self.assertEqual(1, search.call_count)
+        self.assertEqual(["https://a.ru/"], [url for url, _ in found])
+        self.assertEqual(
+            [{"company": "A"}],
+            [
+                {"company": p["company"]}
+                for p in search_page.searching_params_of("https://a.ru/")
+            ],
+        )
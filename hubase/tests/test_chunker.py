@@ -0,0 +1,65 @@
+import unittest
+
+from mocks.rows import count_words
+
+from word_classifications.chunker import (
+    OverlapDeduplicator,
+    TextChunker,
+    approximate_token_count,
+)
+
+
+class TestTextChunker(unittest.TestCase):
+    def test_short_text_is_one_chunk(self):
+        chunks = TextChunker(10, 2, count_words).chunks("Иван Петров, CEO.")
+        self.assertEqual(1, len(chunks))
+        self.assertEqual("Иван Петров, CEO.", chunks[0].text)
+
+    def test_empty_text_has_no_chunks(self):
+        self.assertListEqual([], TextChunker(10, 2, count_words).chunks(" \n"))
+
+    def test_chunks_respect_budget_and_paragraphs(self):
+        text = "one two three\n\nfour five six\n\nseven eight nine"
+        chunks = TextChunker(7, 0, count_words).chunks(text)
+        self.assertListEqual(
+            ["one two three\n\nfour five six\n\n", "seven eight nine"],
+            [chunk.text for chunk in chunks],
+        )
+
+    def test_long_sentence_is_split_by_words(self):
+        text = " ".join(str(i) for i in range(20))
+        chunks = TextChunker(5, 0, count_words).chunks(text)
+        for chunk in chunks:
+            self.assertLessEqual(count_words(chunk.text), 5)
+        self.assertEqual(text, "".join(chunk.text for chunk in chunks))
+
+    def test_chunk_starts_with_overlap(self):
+        text = "a b c d.\nИван Петров директор.\ne f g h."
+        chunks = TextChunker(6, 2, count_words).chunks(text)
+        for chunk in chunks[1:]:
+            self.assertTrue(chunk.text.startswith(chunk.overlap))
+            self.assertNotEqual("", chunk.overlap)
+
+    def test_approximate_token_count(self):
+        self.assertEqual(0, approximate_token_count(""))
+        self.assertEqual(1, approximate_token_count("abc"))
+
+
+class TestOverlapDeduplicator(unittest.TestCase):
+    def test_person_from_overlap_is_duplicate(self):
+        chunks = TextChunker(6, 2, count_words).chunks(
+            "a b c d Иван Петров\ne f g h"
+        )
+        deduplicator = OverlapDeduplicator(chunks)
+        self.assertFalse(deduplicator.is_duplicate(0, "Иван Петров"))
+        self.assertTrue(deduplicator.is_duplicate(1, "иван  петров"))
+
+    def test_person_outside_overlap_is_not_duplicate(self):
+        chunks = TextChunker(4, 1, count_words).chunks(
+            "Иван Петров c d\ne f g Иван Петров"
+        )
+        deduplicator = OverlapDeduplicator(chunks)
+        self.assertFalse(deduplicator.is_duplicate(0, "Иван Петров"))
+        self.assertFalse(
+            deduplicator.is_duplicate(len(chunks) - 1, "Иван Петров")
+        )
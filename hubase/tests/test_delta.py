@@ -0,0 +1,48 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from delta import DeltaStore, content_hash
+from model import CSVRow
+from results_store import ResultsStore
+
+
+class TestDeltaStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.__dir.name)
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_pages_are_remembered_per_scope(self):
+        store = DeltaStore(self.path / "delta.sqlite3")
+        scope = DeltaStore.scope("Мосстрой", '"Мосстрой" AND директор')
+        store.put(scope, "https://www.a.ru/team", content_hash("текст"))
+
+        store = DeltaStore(self.path / "delta.sqlite3")
+        seen = store.get(scope, "https://a.ru/team")
+        self.assertEqual(content_hash("текст"), seen.content_hash)
+        self.assertLessEqual(seen.checked_at, time.time())
+        self.assertIsNone(
+            store.get(DeltaStore.scope("Лукойл", "q"), "https://a.ru/team")
+        )
+
+    def test_leads_from_previous_runs_are_known(self):
+        store = ResultsStore(self.path / "leads.sqlite3")
+        row = CSVRow(
+            name="Иван Петров",
+            source="s",
+            position="CEO",
+            searched_company="Мосстрой",
+            inferenced_company="Мосстрой",
+            original_url="https://a.ru",
+        )
+        store.add(row)
+        started_at = time.time()
+
+        self.assertTrue(store.has_lead(row, before=started_at))
+        self.assertFalse(store.has_lead(row, before=0))
+        other = CSVRow(**{**row.__dict__, "searched_company": "Лукойл"})
+        self.assertFalse(store.has_lead(other))
@@ -0,0 +1,98 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from mocks.options import csv_options
+
+from api.download import (
+    FileReplaced,
+    RangeNotSatisfiable,
+    etag_of,
+    follow_file,
+    gzipped,
+    parse_range,
+    read_range,
+)
+from jobs import Job
+
+
+class TestParseRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertEqual((0, 9), parse_range("bytes=0-9", 100))
+        self.assertEqual((10, 99), parse_range("bytes=10-", 100))
+        self.assertEqual((90, 99), parse_range("bytes=-10", 100))
+        self.assertEqual((50, 99), parse_range("bytes=50-1000", 100))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=100-", "bytes=5-1", "bytes=-", "0-1"):
+            with self.subTest(header=header):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, 100)
+
+
+class TestFollowFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "result.csv"
+        self.path.write_bytes(b"name\n")
+        self.etag = etag_of(self.path.stat())
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_file_is_followed_until_job_is_finished(self):
+        job = Job(csv_options())
+        job.start()
+        chunks = follow_file(
+            self.path, job, etag=self.etag, chunk_size=4, poll_interval=0.01
+        )
+        received = next(chunks)
+
+        def write() -> None:
+            with open(self.path, mode="ab") as fd:
+                fd.write(b"Ivanov\n")
+            job.complete()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        received += b"".join(chunks)
+        writer.join()
+
+        self.assertEqual(b"name\nIvanov\n", received)
+        self.assertEqual(self.etag, etag_of(self.path.stat()))
+
+    def test_follower_fails_when_file_is_rewritten(self):
+        job = Job(csv_options())
+        job.start()
+        chunks = follow_file(
+            self.path, job, etag=self.etag, chunk_size=4, poll_interval=0.01
+        )
+        self.assertEqual(b"name", next(chunks))
+
+        def rewrite() -> None:
+            tmp_path = self.path.with_name("result.csv.tmp")
+            tmp_path.write_bytes(b"name\nIvanov\n")
+            os.replace(tmp_path, self.path)
+            job.complete()
+
+        writer = threading.Thread(target=rewrite)
+        writer.start()
+        with self.assertRaises(FileReplaced):
+            list(chunks)
+        writer.join()
+
+        self.assertNotEqual(self.etag, etag_of(self.path.stat()))
+        with self.assertRaises(FileReplaced):
+            list(read_range(self.path, 0, 3, etag=self.etag, chunk_size=2))
+
+    def test_range_is_read_from_disk(self):
+        chunks = read_range(self.path, 1, 3, etag=self.etag, chunk_size=2)
+        self.assertEqual([b"am", b"e"], list(chunks))
+
+    def test_gzipped_chunks_are_decompressible(self):
+        chunks = list(gzipped([b"name\n", b"Ivanov\n"]))
+        self.assertEqual(b"name\nIvanov\n", gzip.decompress(b"".join(chunks)))
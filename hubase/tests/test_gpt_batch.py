@@ -0,0 +1,228 @@
+import json
+import logging
+import re
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import httpx
+from mocks.rows import count_words
+from openai import OpenAI
+
+from cache.llm import ResponseCache
+from word_classifications.chunker import TextChunker
+from word_classifications.gpt.batch import GPTBatch, GPTBatchException
+
+logger = logging.getLogger("test_gpt_batch")
+
+
+class BatchStandIn:
+    def __init__(
+        self,
+        final_status: str = "completed",
+        malformed: frozenset[str] = frozenset(),
+    ) -> None:
+        self.final_status = final_status
+        self.malformed = malformed
+        self.cancelled: list[str] = []
+        self.files: dict[str, str] = {}
+        self.batches: dict[str, dict] = {}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/v1")
+
+        if request.method == "POST" and path == "/files":
+            lines = re.findall(rb'\{"custom_id".*', request.content)
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = b"\n".join(lines).decode("utf-8")
+            return httpx.Response(200, json=self.__file(file_id))
+
+        if request.method == "POST" and path == "/batches":
+            body = json.loads(request.content)
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = self.__batch(
+                batch_id, body["input_file_id"], "validating"
+            )
+            return httpx.Response(200, json=self.batches[batch_id])
+
+        if request.method == "POST" and path.endswith("/cancel"):
+            batch_id = path.removeprefix("/batches/").removesuffix("/cancel")
+            self.cancelled.append(batch_id)
+            self.batches[batch_id]["status"] = "cancelling"
+            return httpx.Response(200, json=self.batches[batch_id])
+
+        if request.method == "GET" and path.startswith("/batches/"):
+            batch = self.batches[path.removeprefix("/batches/")]
+            batch["status"] = self.final_status
+            if self.final_status == "completed":
+                batch["output_file_id"] = self.__answer(batch["input_file_id"])
+            return httpx.Response(200, json=batch)
+
+        if request.method == "GET" and path.endswith("/content"):
+            file_id = path.removeprefix("/files/").removesuffix("/content")
+            return httpx.Response(200, text=self.files[file_id])
+
+        return httpx.Response(404)
+
+    def __answer(self, input_file_id: str) -> str:
+        results = []
+        for line in self.files[input_file_id].splitlines():
+            request = json.loads(line)
+            text = request["body"]["messages"][0]["content"].strip()
+            people = [{"name": text, "company": "c", "position": "p"}]
+            results.append(
+                {
+                    "id": "r",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {
+                            "choices": [
+                                {
+                                    "message": {
+                                        "role": "assistant",
+                                        "content": (
+                                            "{"
+                                            if text in self.malformed
+                                            else json.dumps({"people": people})
+                                        ),
+                                    }
+                                }
+                            ]
+                        },
+                    },
+                    "error": None,
+                }
+            )
+        file_id = f"file-{len(self.files)}"
+        self.files[file_id] = "\n".join(json.dumps(r) for r in results)
+        return file_id
+
+    @staticmethod
+    def __file(file_id: str) -> dict:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": 0,
+            "created_at": 0,
+            "filename": "batch.jsonl",
+            "purpose": "batch",
+            "status": "processed",
+        }
+
+    @staticmethod
+    def __batch(batch_id: str, input_file_id: str, status: str) -> dict:
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": input_file_id,
+            "completion_window": "24h",
+            "status": status,
+            "created_at": 0,
+        }
+
+
+class TestGPTBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def __batch(self, stand_in: BatchStandIn, **kwargs) -> GPTBatch:
+        client = OpenAI(
+            api_key="key",
+            base_url="http://batch.test/v1",
+            http_client=httpx.Client(
+                transport=httpx.MockTransport(stand_in.handle)
+            ),
+        )
+        return GPTBatch(
+            client,
+            "{input}",
+            logger,
+            batch_dir=Path(self.__dir.name),
+            chunker=TextChunker(1, 0, count_words),
+            poll_interval=0,
+            **kwargs,
+        )
+
+    def test_results_are_mapped_back_to_pages(self):
+        stand_in = BatchStandIn()
+        batch = self.__batch(stand_in, max_requests=2)
+        batch.add("https://a.ru", {"company": "A"}, "ab cd")
+        batch.add("https://b.ru", {"company": "B"}, "ef")
+
+        pages = list(batch.run())
+
+        self.assertDictEqual(
+            {"https://a.ru": ["ab", "cd"], "https://b.ru": ["ef"]},
+            {page.url: [r.person.name for r in page.iter()] for page in pages},
+        )
+        self.assertTrue(all(page.answered for page in pages))
+        self.assertEqual(2, len(stand_in.batches))
+
+    def test_cached_chunks_are_not_submitted(self):
+        cache = ResponseCache()
+        batch = self.__batch(BatchStandIn(), cache=cache)
+        batch.add("https://a.ru", {"company": "A"}, "ab")
+        list(batch.run())
+
+        stand_in = BatchStandIn()
+        batch = self.__batch(stand_in, cache=cache)
+        batch.add("https://a.ru", {"company": "A"}, "ab")
+        pages = list(batch.run())
+
+        self.assertEqual(["ab"], [r.person.name for r in pages[0].iter()])
+        self.assertEqual(0, len(stand_in.batches))
+
+    def test_failed_batch_raises(self):
+        batch = self.__batch(BatchStandIn(final_status="failed"))
+        batch.add("https://a.ru", {"company": "A"}, "ab")
+        with self.assertRaises(GPTBatchException):
+            list(batch.run())
+
+    def test_malformed_answer_is_skipped(self):
+        batch = self.__batch(BatchStandIn(malformed={"cd"}))
+        batch.add("https://a.ru", {"company": "A"}, "ab cd")
+
+        with self.assertLogs(logger, "WARNING"):
+            pages = list(batch.run())
+
+        self.assertEqual(["ab"], [r.person.name for r in pages[0].iter()])
+        self.assertFalse(pages[0].answered)
+
+    def test_stopped_batch_is_cancelled(self):
+        stand_in = BatchStandIn(final_status="in_progress")
+        stop = threading.Event()
+        handle = stand_in.handle
+
+        def handle_and_stop(request: httpx.Request) -> httpx.Response:
+            response = handle(request)
+            if request.url.path.endswith("/batches"):
+                stop.set()
+            return response
+
+        stand_in.handle = handle_and_stop
+        batch = self.__batch(stand_in, cancelled=stop)
+        batch.add("https://a.ru", {"company": "A"}, "ab")
+        pages = list(batch.run())
+
+        self.assertEqual([], list(pages[0].iter()))
+        self.assertFalse(pages[0].answered)
+        self.assertEqual(["batch-0"], stand_in.cancelled)
+
+    def test_request_uses_strict_json_schema(self):
+        stand_in = BatchStandIn()
+        batch = self.__batch(stand_in)
+        batch.add("https://a.ru", {"company": "A"}, "ab")
+        list(batch.run())
+
+        request = json.loads(stand_in.files["file-0"])
+        response_format = request["body"]["response_format"]
+        self.assertEqual("json_schema", response_format["type"])
+        self.assertTrue(response_format["json_schema"]["strict"])
+        person = response_format["json_schema"]["schema"]["$defs"]["GPTPerson"]
+        self.assertFalse(person["additionalProperties"])
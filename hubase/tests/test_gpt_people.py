@@ -0,0 +1,128 @@
+import logging
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from mocks.rows import count_words
+
+from cache.llm import ResponseCache
+from metrics import Metrics
+from word_classifications.chunker import TextChunker
+from word_classifications.gpt.people import GPTPeople, GPTPerson
+
+logger = logging.getLogger("test_gpt_people")
+
+
+def gpt_response(name: str) -> SimpleNamespace:
+    person = GPTPerson(name=name.strip(), company="c", position="p")
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(
+                    parsed=SimpleNamespace(people=[person])
+                )
+            )
+        ],
+        usage=SimpleNamespace(
+            prompt_tokens=2, completion_tokens=1, total_tokens=3
+        ),
+    )
+
+
+def client_answering(answer) -> MagicMock:
+    client = MagicMock()
+    client.beta.chat.completions.parse.side_effect = (
+        lambda messages, **_: answer(messages[0]["content"])
+    )
+    return client
+
+
+class TestGPTPeople(unittest.TestCase):
+    def test_ordered_results_follow_text_order(self):
+        people = GPTPeople(
+            "ab cd ef",
+            "{input}",
+            "key",
+            logger,
+            chunker=TextChunker(1, 0, count_words),
+            client=client_answering(gpt_response),
+            ordered=True,
+        )
+        self.assertListEqual(
+            ["ab", "cd", "ef"], [r.person.name for r in people.iter()]
+        )
+
+    def test_failed_batch_does_not_drop_other_results(self):
+        def answer(prompt: str):
+            if prompt.strip() == "cd":
+                raise RuntimeError("boom")
+            return gpt_response(prompt)
+
+        people = GPTPeople(
+            "ab cd ef",
+            "{input}",
+            "key",
+            logger,
+            chunker=TextChunker(1, 0, count_words),
+            client=client_answering(answer),
+            ordered=False,
+        )
+        self.assertCountEqual(
+            ["ab", "ef"], [r.person.name for r in people.iter()]
+        )
+
+    def test_raise_when_every_batch_failed(self):
+        def answer(prompt: str):
+            raise RuntimeError("boom")
+
+        people = GPTPeople(
+            "ab cd",
+            "{input}",
+            "key",
+            logger,
+            chunker=TextChunker(1, 0, count_words),
+            client=client_answering(answer),
+        )
+        with self.assertRaises(RuntimeError):
+            list(people.iter())
+
+    def test_cached_batches_are_not_sent_again(self):
+        client = client_answering(gpt_response)
+        cache = ResponseCache()
+        for _ in range(2):
+            people = GPTPeople(
+                "ab cd",
+                "{input}",
+                "key",
+                logger,
+                chunker=TextChunker(1, 0, count_words),
+                client=client,
+                cache=cache,
+            )
+            self.assertListEqual(
+                ["ab", "cd"], [r.person.name for r in people.iter()]
+            )
+
+        self.assertEqual(2, client.beta.chat.completions.parse.call_count)
+
+    def test_calls_and_tokens_are_measured(self):
+        metrics = Metrics()
+        client = client_answering(gpt_response)
+        cache = ResponseCache()
+        for _ in range(2):
+            people = GPTPeople(
+                "ab cd",
+                "{input}",
+                "key",
+                logger,
+                chunker=TextChunker(1, 0, count_words),
+                client=client,
+                cache=cache,
+                metrics=metrics.job("job"),
+            )
+            list(people.iter())
+
+        summary = metrics.summary("job")
+        self.assertEqual(2, summary["gpt"]["calls"])
+        self.assertEqual(2, summary["gpt"]["cache_hits"])
+        self.assertEqual({"prompt": 4, "completion": 2}, summary["tokens"])
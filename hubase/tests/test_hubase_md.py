@@ -1,8 +1,12 @@
+import logging
+import tempfile
 import unittest
-from unittest.mock import MagicMock, PropertyMock, patch
+from pathlib import Path
 
-import requests
+import httpx
 
+from cache.sqlite_store import SqliteStore
+from http_client import HttpClient
 from hubase_md import HubaseMd, JinaException
 
 
@@ -18,28 +22,77 @@ def get_jina_error():
 
 jina_success_md = get_jina_success_md()
 jina_error = get_jina_error()
+logger = logging.getLogger("test_hubase_md")
+
+
+def client_returning(text: str, status_code: int = 200) -> HttpClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["X-Return-Format"] == "text"
+        return httpx.Response(status_code, text=text)
+
+    return HttpClient(transport=httpx.MockTransport(handler))
 
 
 class TestHubaseMd(unittest.TestCase):
-    @patch.object(
-        requests.Response,
-        "text",
-        new_callable=PropertyMock,
-        return_value=jina_success_md,
-    )
-    @patch.object(requests, "get", return_value=requests.Response())
-    def test_jina_return_md(self, *_) -> None:
-        hubase_md = HubaseMd(url=MagicMock())
+    def test_jina_return_md(self) -> None:
+        hubase_md = HubaseMd(
+            "https://example.com", logger, client_returning(jina_success_md)
+        )
         md = hubase_md.md
         self.assertEqual(jina_success_md, md)
 
-    @patch.object(
-        requests.Response,
-        "text",
-        new_callable=PropertyMock,
-        return_value=jina_error,
-    )
-    @patch.object(requests, "get", return_value=requests.Response())
-    def test_jina_return_md(self, *_) -> None:
+    def test_jina_raise_exception_on_error(self) -> None:
+        with self.assertRaises(JinaException):
+            _ = HubaseMd(
+                "https://example.com", logger, client_returning(jina_error)
+            ).md
+
+    def test_page_is_served_from_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_:
+            cache = SqliteStore(Path(dir_) / "pages.sqlite3")
+            HubaseMd(
+                "https://example.com/team#top",
+                logger,
+                client_returning(jina_success_md),
+                cache=cache,
+            ).md
+            md = HubaseMd(
+                "HTTPS://Example.com/team",
+                logger,
+                client_returning(jina_error),
+                cache=cache,
+            ).md
+            self.assertEqual(jina_success_md, md)
+            self.assertEqual(1, cache.stats().hits)
+
+    def test_jina_error_is_not_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_:
+            cache = SqliteStore(Path(dir_) / "pages.sqlite3")
+            with self.assertRaises(JinaException):
+                HubaseMd(
+                    "https://example.com",
+                    logger,
+                    client_returning(jina_error),
+                    cache=cache,
+                ).md
+            self.assertEqual(0, cache.stats().entries)
+
+    def test_server_error_is_raised_and_not_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as dir_:
+            cache = SqliteStore(Path(dir_) / "pages.sqlite3")
+            with self.assertRaises(JinaException):
+                HubaseMd(
+                    "https://example.com",
+                    logger,
+                    client_returning("<html>Bad Gateway</html>", 502),
+                    cache=cache,
+                ).md
+            self.assertEqual(0, cache.stats().entries)
+
+    def test_timeout_is_raised_as_jina_exception(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        client = HttpClient(transport=httpx.MockTransport(handler))
         with self.assertRaises(JinaException):
-            _ = HubaseMd(url=MagicMock()).md
+            HubaseMd("https://example.com", logger, client).md
@@ -1,45 +1,229 @@
+import logging
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import PropertyMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock, PropertyMock, patch
 
+from mocks.options import csv_options
+from mocks.rows import csv_row
+
+from cache.llm import ResponseCache
+from cache.sqlite_store import SqliteStore
+from delta import DeltaStore, SeenPage
 from hubase_md import HubaseMd, JinaException
+from llm_qa.abc import LLMClientQA
 from main import _main
+from results_store import ResultsStore
 from search_page import SearchPage
+from settings import settings
+from word_classifications.gpt.batch import GPTBatchPage
+from word_classifications.ner.local import LocalNerBackend
+
+logger = logging.getLogger("test_integration")
+
+
+class AnsweringLLM(LLMClientQA):
+    def __init__(self) -> None:
+        self.prompts = []
 
-jina_exception = JinaException("testexcmsg")
+    def ask(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return '{"company": "Мосстрой", "position": "директор"}'
+
+
+class UnansweredBatch:
+    def __init__(self) -> None:
+        self.pages = []
+
+    def add(self, url: str, searching_params: dict, text: str) -> None:
+        self.pages.append(
+            GPTBatchPage(url, searching_params, chunks=[], unanswered={0})
+        )
+
+    def run(self):
+        yield from self.pages
 
 
 class TestIntegration(unittest.TestCase):
+    def setUp(self) -> None:
+        # Кэши и хранилища пишут в файлы рядом с проектом, поэтому
+        # подменяем их на временные.
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name)
+
+        stores = {
+            "main.default_search_cache": SqliteStore(path / "search.sqlite3"),
+            "main.default_page_cache": SqliteStore(path / "pages.sqlite3"),
+            "main.default_boilerplate_store": SqliteStore(
+                path / "boilerplate.sqlite3"
+            ),
+            "main.default_response_cache": ResponseCache(
+                store=SqliteStore(path / "llm.sqlite3")
+            ),
+            "main.default_delta_store": DeltaStore(path / "delta.sqlite3"),
+            "main.default_results_store": ResultsStore(path / "leads.sqlite3"),
+        }
+        for target, store in stores.items():
+            patcher = patch(target, return_value=store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     @patch.object(
         SearchPage,
-        "__next__",
-        return_value=(
-            "testurl/sub",
-            {
-                "company": "testcompany",
-                "site": "testurl",
-                "positions": ["testpositions"],
-            },
+        "matches_for",
+        return_value=iter(
+            [("https://a.ru/team", {"company": "Мосстрой"}, True)]
         ),
     )
     @patch.object(
-        HubaseMd, "md", new_callable=PropertyMock, side_effect=jina_exception
+        HubaseMd,
+        "md",
+        new_callable=PropertyMock,
+        side_effect=JinaException("testexcmsg"),
     )
-    def test_yield_error_row_on_jina_exception(self, *_):
-        row = next(
-            _main(
-                companies=["testcompany"],
-                sites=["testurl"],
-                positions=["testpositions"],
+    def test_page_is_skipped_on_jina_exception(self, *_):
+        with self.assertLogs(logger, "WARNING") as logs:
+            rows = list(_main(csv_options(), logger))
+
+        self.assertEqual([], rows)
+        self.assertIn("testexcmsg", logs.output[0])
+
+    def test_delta_recheck_interval_is_per_job(self):
+        delta = Mock()
+        delta.get.return_value = SeenPage("hash", time.time() - 2 * 86400)
+
+        def extracted(**kwargs) -> list[str]:
+            with (
+                patch("main.default_delta_store", return_value=delta),
+                patch.object(
+                    SearchPage,
+                    "matches_for",
+                    return_value=iter(
+                        [("https://a.ru/team", {"company": "Мосстрой"}, True)]
+                    ),
+                ),
+                patch.object(
+                    HubaseMd,
+                    "md",
+                    new_callable=PropertyMock,
+                    return_value="md",
+                ),
+                patch(
+                    "main._extract",
+                    side_effect=lambda page, *_: [csv_row("Иван Петров")],
+                ),
+            ):
+                rows = _main(csv_options(delta=True, **kwargs), logger)
+                return [row.name for row in rows]
+
+        self.assertEqual(["Иван Петров"], extracted())
+        self.assertEqual([], extracted(delta_recheck_interval=3 * 86400))
+
+    def test_unanswered_batch_page_is_not_remembered(self):
+        delta = Mock()
+        delta.get.return_value = None
+
+        with (
+            patch("main.default_delta_store", return_value=delta),
+            patch("main._gpt_batch", return_value=UnansweredBatch()),
+            patch.object(
+                SearchPage,
+                "matches_for",
+                return_value=iter(
+                    [("https://a.ru/team", {"company": "Мосстрой"}, True)]
+                ),
+            ),
+            patch.object(
+                HubaseMd, "md", new_callable=PropertyMock, return_value="md"
+            ),
+        ):
+            rows = _main(
+                csv_options(delta=True, extraction_mode="batch"), logger
+            )
+            self.assertEqual([], list(rows))
+
+        delta.put.assert_not_called()
+
+    def test_page_found_after_extraction_is_attributed(self):
+        extracted = threading.Event()
+
+        def search(query: str, stop: int) -> list[str]:
+            # Второй запрос находит страницу, когда она уже обработана.
+            if "Лукойл" in query:
+                self.assertTrue(extracted.wait(5))
+            return ["https://a.ru/team"]
+
+        def extract(page, *_):
+            yield csv_row(
+                "Иван Петров",
+                page.url,
+                company=page.searching_params["company"],
             )
+            extracted.set()
+
+        with (
+            patch("search_page.google.search", side_effect=search),
+            patch("main.default_search_cache", return_value=None),
+            patch("main._extract", side_effect=extract),
+            patch.object(
+                HubaseMd, "md", new_callable=PropertyMock, return_value="md"
+            ),
+        ):
+            rows = list(
+                _main(
+                    csv_options(companies=["Мосстрой", "Лукойл"]),
+                    logger,
+                )
+            )
+
+        self.assertEqual(
+            ["Лукойл", "Мосстрой"],
+            sorted(row.searched_company for row in rows),
         )
-        self.assertDictEqual(
-            {
-                "name": jina_exception,
-                "position": None,
-                "searched_company": "testcompany",
-                "inferenced_company": None,
-                "original_url": "testurl/sub",
-                "source": None,
-            },
-            row,
+
+    def test_ner_extractor_is_used_when_configured(self):
+        backend = LocalNerBackend(executor=ThreadPoolExecutor(1))
+        self.addCleanup(backend.close)
+        llm_qa = AnsweringLLM()
+
+        with (
+            patch.object(settings, "people_extractor", "ner"),
+            patch("main._ner_backend", return_value=backend),
+            patch("main._ner_llm_qa", return_value=llm_qa),
+            patch.object(
+                SearchPage,
+                "matches_for",
+                return_value=iter(
+                    [("https://a.ru/team", {"company": "Мосстрой"}, True)]
+                ),
+            ),
+            patch.object(
+                HubaseMd,
+                "md",
+                new_callable=PropertyMock,
+                return_value="Директор компании Иван Петров.",
+            ),
+        ):
+            rows = list(
+                _main(
+                    csv_options(
+                        company_prompt="Где работает {person}?\n\n{context}",
+                        position_prompt="Кем работает {person}?\n\n{context}",
+                    ),
+                    logger,
+                )
+            )
+
+        self.assertEqual(
+            [("Иван Петров", "директор")],
+            [(row.name, row.position) for row in rows],
         )
+        # Один вопрос на человека, собранный из промптов задачи.
+        self.assertEqual(1, len(llm_qa.prompts))
+        self.assertIn("Где работает Иван Петров?", llm_qa.prompts[0])
+        self.assertIn("Кем работает Иван Петров?", llm_qa.prompts[0])
+        self.assertEqual(1, llm_qa.prompts[0].count("Директор компании"))
@@ -0,0 +1,118 @@
+import threading
+import unittest
+
+from mocks.options import csv_options
+from mocks.rows import csv_row
+
+from jobs import JobLimitExceeded, JobManager, JobNotFound, RowsSkipped
+
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self) -> None:
+        self.release = threading.Event()
+
+    def run_job(self, csv_options, logger, job_id, cancelled):
+        logger.info("Начинаем")
+        yield "http://download/result.csv"
+        yield csv_row("Иван Петров")
+        self.release.wait(5)
+        yield csv_row("Анна Белова")
+
+    def failing_job(self, csv_options, logger, job_id, cancelled):
+        yield "http://download/result.csv"
+        raise ValueError("boom")
+
+    def waiting_job(self, csv_options, logger, job_id, cancelled):
+        yield "http://download/result.csv"
+        yield csv_row("Иван Петров")
+        cancelled.wait(5)
+        self.stopped_by_cancel = cancelled.is_set()
+
+    def test_rows_can_be_followed_from_offset(self):
+        manager = JobManager(self.run_job, max_workers=1)
+        job = manager.submit(csv_options())
+        self.assertIs(job, manager.get(job.id))
+
+        followed = job.follow(0)
+        self.assertEqual("Иван Петров", next(followed).name)
+        self.release.set()
+        self.assertEqual("Анна Белова", next(followed).name)
+
+        status = job.wait(5)
+        self.assertEqual("done", status.state)
+        self.assertEqual(2, status.rows)
+        self.assertEqual(1, status.logs)
+        self.assertEqual("http://download/result.csv", status.download_link)
+        self.assertEqual(
+            ["Анна Белова"], [r.name for r in job.follow(offset=1)]
+        )
+        manager.shutdown()
+
+    def test_failed_job_keeps_error(self):
+        manager = JobManager(self.failing_job)
+        status = manager.submit(csv_options()).wait(5)
+        self.assertEqual("failed", status.state)
+        self.assertEqual("boom", status.error)
+        manager.shutdown()
+
+    def test_running_job_id_is_not_reused(self):
+        manager = JobManager(self.run_job)
+        job = manager.submit(csv_options(job_id="weekly"))
+        with self.assertRaises(JobLimitExceeded):
+            manager.submit(csv_options(job_id="weekly"))
+        manager.submit(csv_options())
+
+        job.cancel()
+        self.release.set()
+        job.wait(5)
+        manager.submit(csv_options(job_id="weekly"))
+        manager.shutdown()
+
+    def test_queued_job_can_be_cancelled(self):
+        manager = JobManager(self.run_job, max_workers=1)
+        running = manager.submit(csv_options("a"))
+        queued = manager.submit(csv_options("b"))
+        queued.cancel()
+        self.assertEqual("cancelled", queued.status().state)
+
+        self.release.set()
+        self.assertEqual("done", running.wait(5).state)
+        with self.assertRaises(JobNotFound):
+            manager.get("missing")
+        manager.shutdown()
+
+    def test_running_job_sees_cancel(self):
+        manager = JobManager(self.waiting_job, max_workers=1)
+        job = manager.submit(csv_options())
+        self.assertEqual("Иван Петров", next(job.follow(0)).name)
+
+        job.cancel()
+        self.assertEqual("cancelled", job.wait(5).state)
+        self.assertTrue(self.stopped_by_cancel)
+        manager.shutdown()
+
+    def test_follow_stops_on_event(self):
+        manager = JobManager(self.run_job, max_workers=1)
+        job = manager.submit(csv_options())
+        stop = threading.Event()
+        followed = job.follow(0, stop=stop, poll_interval=0.01)
+        self.assertEqual("Иван Петров", next(followed).name)
+
+        stop.set()
+        self.assertEqual([], list(followed))
+        self.release.set()
+        manager.shutdown()
+
+    def test_buffered_rows_are_capped(self):
+        self.release.set()
+        manager = JobManager(self.run_job, max_buffered_rows=1)
+        status = manager.submit(csv_options()).wait(5)
+        self.assertEqual(2, status.rows)
+
+        job = manager.get(status.id)
+        self.assertEqual(
+            [RowsSkipped(offset=0, count=1), csv_row("Анна Белова")],
+            list(job.follow(offset=0)),
+        )
+        self.assertEqual([csv_row("Анна Белова")], list(job.follow(1)))
+        manager.shutdown()
@@ -0,0 +1,69 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from cache.llm import ResponseCache
+from cache.sqlite_store import SqliteStore
+from llm_qa.cached import CachedLLMClientQA
+from llm_qa.mistral import LLMClientQAMistral
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_depends_on_every_parameter(self):
+        key = ResponseCache.key("m", "p", {"type": "object"}, 0)
+        self.assertEqual(
+            key, ResponseCache.key("m", "p", {"type": "object"}, 0)
+        )
+        self.assertNotEqual(
+            key, ResponseCache.key("m2", "p", {"type": "object"}, 0)
+        )
+        self.assertNotEqual(key, ResponseCache.key("m", "p", None, 0))
+        self.assertNotEqual(
+            key, ResponseCache.key("m", "p", {"type": "object"}, 1)
+        )
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+
+        self.assertEqual("1", cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(2, cache.stats().entries)
+
+    def test_store_outlives_memory(self):
+        with tempfile.TemporaryDirectory() as dir_:
+            path = Path(dir_) / "llm.sqlite3"
+            ResponseCache(store=SqliteStore(path)).put("a", "1")
+            cache = ResponseCache(store=SqliteStore(path))
+            self.assertEqual("1", cache.get("a"))
+            self.assertEqual(1.0, cache.stats().hit_rate)
+
+
+class TestCachedLLMClientQA(unittest.TestCase):
+    def test_same_prompt_is_asked_once(self):
+        inner = MagicMock()
+        inner.ask.return_value = "ООО Ромашка"
+        llm_qa = CachedLLMClientQA(inner, ResponseCache(), model="m")
+
+        self.assertEqual("ООО Ромашка", llm_qa.ask("prompt"))
+        self.assertEqual("ООО Ромашка", llm_qa.ask("prompt"))
+        inner.ask.assert_called_once_with("prompt")
+
+    @patch("llm_qa.mistral.MistralClient")
+    def test_mistral_answers_are_deterministic(self, client):
+        client.return_value.chat.return_value.choices = [
+            MagicMock(message=MagicMock(content="ООО Ромашка"))
+        ]
+        mistral = LLMClientQAMistral(logging.getLogger("test_llm_cache"))
+
+        self.assertEqual("ООО Ромашка", mistral.ask("prompt"))
+        self.assertEqual(0, mistral.temperature)
+        self.assertEqual(
+            mistral.temperature,
+            client.return_value.chat.call_args.kwargs["temperature"],
+        )
@@ -0,0 +1,76 @@
+import importlib.util
+import logging
+import multiprocessing
+import unittest
+from unittest.mock import patch
+
+from word_classifications.chunker import TextChunker
+from word_classifications.names import find_names
+from word_classifications.ner.local import (
+    LocalNerBackend,
+    model_token_counter,
+)
+from word_classifications.ner.people import NerPeople
+
+logger = logging.getLogger("test_local_ner")
+
+
+class TestFindNames(unittest.TestCase):
+    def test_names_are_found(self):
+        text = (
+            "Генеральный директор Иван Петрович Сидоров рассказал, "
+            "что А. В. Белова возглавит отдел."
+        )
+        self.assertEqual(
+            ["Иван Петрович Сидоров", "А. В. Белова"],
+            [text[start:end] for start, end in find_names(text)],
+        )
+
+    def test_positions_are_not_names(self):
+        self.assertEqual([], list(find_names("Генеральный Директор")))
+
+
+class TestLocalNerBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__backend = LocalNerBackend(model="some/model", workers=2)
+
+    def tearDown(self) -> None:
+        self.__backend.close()
+
+    def test_each_text_gets_its_own_entities(self):
+        responses = self.__backend.safely_call_many(
+            ["Иван Сидоров", "Ничего нет", "Анна Белова и Олег Орлов"]
+        )
+        self.assertEqual(
+            [["Иван Сидоров"], [], ["Анна Белова", "Олег Орлов"]],
+            [[r.word for r in response] for response in responses],
+        )
+        self.assertEqual(11, responses[2][0].end)
+        self.assertTrue(self.__backend.rule_based)
+
+    @unittest.skipIf(
+        importlib.util.find_spec("transformers") is not None,
+        "transformers установлен",
+    )
+    def test_token_counter_needs_transformers(self):
+        self.assertIsNone(model_token_counter("some/model"))
+
+    def test_pool_does_not_fork(self):
+        with patch.object(
+            multiprocessing, "get_context", wraps=multiprocessing.get_context
+        ) as get_context:
+            LocalNerBackend(workers=1).close()
+        get_context.assert_called_once_with("spawn")
+
+    def test_works_as_ner_people_backend(self):
+        people = NerPeople(
+            "Анна Белова\n\nОлег Орлов\n",
+            self.__backend,
+            logger,
+            chunker=TextChunker(6, 0),
+            batch_size=1,
+        )
+        self.assertEqual(
+            ["Анна Белова", "Олег Орлов"],
+            [person.name for person in people.iter()],
+        )
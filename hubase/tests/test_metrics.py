@@ -0,0 +1,57 @@
+import unittest
+
+from metrics import NO_METRICS, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_timed_calls_are_counted_and_summarized(self):
+        metrics = Metrics()
+        job = metrics.job("job")
+        with job.timed("search", "google"):
+            pass
+        with self.assertRaises(ValueError):
+            with job.timed("search", "google"):
+                raise ValueError("boom")
+        job.cache_hit("search")
+        job.tokens("gpt-4o-mini", prompt=100, completion=20)
+
+        summary = metrics.summary("job")
+        self.assertEqual(2, summary["search"]["calls"])
+        self.assertEqual(1, summary["search"]["errors"])
+        self.assertEqual(1, summary["search"]["cache_hits"])
+        self.assertIn("seconds", summary["search"])
+        self.assertEqual({"prompt": 100, "completion": 20}, summary["tokens"])
+        self.assertEqual({}, metrics.summary("other"))
+
+    def test_render_prometheus_text(self):
+        metrics = Metrics()
+        with metrics.job('a"b').timed("fetch", "jina"):
+            pass
+
+        text = metrics.render()
+        self.assertIn("# TYPE hubase_stage_calls_total counter", text)
+        self.assertIn(
+            'hubase_stage_calls_total{backend="jina",job="a\\"b",'
+            'stage="fetch"} 1',
+            text,
+        )
+        self.assertIn(
+            'hubase_stage_duration_seconds_bucket{backend="jina",'
+            'job="a\\"b",stage="fetch",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn("hubase_stage_duration_seconds_count", text)
+
+    def test_oldest_jobs_are_forgotten(self):
+        metrics = Metrics(max_jobs=1)
+        with metrics.job("old").timed("persist", "csv"):
+            pass
+        metrics.job("new")
+
+        self.assertEqual({}, metrics.summary("old"))
+        self.assertNotIn('job="old"', metrics.render())
+
+    def test_no_metrics_does_nothing(self):
+        with NO_METRICS.timed("gpt", "gpt-4o-mini"):
+            NO_METRICS.cache_hit("gpt")
+            NO_METRICS.tokens("gpt-4o-mini", 1, 1)
@@ -0,0 +1,87 @@
+import threading
+import unittest
+
+from llm_qa.abc import LLMClientQA
+from prompt.in_memory import InMemoryPrompt
+from word_classifications.model import Person
+from word_classifications.ner.csv_rows import NerCSVRows
+
+
+class StubPeople:
+    def __init__(self, people: list[Person]) -> None:
+        self.__people = people
+
+    def iter(self):
+        yield from self.__people
+
+
+class RecordingQA(LLMClientQA):
+    def __init__(self, answer: str) -> None:
+        self.answer = answer
+        self.prompts: list[str] = []
+        self.__lock = threading.Lock()
+
+    def ask(self, prompt: str) -> str:
+        with self.__lock:
+            self.prompts.append(prompt)
+        if prompt.startswith("both"):
+            return self.answer
+        return prompt.split(":")[0]
+
+
+class TestNerCSVRows(unittest.TestCase):
+    def __rows(self, qa: RecordingQA, people: list[Person]) -> list:
+        return list(
+            NerCSVRows(
+                StubPeople(people),
+                qa,
+                InMemoryPrompt("company:{person}"),
+                InMemoryPrompt("position:{person}"),
+                "https://a.ru",
+                {"company": "A"},
+                company_and_position_prompt=InMemoryPrompt("both:{person}"),
+                max_in_flight=2,
+            ).iter()
+        )
+
+    def test_one_structured_ask_per_unique_person(self):
+        qa = RecordingQA('```json\n{"company": "A", "position": "CEO"}\n```')
+        rows = self.__rows(
+            qa,
+            [
+                Person("Иван Петров", "s1"),
+                Person("иван  петров", "s1"),
+                Person("Анна Белова", "s1"),
+                Person("Иван Петров", "s2"),
+            ],
+        )
+
+        self.assertEqual(
+            [
+                ("Иван Петров", "s1"),
+                ("Анна Белова", "s1"),
+                ("Иван Петров", "s2"),
+            ],
+            [(row.name, row.source) for row in rows],
+        )
+        self.assertEqual(3, len(qa.prompts))
+        self.assertEqual(
+            {("A", "CEO")},
+            {(row.inferenced_company, row.position) for row in rows},
+        )
+
+    def test_falls_back_to_two_asks(self):
+        qa = RecordingQA("не знаю")
+        rows = self.__rows(qa, [Person("Иван Петров", "s1")])
+
+        self.assertEqual(3, len(qa.prompts))
+        self.assertEqual("company", rows[0].inferenced_company)
+        self.assertEqual("position", rows[0].position)
+
+    def test_unknown_fields_do_not_trigger_fallback(self):
+        qa = RecordingQA('{"company": null, "position": "CEO"}')
+        rows = self.__rows(qa, [Person("Иван Петров", "s1")])
+
+        self.assertEqual(1, len(qa.prompts))
+        self.assertEqual("", rows[0].inferenced_company)
+        self.assertEqual("CEO", rows[0].position)
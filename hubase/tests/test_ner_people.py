@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+import unittest
+from unittest.mock import patch
+
+import requests
+from mocks.rows import count_words
+from requests.adapters import BaseAdapter
+
+from exceptions import HuggingFaceException
+from settings import settings
+from word_classifications.chunker import TextChunker
+from word_classifications.ner.client import NerClient
+from word_classifications.ner.people import NerPeople
+
+logger = logging.getLogger("test_ner_people")
+
+
+class NerStandIn(BaseAdapter):
+    def __init__(self, error: str | None = None) -> None:
+        super().__init__()
+        self.error = error
+        self.payloads: list[dict] = []
+        self.timeouts: list = []
+        self.__lock = threading.Lock()
+
+    def send(self, request, **kwargs) -> requests.Response:
+        payload = json.loads(request.body)
+        with self.__lock:
+            self.payloads.append(payload)
+            self.timeouts.append(kwargs.get("timeout"))
+
+        if self.error is not None:
+            body = {"error": self.error}
+        else:
+            body = [self.__entities(text) for text in payload["inputs"]]
+            if len(body) == 1:
+                body = body[0]
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode("utf-8")
+        response.request = request
+        return response
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def __entities(text: str) -> list[dict]:
+        name = text.strip()
+        return [
+            {
+                "entity_group": "PER",
+                "score": 0.99,
+                "word": name,
+                "start": 0,
+                "end": len(name),
+            },
+            {
+                "entity_group": "ORG",
+                "score": 0.99,
+                "word": "ООО",
+                "start": 0,
+                "end": 3,
+            },
+        ]
+
+
+class TestNerPeople(unittest.TestCase):
+    def __client(self, stand_in: NerStandIn) -> NerClient:
+        session = requests.Session()
+        session.mount("http://", stand_in)
+        return NerClient(
+            "http://ner.test/model",
+            "token",
+            logger,
+            session=session,
+            timeout=(1.0, 2.0),
+        )
+
+    def test_chunks_are_packed_into_batches(self):
+        stand_in = NerStandIn()
+        people = NerPeople(
+            "Иван Анна Олег Петр Вера",
+            self.__client(stand_in),
+            logger,
+            chunker=TextChunker(1, 0, count_words),
+            batch_size=2,
+            max_in_flight=2,
+        )
+
+        self.assertEqual(
+            ["Иван", "Анна", "Олег", "Петр", "Вера"],
+            [person.name for person in people.iter()],
+        )
+        self.assertEqual(
+            [1, 2, 2],
+            sorted(len(payload["inputs"]) for payload in stand_in.payloads),
+        )
+        self.assertEqual({(1.0, 2.0)}, set(stand_in.timeouts))
+
+    def test_sources_are_mapped_to_chunks(self):
+        people = NerPeople(
+            "Иван Анна",
+            self.__client(NerStandIn()),
+            logger,
+            chunker=TextChunker(1, 0, count_words),
+        )
+        for person in people.iter():
+            self.assertEqual(person.name, person.source.strip())
+
+    def test_error_is_raised(self):
+        people = NerPeople(
+            "Иван",
+            self.__client(NerStandIn(error="loading")),
+            logger,
+        )
+        with self.assertRaises(HuggingFaceException):
+            list(people.iter())
+
+    def test_chunk_size_comes_from_settings(self):
+        stand_in = NerStandIn()
+        with (
+            patch.object(settings, "ner_chunk_max_tokens", 2),
+            patch.object(settings, "ner_chunk_overlap_tokens", 0),
+        ):
+            people = NerPeople(
+                "Иван\n\n" * 20, self.__client(stand_in), logger
+            )
+        list(people.iter())
+        self.assertLess(1, sum(len(p["inputs"]) for p in stand_in.payloads))
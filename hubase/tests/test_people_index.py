@@ -0,0 +1,53 @@
+import unittest
+
+from mocks.rows import csv_row
+
+from people_index import PeopleIndex, normalized_tokens
+
+
+class TestNormalizedTokens(unittest.TestCase):
+    def test_spellings_are_normalized(self):
+        for a, b in (
+            ("Алёна Соловьёва", "алена соловьева"),
+            ("Юрий Хабибуллин", "Yuri Khabibulin"),
+            ("Алексей Петров", "Aleksey Petrov"),
+            ("Иван Петрович Сидоров", "Иван Сидоров"),
+        ):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(normalized_tokens(a), normalized_tokens(b))
+
+
+class TestPeopleIndex(unittest.TestCase):
+    def test_duplicates_are_merged(self):
+        index = PeopleIndex()
+        self.assertTrue(index.add(csv_row("Иван Петров", "https://a.ru")))
+        self.assertFalse(index.add(csv_row("Петров Иван", "https://b.ru")))
+        self.assertFalse(index.add(csv_row("Ivan Petrov", "https://a.ru")))
+        self.assertFalse(index.add(csv_row("И. Петров", "https://c.ru")))
+
+        rows = list(index.rows())
+        self.assertEqual(1, len(rows))
+        self.assertEqual("Иван Петров", rows[0].name)
+        self.assertEqual(
+            "https://a.ru https://b.ru https://c.ru", rows[0].original_url
+        )
+        self.assertEqual(3, index.stats.merged)
+
+    def test_initials_are_upgraded_to_full_name(self):
+        index = PeopleIndex()
+        index.add(csv_row("И. И. Петров", "https://a.ru"))
+        self.assertFalse(
+            index.add(csv_row("Иван Ильич Петров", "https://b.ru"))
+        )
+        self.assertEqual(["Иван Ильич Петров"], [r.name for r in index.rows()])
+
+    def test_different_people_are_kept(self):
+        index = PeopleIndex()
+        self.assertTrue(index.add(csv_row("Иван Петров", "https://a.ru")))
+        self.assertTrue(index.add(csv_row("Игорь Петров", "https://a.ru")))
+        self.assertTrue(
+            index.add(csv_row("Иван Петров", "https://a.ru", "Лукойл"))
+        )
+        # Инициалы подходят обоим Петровым, поэтому не объединяем.
+        self.assertTrue(index.add(csv_row("И. Петров", "https://b.ru")))
+        self.assertEqual(4, index.stats.unique)
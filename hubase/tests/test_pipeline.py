@@ -0,0 +1,80 @@
+import logging
+import threading
+import unittest
+
+from pipeline import InFlightBudget, Pipeline, PipelineClosed, Stage
+
+logger = logging.getLogger("test_pipeline")
+
+
+def double(item: int):
+    yield item * 2
+
+
+def split(item: int):
+    yield item
+    yield -item
+
+
+class TestPipeline(unittest.TestCase):
+    def test_all_items_pass_through_all_stages(self):
+        pipeline = Pipeline(
+            [Stage("double", double, 3), Stage("split", split, 2)],
+            logger,
+            queue_size=2,
+        )
+        result = list(pipeline.run(range(50)))
+        expected = [x * 2 for x in range(50)] + [-x * 2 for x in range(50)]
+        self.assertCountEqual(expected, result)
+
+    def test_stage_error_is_raised_to_consumer(self):
+        def fail(item: int):
+            if item == 3:
+                raise ValueError("boom")
+            yield item
+
+        pipeline = Pipeline([Stage("fail", fail, 2)], logger)
+        with self.assertRaises(ValueError):
+            list(pipeline.run(range(10)))
+
+    def test_consumer_can_stop_early(self):
+        pipeline = Pipeline([Stage("double", double, 2)], logger)
+        rows = pipeline.run(iter(range(10**9)))
+        self.assertEqual(2, len([next(rows), next(rows)]))
+        rows.close()
+
+    def test_cancel_event_stops_pipeline(self):
+        cancelled = threading.Event()
+        pipeline = Pipeline([Stage("double", double, 2)], logger)
+        rows = pipeline.run(iter(range(10**9)), cancelled=cancelled)
+        next(rows)
+        cancelled.set()
+        self.assertLess(len(list(rows)), 10**9)
+
+
+class TestInFlightBudget(unittest.TestCase):
+    def test_oversized_item_passes_when_budget_is_empty(self):
+        budget = InFlightBudget(max_items=1, max_bytes=10)
+        budget.acquire()
+        budget.add_bytes(100)
+        budget.release(100)
+
+    def test_acquire_waits_for_release(self):
+        budget = InFlightBudget(max_items=1, max_bytes=10)
+        budget.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            budget.acquire()
+            acquired.set()
+
+        threading.Thread(target=acquire, daemon=True).start()
+        self.assertFalse(acquired.wait(0.2))
+        budget.release()
+        self.assertTrue(acquired.wait(1))
+
+    def test_close_wakes_waiters(self):
+        budget = InFlightBudget(max_items=0, max_bytes=10)
+        budget.close()
+        with self.assertRaises(PipelineClosed):
+            budget.acquire()
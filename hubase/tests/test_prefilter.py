@@ -0,0 +1,35 @@
+import unittest
+
+from word_classifications.prefilter import PeoplePrefilter
+
+
+class TestPeoplePrefilter(unittest.TestCase):
+    __accepted_params = [
+        "Генеральный директор Иван Петров рассказал о планах.",
+        "Спикер: Петров И. В.",
+        "Ivan Petrov, Chief Financial Officer",
+        "Екатерина Сергеевна отвечает за закупки.",
+    ]
+    __skipped_params = [
+        "Мы используем cookies для улучшения работы сайта.",
+        "© 2024 все права защищены. 8 800 555 35 35",
+    ]
+
+    def test_chunks_with_people_are_accepted(self):
+        prefilter = PeoplePrefilter([])
+        for text in self.__accepted_params:
+            with self.subTest(text=text):
+                self.assertTrue(prefilter.accepts(text))
+
+    def test_chunks_without_people_are_skipped(self):
+        prefilter = PeoplePrefilter([])
+        for text in self.__skipped_params:
+            with self.subTest(text=text):
+                self.assertFalse(prefilter.accepts(text))
+        self.assertEqual(len(self.__skipped_params), prefilter.skipped)
+
+    def test_searched_positions_count_as_signal(self):
+        self.assertFalse(PeoplePrefilter([]).accepts("наш технолог на связи"))
+        self.assertTrue(
+            PeoplePrefilter(['"Технолог"']).accepts("наш технолог на связи")
+        )
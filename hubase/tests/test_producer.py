@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import unittest
+
+from api.producer import Producer
+
+
+class TestProducer(unittest.IsolatedAsyncioTestCase):
+    async def test_items_are_sent_in_batches(self):
+        producer = Producer(
+            iter(range(5)), asyncio.get_running_loop(), queue_size=10
+        ).start()
+
+        self.assertEqual(0, await producer.next())
+        batches = [batch async for batch in producer.batches(2, max_delay=1.0)]
+        self.assertEqual([[1, 2], [3, 4]], batches)
+
+    async def test_error_is_raised_after_sent_items(self):
+        def items():
+            yield 1
+            raise ValueError("boom")
+
+        producer = Producer(items(), asyncio.get_running_loop()).start()
+        received = []
+        with self.assertRaises(ValueError):
+            async for batch in producer.batches(10, max_delay=1.0):
+                received.extend(batch)
+        self.assertEqual([1], received)
+
+    async def test_cancel_closes_the_generator(self):
+        closed = threading.Event()
+
+        def items():
+            try:
+                i = 0
+                while True:
+                    yield i
+                    i += 1
+            finally:
+                closed.set()
+
+        producer = Producer(
+            items(), asyncio.get_running_loop(), queue_size=2
+        ).start()
+        await producer.next()
+        producer.cancel()
+
+        self.assertEqual(
+            [], [batch async for batch in producer.batches(10, 0.1)]
+        )
+        await asyncio.get_running_loop().run_in_executor(None, closed.wait, 5)
+        self.assertTrue(closed.is_set())
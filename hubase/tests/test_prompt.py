@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from prompt.cached import Cached
+from prompt.fs_prompt import FileSystemPrompt
+from prompt.in_memory import InMemoryPrompt
+from word_classifications.gpt.client import OpenAIClients
+
+
+class CountingPrompt(InMemoryPrompt):
+    def __init__(self, prompt) -> None:
+        super().__init__(prompt)
+        self.reads = 0
+
+    def get(self) -> str:
+        self.reads += 1
+        return super().get()
+
+
+class TestCachedPrompt(unittest.TestCase):
+    def test_prompt_is_read_once(self):
+        inner = CountingPrompt("{input}")
+        prompt = Cached(inner)
+        for _ in range(3):
+            self.assertEqual("{input}", prompt.get())
+        self.assertEqual(1, inner.reads)
+
+    def test_file_change_invalidates_prompt(self):
+        with tempfile.TemporaryDirectory() as dir_:
+            path = Path(dir_) / "prompt.txt"
+            path.write_text("old {input}")
+            prompt = Cached(FileSystemPrompt(path))
+            self.assertEqual("old {input}", prompt.get())
+
+            path.write_text("new prompt {input}")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            self.assertEqual("new prompt {input}", prompt.get())
+
+    def test_update_is_visible(self):
+        prompt = Cached(InMemoryPrompt("old"))
+        prompt.get()
+        prompt.update("new")
+        self.assertEqual("new", prompt.get())
+
+
+class TestOpenAIClients(unittest.TestCase):
+    def test_client_is_reused_per_credentials(self):
+        clients = OpenAIClients()
+        first = clients.get("key")
+        self.assertIs(first, clients.get("key"))
+        self.assertIsNot(first, clients.get("key", "http://llm.test/v1"))
+        self.assertIsNot(first, clients.get("other"))
+        clients.close()
+        self.assertIsNot(first, clients.get("key"))
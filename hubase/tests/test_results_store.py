@@ -0,0 +1,54 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from mocks.rows import csv_row
+
+from results_store import LeadsQuery, ResultsStore
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.store = ResultsStore(Path(self.__dir.name) / "leads.sqlite3")
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_leads_are_queried_by_normalized_fields(self):
+        self.store.add(csv_row("Алёна Соловьёва"), "result-1.csv")
+        self.store.add(
+            csv_row("Иван Петров", company="Лукойл"), "result-1.csv"
+        )
+
+        page = self.store.query(LeadsQuery(name="соловьева алена"))
+        self.assertEqual(["Алёна Соловьёва"], [l.name for l in page.leads])
+        self.assertEqual("result-1.csv", page.leads[0].result_file)
+
+        page = self.store.query(LeadsQuery(searched_company=" ЛУКОЙЛ "))
+        self.assertEqual(["Иван Петров"], [l.name for l in page.leads])
+
+        page = self.store.query(LeadsQuery(position="директор"))
+        self.assertEqual(2, page.total)
+
+    def test_same_lead_is_stored_once(self):
+        self.assertTrue(self.store.add(csv_row("Иван Петров")))
+        self.assertFalse(self.store.add(csv_row("Петров Иван")))
+        self.assertTrue(
+            self.store.add(csv_row("Иван Петров", url="https://b.ru"))
+        )
+        self.assertEqual(2, self.store.query(LeadsQuery()).total)
+
+    def test_pagination_and_export(self):
+        names = ["Анна", "Вера", "Иван", "Олег", "Петр"]
+        for name in names:
+            self.store.add(csv_row(f"{name} Петров"))
+
+        page = self.store.query(LeadsQuery(), limit=2, offset=2)
+        self.assertEqual(5, page.total)
+        self.assertEqual(
+            ["Иван Петров", "Олег Петров"], [l.name for l in page.leads]
+        )
+        self.assertEqual(
+            5, len(list(self.store.export(LeadsQuery(), batch_size=2)))
+        )
@@ -0,0 +1,111 @@
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import googlesearch as google
+
+from cache.sqlite_store import SqliteStore
+from search_page import SearchPage
+from search_queries import SearchQueries
+from urls import canonical_url
+
+logger = logging.getLogger("test_search_page")
+
+
+class TestCanonicalUrl(unittest.TestCase):
+    __equal_urls_params = [
+        (
+            "http://www.Example.com/team?utm_source=google#contacts",
+            "https://example.com/team",
+        ),
+        (
+            "https://example.com:443/team?b=2&a=1&gclid=xyz",
+            "https://example.com/team?a=1&b=2",
+        ),
+        ("https://example.com", "https://example.com/"),
+    ]
+
+    def test_equal_urls(self):
+        for url, other in self.__equal_urls_params:
+            with self.subTest(url=url, other=other):
+                self.assertEqual(canonical_url(url), canonical_url(other))
+
+    def test_custom_port_is_kept(self):
+        self.assertEqual(
+            "http://example.com:8080/",
+            canonical_url("http://example.com:8080"),
+        )
+
+
+class TestSearchPage(unittest.TestCase):
+    @patch.object(
+        google,
+        "search",
+        side_effect=lambda query, stop: [
+            "https://www.example.com/team?utm_source=x",
+            f"https://{query.lower()}.ru/",
+        ],
+    )
+    def test_duplicates_are_dropped_and_attributed(self, *_):
+        search_page = SearchPage(
+            SearchQueries("{company}", ["A", "B"], ["ceo"], []), logger
+        )
+        found = list(search_page.found())
+
+        self.assertListEqual(
+            [
+                "https://www.example.com/team?utm_source=x",
+                "https://a.ru/",
+                "https://b.ru/",
+            ],
+            [url for url, _ in found],
+        )
+        self.assertListEqual(
+            ["A", "B"],
+            [
+                params["company"]
+                for params in search_page.searching_params_of(
+                    "http://example.com/team"
+                )
+            ],
+        )
+
+
+class TestSearchPageCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__cache = SqliteStore(Path(self.__dir.name) / "search.sqlite3")
+        self.__queries = SearchQueries("{company}", ["A"], ["ceo"], [])
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_repeated_query_does_not_hit_search(self):
+        with patch.object(
+            google, "search", return_value=["https://a.ru/"]
+        ) as search:
+            for _ in range(2):
+                found = SearchPage(
+                    self.__queries, logger, cache=self.__cache
+                ).found()
+                self.assertListEqual(["https://a.ru/"], [u for u, _ in found])
+
+        self.assertEqual(1, search.call_count)
+
+    def test_refresh_bypasses_cached_results(self):
+        with patch.object(google, "search", return_value=["https://a.ru/"]):
+            list(
+                SearchPage(self.__queries, logger, cache=self.__cache).found()
+            )
+
+        with patch.object(
+            google, "search", return_value=["https://b.ru/"]
+        ) as search:
+            found = SearchPage(
+                self.__queries, logger, cache=self.__cache, refresh_cache=True
+            ).found()
+            self.assertListEqual(["https://b.ru/"], [u for u, _ in found])
+
+        self.assertEqual(1, search.call_count)
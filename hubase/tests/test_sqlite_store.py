@@ -0,0 +1,49 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from cache.sqlite_store import SqliteStore
+
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.__dir = tempfile.TemporaryDirectory()
+        self.__path = Path(self.__dir.name) / "store.sqlite3"
+
+    def tearDown(self) -> None:
+        self.__dir.cleanup()
+
+    def test_hit_and_miss_are_counted(self):
+        store = SqliteStore(self.__path)
+        self.assertIsNone(store.get("key"))
+        store.put("key", b"value")
+        self.assertEqual(b"value", store.get("key"))
+
+        stats = store.stats()
+        self.assertEqual(1, stats.hits)
+        self.assertEqual(1, stats.misses)
+        self.assertEqual(1, stats.entries)
+
+    def test_expired_entry_is_a_miss(self):
+        store = SqliteStore(self.__path, ttl=60)
+        store.put("key", b"value", ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(store.get("key"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        store = SqliteStore(self.__path, max_bytes=20)
+        store.put("old", b"x" * 10)
+        store.put("used", b"x" * 10)
+        store.get("old")
+        store.put("new", b"x" * 10)
+
+        self.assertIsNotNone(store.get("old"))
+        self.assertIsNone(store.get("used"))
+        self.assertIsNotNone(store.get("new"))
+
+    def test_compressed_value_survives_reopen(self):
+        SqliteStore(self.__path, compress=True).put("key", b"a" * 1000)
+        store = SqliteStore(self.__path)
+        self.assertEqual(b"a" * 1000, store.get("key"))
+        self.assertLess(store.stats().size, 1000)
@@ -0,0 +1,156 @@
+import csv
+import gzip
+import importlib.util
+import logging
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import orjson
+from mocks.rows import csv_row
+
+from settings import settings
+from writer.formats import (
+    is_compressed,
+    media_type_of,
+    output_format_of,
+    result_writer,
+)
+
+headers = ["name", "position", "original_url"]
+
+
+class TestResultWriters(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.results = Path(directory.name) / "results"
+        self.results.mkdir()
+        (Path(directory.name) / "src").mkdir()
+
+        cwd = os.getcwd()
+        os.chdir(Path(directory.name) / "src")
+        self.addCleanup(os.chdir, cwd)
+        self.logger = logging.getLogger("test_writers")
+
+    def write(
+        self, output_format: str, *names: str, resume: bool = False
+    ) -> str:
+        with result_writer(
+            output_format,
+            headers,
+            settings,
+            self.logger,
+            job_id="job",
+            resume=resume,
+        ) as writer:
+            for name in names:
+                writer.persist(csv_row(name))
+        return writer.name
+
+    def test_csv_is_appended_on_resume(self):
+        self.write("csv", "Иванов")
+        name = self.write("csv", "Петров", resume=True)
+
+        with open(self.results / name, encoding="utf-8") as fd:
+            rows = list(csv.DictReader(fd))
+        self.assertEqual(["Иванов", "Петров"], [r["name"] for r in rows])
+
+    def test_new_run_starts_a_new_file(self):
+        self.write("csv", "Иванов")
+        inode = (self.results / "result-job.csv").stat().st_ino
+        name = self.write("csv", "Петров")
+
+        with open(self.results / name, encoding="utf-8") as fd:
+            rows = list(csv.DictReader(fd))
+        self.assertEqual(["Петров"], [r["name"] for r in rows])
+        self.assertNotEqual(inode, (self.results / name).stat().st_ino)
+
+    def test_gzip_csv_is_appended_on_resume(self):
+        self.write("csv.gz", "Иванов")
+        name = self.write("csv.gz", "Петров", resume=True)
+
+        self.assertEqual("result-job.csv.gz", name)
+        with gzip.open(self.results / name, "rt", encoding="utf-8") as fd:
+            rows = list(csv.DictReader(fd))
+        self.assertEqual(["Иванов", "Петров"], [r["name"] for r in rows])
+
+    def test_jsonl_rows_have_only_headers(self):
+        name = self.write("jsonl", "Иванов")
+
+        lines = (self.results / name).read_bytes().splitlines()
+        self.assertEqual(
+            [
+                {
+                    "name": "Иванов",
+                    "position": "Генеральный директор",
+                    "original_url": "https://a.ru",
+                }
+            ],
+            [orjson.loads(line) for line in lines],
+        )
+
+    def test_rows_are_flushed_without_next_row(self):
+        with (
+            patch.object(settings, "csv_flush_rows", 100),
+            patch.object(settings, "csv_flush_interval", 0.01),
+            result_writer(
+                "csv", headers, settings, self.logger, job_id="job"
+            ) as writer,
+        ):
+            writer.persist(csv_row("Иванов"))
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                content = (self.results / writer.name).read_text("utf-8")
+                if "Иванов" in content:
+                    break
+                time.sleep(0.01)
+
+        self.assertIn("Иванов", content)
+
+    def test_rewrite_replaces_rows(self):
+        with result_writer(
+            "jsonl", headers, settings, self.logger, job_id="job"
+        ) as writer:
+            writer.persist(csv_row("Иванов"))
+            writer.persist(csv_row("Иванов"))
+            writer.rewrite([csv_row("Иванов")])
+            writer.persist(csv_row("Петров"))
+
+        lines = (self.results / writer.name).read_bytes().splitlines()
+        self.assertEqual(
+            ["Иванов", "Петров"],
+            [orjson.loads(line)["name"] for line in lines],
+        )
+
+    @unittest.skipIf(
+        importlib.util.find_spec("pyarrow") is not None,
+        "pyarrow установлен",
+    )
+    def test_parquet_falls_back_to_jsonl_without_pyarrow(self):
+        with self.assertLogs(self.logger, "WARNING"):
+            name = self.write("parquet", "Иванов")
+        self.assertEqual("result-job.jsonl", name)
+
+    @unittest.skipIf(
+        importlib.util.find_spec("pyarrow") is None, "нет pyarrow"
+    )
+    def test_parquet_is_written_in_row_groups(self):
+        import pyarrow.parquet as pq
+
+        self.write("parquet", "Иванов")
+        name = self.write("parquet", "Петров", resume=True)
+
+        table = pq.read_table(self.results / name)
+        self.assertEqual(
+            ["Иванов", "Петров"], table.column("name").to_pylist()
+        )
+
+    def test_formats_by_file_name(self):
+        self.assertEqual("csv.gz", output_format_of("result-1.csv.gz"))
+        self.assertEqual("text/csv", media_type_of("result-1.csv"))
+        self.assertTrue(is_compressed("result-1.parquet"))
+        self.assertFalse(is_compressed("result-1.jsonl"))
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+import threading
+import unittest
+
+from api.ws_logging_handler import WebSocketLoggingHandler
+
+
+class RecordingWebSocket:
+    def __init__(self) -> None:
+        self.messages: list[dict] = []
+
+    async def send_text(self, text: str) -> None:
+        self.messages.append(json.loads(text))
+
+
+class TestWebSocketLoggingHandler(unittest.IsolatedAsyncioTestCase):
+    def __logger(self, handler: logging.Handler) -> logging.Logger:
+        logger = logging.getLogger(f"test_ws_{id(handler)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger
+
+    async def test_records_from_threads_are_coalesced(self):
+        ws = RecordingWebSocket()
+        handler = WebSocketLoggingHandler(ws, flush_interval=60).start()
+        logger = self.__logger(handler)
+
+        threads = [
+            threading.Thread(target=logger.info, args=(f"запись {i}",))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        await handler.aclose()
+
+        self.assertEqual(1, len(ws.messages))
+        self.assertEqual("log", ws.messages[0]["type"])
+        self.assertEqual(
+            ["запись 0", "запись 1", "запись 2"],
+            sorted(ws.messages[0]["data"].split("\n")),
+        )
+
+    async def test_overflow_is_summarized(self):
+        ws = RecordingWebSocket()
+        handler = WebSocketLoggingHandler(
+            ws, max_records=2, flush_interval=0.01
+        ).start()
+        logger = self.__logger(handler)
+
+        for i in range(5):
+            logger.info(f"запись {i}")
+        await asyncio.sleep(0.05)
+        await handler.aclose()
+
+        self.assertEqual(
+            "запись 0\nзапись 1\n... пропущено сообщений: 3",
+            ws.messages[0]["data"],
+        )
@@ -16,7 +16,7 @@ import LoadingButton from '@mui/lab/LoadingButton';
 import {Controller, SubmitHandler, useForm} from "react-hook-form";
 import {CreateCsvOptions} from "../models/CreateCsvOptions.ts";
 import {useState} from "react";
-import {CsvResponse, IRow, IRowWithId} from "../models/CsvResponse.ts";
+import {CsvResponse, IRow, IRowWithId, JobStatus, RowsSkipped} from "../models/CsvResponse.ts";
 import PromptForm from "./PromptForm.tsx";
 import DataGridTable from "./table/DataGridTable.tsx";
 import SimpleTable from "./table/SimpleTable.tsx";
@@ -149,9 +149,36 @@ const CreateCsvForm = () => {
 
         setCsvDownloadLink(csv_row.download_link);
         setRows((prev) => [...prev, csv_row_with_id]);
+      } else if (row.type === "csv_rows") {
+        const csv_rows = row.data as IRow[]
+        const csv_rows_with_id = csv_rows.map((csv_row) => ({id: uuidv4(), ...csv_row}))
+
+        if (csv_rows.length > 0) {
+          setCsvDownloadLink(csv_rows[0].download_link);
+        }
+        setRows((prev) => [...prev, ...csv_rows_with_id]);
+      } else if (row.type === "rows_skipped") {
+        const rows_skipped = row.data as RowsSkipped
+        logMessage(`Пропущено строк: ${rows_skipped.count}, они есть в файле результата.`);
       } else if (row.type === "log") {
-        const log_entry = row.data as string
-        logMessage(log_entry);
+        const log_entries = (row.data as string).split("\n")
+        log_entries.forEach(logMessage);
+      } else if (row.type === "job") {
+        logMessage(`Задача запущена: ${row.data as string}`);
+      } else if (row.type === "status") {
+        const job_status = row.data as JobStatus
+        if (job_status.error !== null) {
+          logMessage(`Ошибка: ${job_status.error}`);
+        }
+        if (job_status.download_link !== null) {
+          setCsvDownloadLink(job_status.download_link);
+        }
+        for (const [stage, stats] of Object.entries(job_status.metrics ?? {})) {
+          const summary = Object.entries(stats)
+            .map(([name, value]) => `${name}: ${value}`)
+            .join(", ");
+          logMessage(`Статистика ${stage}: ${summary}`);
+        }
       }
     };
 
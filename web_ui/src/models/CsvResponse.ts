@@ -12,12 +12,29 @@ interface IRowWithId extends IRow {
   id: string;
 }
 
+type JobMetrics = Record<string, Record<string, number>>;
+
+interface JobStatus {
+  id: string;
+  state: "queued" | "running" | "done" | "failed" | "cancelled";
+  rows: number;
+  logs: number;
+  download_link: string | null;
+  error: string | null;
+  metrics?: JobMetrics;
+}
+
+interface RowsSkipped {
+  offset: number;
+  count: number;
+}
+
 interface CsvResponse {
-  type: "log" | "csv_row";
-  data: IRow | string;
+  type: "log" | "csv_row" | "csv_rows" | "rows_skipped" | "job" | "status";
+  data: IRow[] | IRow | RowsSkipped | JobStatus | string;
 }
 
 
 export type {
-  IRow, IRowWithId, CsvResponse
+  IRow, IRowWithId, JobMetrics, JobStatus, RowsSkipped, CsvResponse
 }
\ No newline at end of file